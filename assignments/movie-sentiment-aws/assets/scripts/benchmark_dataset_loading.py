@@ -0,0 +1,130 @@
+"""
+Benchmarks the load time and peak memory of the IMDB dataset, read with
+`pd.read_csv` as before and from its columnar copy (see `src.core.dataset`), for
+what each service loads:
+- training: the reviews and sentiments.
+- monitoring: the review lengths and sentiments.
+- example: the backend's review store.
+
+Each measurement runs in a fresh interpreter with the libraries already imported,
+and the peak memory is the growth of its peak resident set size while loading.
+The "first load" row includes the one-time conversion of the CSV.
+
+Usage (from the project root):
+    uv run assets/scripts/benchmark_dataset_loading.py [--data PATH] [--runs 3]
+
+Without --data, the configured development dataset is used if it exists, and a
+synthetic one of the same size otherwise.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_DATA = PROJECT_ROOT / "assets" / "data" / "IMDB Dataset.csv"
+
+# Run in the child interpreter; {load} is the code being measured
+CHILD = """
+import json, resource, time
+from pathlib import Path
+import pandas as pd
+from src.core import dataset
+from src.fastapi_backend.utils.review_store import ReviewStore
+dataset.CACHE_DIR = Path({cache_dir!r})
+path = Path({data!r})
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+result = {load}
+seconds = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before
+print("BENCHMARK" + json.dumps({{"seconds": seconds, "peak_mb": peak / 1024}}))
+"""
+
+CASES = {
+    "training": (
+        "pd.read_csv(path)",
+        "dataset.load_dataset(path, ['review', 'sentiment'])",
+    ),
+    "monitoring": (
+        "pd.read_csv(path)",
+        "dataset.load_dataset(path, ['review_length', 'sentiment'])",
+    ),
+    "example": ("pd.read_csv(path)", "ReviewStore(path)"),
+}
+
+
+def make_synthetic_dataset(path: Path, reviews: int = 50000) -> None:
+    """Writes a CSV shaped like the IMDB dataset (~65 MB for 50k reviews)."""
+    rng = random.Random(0)
+    words = ["movie", "great", "awful", "plot", "acting", "boring", "loved", "the"]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("review,sentiment\n")
+        for _ in range(reviews):
+            text = " ".join(rng.choices(words, k=rng.randint(40, 400)))
+            sentiment = rng.choice(["positive", "negative"])
+            f.write(f'"{text}, ""really"".",{sentiment}\n')
+
+
+def measure(load: str, data: Path, cache_dir: Path) -> dict:
+    """Runs one fresh interpreter and returns its load time and peak memory."""
+    try:
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                CHILD.format(load=load, data=str(data), cache_dir=str(cache_dir)),
+            ],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Load failed:\n{e.stderr[-2000:]}") from e
+    for line in result.stdout.splitlines():
+        if line.startswith("BENCHMARK"):
+            return json.loads(line.removeprefix("BENCHMARK"))
+    raise RuntimeError(f"Load did not report its timings:\n{result.stdout[-2000:]}")
+
+
+def summarize(measurements: list[dict]) -> str:
+    seconds = statistics.median(m["seconds"] for m in measurements)
+    peak_mb = statistics.median(m["peak_mb"] for m in measurements)
+    return f"{seconds:>8.3f}s {peak_mb:>8.1f}MB"
+
+
+def benchmark(data: Path, runs: int) -> None:
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache_dir = Path(cache_dir)
+        print(f"Dataset: {data} ({data.stat().st_size / 1024**2:.1f} MB)")
+        first = measure(CASES["training"][1], data, cache_dir)
+        print(f"{'first load':>12} {'':>20} {summarize([first])}")
+        print(f"{'case':>12} {'csv':>20} {'columnar':>20}")
+        for case, (csv_load, columnar_load) in CASES.items():
+            csv_runs = [measure(csv_load, data, cache_dir) for _ in range(runs)]
+            columnar_runs = [
+                measure(columnar_load, data, cache_dir) for _ in range(runs)
+            ]
+            print(f"{case:>12} {summarize(csv_runs)} {summarize(columnar_runs)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--data", type=Path, default=None)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    if args.data is not None:
+        benchmark(args.data, args.runs)
+    elif DEFAULT_DATA.exists():
+        benchmark(DEFAULT_DATA, args.runs)
+    else:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data = Path(temp_dir) / "synthetic.csv"
+            make_synthetic_dataset(data)
+            benchmark(data, args.runs)
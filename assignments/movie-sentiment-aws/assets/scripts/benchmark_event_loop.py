@@ -0,0 +1,118 @@
+"""
+Benchmarks how responsive the FastAPI event loop stays under concurrent load,
+with blocking inference run inline on the loop vs. on the execution layer's pools.
+
+A steady stream of fast /predict requests is sent while large /predict_proba_batch
+requests arrive periodically, and the latency percentiles of the fast requests
+are reported for inline execution, the thread pool and the process pool.
+
+Usage (from the project root):
+    uv run assets/scripts/benchmark_event_loop.py
+"""
+
+import asyncio
+import logging
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import httpx
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+
+from src.fastapi_backend import main
+from src.fastapi_backend.utils.model_loader import model_manager
+
+HEAVY_REQUESTS = 20
+HEAVY_INTERVAL = 0.25  # seconds between heavy requests
+HEAVY_BATCH_SIZE = 128
+WORDS = [f"word{i}" for i in range(5000)] + ["great", "awful", "boring", "loved"]
+
+
+def random_review(n_words: int) -> str:
+    return " ".join(random.choices(WORDS, k=n_words))
+
+
+def build_model() -> Pipeline:
+    """Trains a small pipeline with the same structure as the production model."""
+    X = [random_review(200) for _ in range(2000)]
+    y = [random.randint(0, 1) for _ in X]
+    pipeline = Pipeline(
+        [
+            ("tfidf", TfidfVectorizer(max_features=10000, stop_words="english")),
+            ("classifier", MultinomialNB()),
+        ]
+    )
+    return pipeline.fit(X, y)
+
+
+async def run_load(client: httpx.AsyncClient) -> list[float]:
+    """
+    Sends a steady stream of light single requests while heavy batch requests
+    arrive periodically.
+    Returns:
+        list[float]: The latencies of the light requests in milliseconds.
+    """
+    heavy_payload = {"texts": [random_review(300) for _ in range(HEAVY_BATCH_SIZE)]}
+    latencies = []
+    heavy_done = asyncio.Event()
+
+    async def light_stream():
+        while not heavy_done.is_set():
+            start = time.perf_counter()
+            response = await client.post("/predict", json={"text": "A great movie"})
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    async def heavy_stream():
+        requests = []
+        for _ in range(HEAVY_REQUESTS):
+            requests.append(
+                asyncio.create_task(
+                    client.post("/predict_proba_batch", json=heavy_payload)
+                )
+            )
+            await asyncio.sleep(HEAVY_INTERVAL)
+        await asyncio.gather(*requests)
+        heavy_done.set()
+
+    await asyncio.gather(light_stream(), heavy_stream())
+    return latencies
+
+
+def percentile(values: list[float], q: float) -> float:
+    return statistics.quantiles(values, n=100)[int(q) - 1]
+
+
+async def benchmark():
+    random.seed(42)
+    model_manager.swap(build_model(), version="benchmark")
+    # Keep logging I/O out of the measurement
+    logging.getLogger("main").setLevel(logging.WARNING)
+    main.prediction_logger.disabled = True
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for mode in ("inline", "thread", "process"):
+            main.execution.shutdown()
+            main.execution.enabled = mode != "inline"
+            main.execution.inference_pool = mode if mode != "inline" else "thread"
+            latencies = await run_load(client)
+            print(
+                f"{mode:>8}: {len(latencies):5d} light requests  "
+                f"p50={percentile(latencies, 50):8.2f} ms  "
+                f"p99={percentile(latencies, 99):8.2f} ms  "
+                f"max={max(latencies):8.2f} ms"
+            )
+    main.execution.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(benchmark())
@@ -0,0 +1,85 @@
+"""
+Benchmarks the JSON formatting of prediction log records.
+
+Compares the previous `JsonFormatter` (strftime and stdlib json per record) with
+`FastJsonFormatter` using the stdlib and orjson backends, and checks that all of
+them produce the same JSON objects.
+
+Usage (from the project root):
+    uv run assets/scripts/benchmark_json_formatter.py
+"""
+
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.core.logging_config import (
+    FastJsonFormatter,
+    JsonFormatter,
+    orjson,
+)
+
+RECORDS = 200_000
+REVIEW = "An absolutely wonderful film with a gripping story. " * 10  # ~500 chars
+
+
+def make_records() -> list[logging.LogRecord]:
+    """Builds prediction log records spread over a few seconds, like live traffic."""
+    start = time.time()
+    records = []
+    for i in range(RECORDS):
+        record = logging.LogRecord(
+            "prediction_logger",
+            logging.INFO,
+            __file__,
+            0,
+            {
+                "endpoint": "/predict_proba",
+                "prediction_id": f"{i:032x}",
+                "request_text": REVIEW,
+                "model_version": "2025-01-01T00:00:00",
+                "predicted_sentiment": "positive",
+                "probability": 0.93,
+            },
+            None,
+            None,
+        )
+        record.created = start + i / 50_000
+        record.msecs = int((record.created - int(record.created)) * 1000) + 0.0
+        records.append(record)
+    return records
+
+
+def benchmark():
+    records = make_records()
+    formatters = {"JsonFormatter": JsonFormatter()}
+    formatters["FastJsonFormatter[json]"] = FastJsonFormatter(json_backend="json")
+    if orjson is not None:
+        formatters["FastJsonFormatter[orjson]"] = FastJsonFormatter(
+            json_backend="orjson"
+        )
+
+    expected = [json.loads(JsonFormatter().format(record)) for record in records[:100]]
+    baseline = None
+    for name, formatter in formatters.items():
+        assert [
+            json.loads(formatter.format(record)) for record in records[:100]
+        ] == expected, f"{name} changed the log schema"
+
+        start = time.perf_counter()
+        for record in records:
+            formatter.format(record)
+        per_record = (time.perf_counter() - start) / RECORDS * 1_000_000
+        baseline = baseline or per_record
+        print(
+            f"{name:>26}: {per_record:6.2f} us/record  "
+            f"speedup={baseline / per_record:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,120 @@
+"""
+Benchmarks the per-request overhead of the request/response logging middleware.
+
+Compares no middleware, the previous pair of `BaseHTTPMiddleware` layers (which
+buffer the request and response bodies and rebuild the response), and the pure
+ASGI `RequestLoggingMiddleware` at full and 10% sampling.
+
+Usage (from the project root):
+    uv run assets/scripts/benchmark_middleware.py
+"""
+
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.core import logger
+from src.fastapi_backend.utils.middleware import RequestLoggingMiddleware
+
+REQUESTS = 2000
+REVIEW = "An absolutely wonderful film with a gripping story. " * 40  # ~2 KB
+
+
+async def legacy_log_middleware_request(request: Request, call_next):
+    """The previous request logging middleware, kept here for comparison."""
+    log_dict = {
+        "url": request.url,
+        "method": request.method,
+        "input": str(await request.body()),
+    }
+    logger.info(f"Request: {log_dict}")
+    return await call_next(request)
+
+
+async def legacy_log_middleware_response(request: Request, call_next):
+    """The previous response logging middleware, kept here for comparison."""
+    response = await call_next(request)
+    response_body = b""
+    async for chunk in response.body_iterator:
+        response_body += chunk
+    new_response = Response(
+        content=response_body,
+        status_code=response.status_code,
+        headers=dict(response.headers),
+        media_type=response.media_type,
+    )
+    response_log = {
+        "url": str(request.url),
+        "method": request.method,
+        "status_code": response.status_code,
+        "response": response_body.decode() if response_body else None,
+    }
+    logger.info(f"Response: {response_log}")
+    return new_response
+
+
+def build_app(variant: str) -> FastAPI:
+    """Builds a minimal app with the given logging middleware variant."""
+    app = FastAPI()
+
+    @app.post("/predict")
+    async def predict(payload: dict) -> dict:
+        return {"sentiment": "positive", "echo": payload["text"]}
+
+    if variant == "legacy":
+        app.add_middleware(BaseHTTPMiddleware, dispatch=legacy_log_middleware_request)
+        app.add_middleware(BaseHTTPMiddleware, dispatch=legacy_log_middleware_response)
+    elif variant == "asgi":
+        app.add_middleware(RequestLoggingMiddleware)
+    elif variant == "asgi-sampled":
+        app.add_middleware(RequestLoggingMiddleware, sample_rate=0.1)
+    return app
+
+
+async def measure(app: FastAPI) -> list[float]:
+    """
+    Returns:
+        list[float]: Per-request latencies in microseconds.
+    """
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for _ in range(REQUESTS):
+            start = time.perf_counter()
+            response = await client.post("/predict", json={"text": REVIEW})
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1_000_000)
+    return latencies
+
+
+async def benchmark():
+    baseline = None
+    for variant in ("none", "legacy", "asgi", "asgi-sampled"):
+        latencies = await measure(build_app(variant))
+        mean = statistics.mean(latencies)
+        baseline = baseline or mean
+        print(
+            f"{variant:>13}: mean={mean:8.1f} us  "
+            f"p99={statistics.quantiles(latencies, n=100)[98]:8.1f} us  "
+            f"overhead={mean - baseline:8.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    # Log to /dev/null so the comparison measures the middleware, not the terminal
+    with open(os.devnull, "w") as devnull:
+        logger.handlers = [logging.StreamHandler(devnull)]
+        asyncio.run(benchmark())
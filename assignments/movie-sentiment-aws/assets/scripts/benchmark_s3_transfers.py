@@ -0,0 +1,90 @@
+"""
+Benchmarks S3 upload and download times as the object size grows.
+
+Compares plain `upload_file`/`download_file` with default settings against
+`upload_to_s3`/`download_from_s3`, which use the configured part size and
+concurrency, resumable ranged downloads and checksum verification. Runs against
+a local moto server, so the numbers show the client-side overhead of each
+strategy rather than real network throughput.
+
+Usage (from the project root):
+    APP_ENV=production uv run --extra dev assets/scripts/benchmark_s3_transfers.py
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from moto.server import ThreadedMotoServer
+
+PORT = 5055
+BUCKET = "benchmark"
+SIZES_MB = [4, 16, 64, 256]
+
+os.environ.update(
+    {
+        "S3_ENDPOINT_URL": f"http://127.0.0.1:{PORT}",
+        "S3_BUCKET_NAME": BUCKET,
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+    }
+)
+
+from src.core import aws
+
+
+def timed(function, *args) -> float:
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def benchmark():
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = ThreadedMotoServer(port=PORT, verbose=False)
+    server.start()
+    try:
+        client = aws.get_s3_client()
+        client.create_bucket(Bucket=BUCKET)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            print(f"{'size':>8} {'':>9} {'default':>9} {'tuned':>9}")
+            for size_mb in SIZES_MB:
+                source = temp_dir / f"{size_mb}mb.bin"
+                source.write_bytes(os.urandom(size_mb * aws.MB))
+                key = f"bench/{source.name}"
+                target = temp_dir / "download.bin"
+
+                default_upload = timed(
+                    client.upload_file, str(source), BUCKET, key + ".default"
+                )
+                tuned_upload = timed(aws.upload_to_s3, source, key)
+                default_download = timed(
+                    client.download_file, BUCKET, key + ".default", str(target)
+                )
+                target.unlink()
+                tuned_download = timed(aws.download_from_s3, BUCKET, key, target)
+                assert target.read_bytes() == source.read_bytes()
+                target.unlink()
+                source.unlink()
+
+                print(
+                    f"{size_mb:>5} MB {'upload':>9} {default_upload:>8.2f}s "
+                    f"{tuned_upload:>8.2f}s"
+                )
+                print(
+                    f"{'':>8} {'download':>9} {default_download:>8.2f}s "
+                    f"{tuned_download:>8.2f}s"
+                )
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    benchmark()
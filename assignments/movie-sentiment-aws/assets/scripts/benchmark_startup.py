@@ -0,0 +1,125 @@
+"""
+Benchmarks the import time and startup latency of every service, and fails when
+one exceeds its budget.
+
+Each measurement runs in a fresh interpreter, so nothing is already imported:
+- import: importing the service's entry module.
+- startup: the work the service does before it can serve, e.g. loading the model
+  for the backend. Skipped when the assets it needs are not available locally.
+
+Usage (from the project root):
+    uv run assets/scripts/benchmark_startup.py [--runs 5] [--budget-scale 1.0]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Service -> (import budget, startup budget) in seconds, None for no startup phase
+BUDGETS = {
+    "backend": (1.5, 10.0),
+    "frontend": (1.5, None),
+    "monitoring": (1.5, 5.0),
+    "trainer": (3.0, None),
+}
+
+# Run in the child interpreter: {import} and {startup} are the service's phases
+CHILD = """
+import json, time
+start = time.perf_counter()
+{import_code}
+imported = time.perf_counter()
+startup = None
+try:
+    {startup_code}
+    startup = time.perf_counter() - imported
+except SystemExit:
+    pass  # A required asset is missing
+print("BENCHMARK" + json.dumps({{"import": imported - start, "startup": startup}}))
+"""
+
+SERVICES = {
+    "backend": (
+        "from src.fastapi_backend.main import app",
+        "from fastapi.testclient import TestClient\n"
+        + "    from src.core import get_asset_path\n"
+        + "    get_asset_path('model'), get_asset_path('data')\n"
+        + "    with TestClient(app):\n"
+        + "        pass",
+    ),
+    "frontend": ("import src.streamlit_frontend.app", "pass"),
+    "monitoring": (
+        "from src.streamlit_monitoring.utils import data_loader",
+        "data_loader.load_log_frame(['text_length', 'predicted_sentiment'])\n"
+        + "    data_loader.load_feedback_frame()\n"
+        + "    data_loader.load_imdb_dataset()",
+    ),
+    "trainer": ("import src.sklearn_training.train_model", "pass"),
+}
+
+
+def measure(service: str) -> dict:
+    """Runs one fresh interpreter and returns its phase timings in seconds."""
+    import_code, startup_code = SERVICES[service]
+    try:
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                CHILD.format(import_code=import_code, startup_code=startup_code),
+            ],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"{service} failed to start:\n{e.stderr[-2000:]}") from e
+    for line in result.stdout.splitlines():
+        if line.startswith("BENCHMARK"):
+            return json.loads(line.removeprefix("BENCHMARK"))
+    raise RuntimeError(
+        f"{service} did not report its timings:\n{result.stdout[-2000:]}"
+    )
+
+
+def benchmark(runs: int, budget_scale: float) -> bool:
+    """
+    Returns:
+        bool: Whether every service stayed within its budgets.
+    """
+    within_budget = True
+    print(f"{'service':>10} {'phase':>8} {'median':>9} {'budget':>9}")
+    for service, budgets in BUDGETS.items():
+        timings = [measure(service) for _ in range(runs)]
+        for phase, budget in zip(("import", "startup"), budgets):
+            if budget is None:
+                continue
+            values = [t[phase] for t in timings if t[phase] is not None]
+            if not values:
+                print(f"{service:>10} {phase:>8} {'skipped (missing assets)':>20}")
+                continue
+            median = statistics.median(values)
+            budget *= budget_scale
+            status = "ok" if median <= budget else "OVER BUDGET"
+            within_budget &= median <= budget
+            print(f"{service:>10} {phase:>8} {median:>8.3f}s {budget:>8.3f}s  {status}")
+    return within_budget
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--budget-scale",
+        type=float,
+        default=1.0,
+        help="Multiplies every budget, e.g. for slower CI machines.",
+    )
+    args = parser.parse_args()
+    sys.exit(0 if benchmark(args.runs, args.budget_scale) else 1)
@@ -1,15 +1,79 @@
-from .load_config import config, PROJECT_ROOT
-from .aws import download_from_s3, upload_to_s3
-from .logging_config import logger, prediction_logger
-from .asset_resolution import get_asset_path
+"""
+Configuration, logging, asset and AWS helpers shared by every service.
+
+Attributes are imported from their submodule on first access, so each service only
+pays for what it uses: importing `logger` does not import boto3 or NumPy, and the
+configuration is loaded when it is first needed.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+# Public attribute -> the submodule that defines it
+_LAZY_ATTRIBUTES = {
+    "config": "load_config",
+    "PROJECT_ROOT": "load_config",
+    "logger": "logging_config",
+    "prediction_logger": "logging_config",
+    "get_logging_stats": "base_logger",
+    "get_asset_path": "asset_resolution",
+    "get_asset_version": "asset_resolution",
+    "get_local_asset_version": "asset_resolution",
+    "prefetch_assets": "asset_resolution",
+    "ReviewScores": "review_scores",
+    "get_file_checksum": "review_scores",
+    "load_review_scores": "review_scores",
+    "save_review_scores": "review_scores",
+    "upload_to_s3": "aws",
+    "download_from_s3": "aws",
+}
+
+if TYPE_CHECKING:
+    from .load_config import config, PROJECT_ROOT
+    from .aws import download_from_s3, upload_to_s3
+    from .logging_config import logger, prediction_logger
+    from .base_logger import get_logging_stats
+    from .asset_resolution import (
+        get_asset_path,
+        get_asset_version,
+        get_local_asset_version,
+        prefetch_assets,
+    )
+    from .review_scores import (
+        ReviewScores,
+        get_file_checksum,
+        load_review_scores,
+        save_review_scores,
+    )
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    # Cache it, so later accesses are plain module attribute lookups
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(__all__)
 
-logger.info(f"Configuration loaded for '{config['env']}' environment.")
 
 __all__ = [
     "config",
     "logger",
     "prediction_logger",
+    "get_logging_stats",
     "get_asset_path",
+    "get_asset_version",
+    "get_local_asset_version",
+    "prefetch_assets",
+    "ReviewScores",
+    "get_file_checksum",
+    "load_review_scores",
+    "save_review_scores",
     "upload_to_s3",
     "download_from_s3",
     "PROJECT_ROOT",
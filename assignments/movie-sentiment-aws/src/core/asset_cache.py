@@ -0,0 +1,205 @@
+"""
+Module for the local cache of S3 assets.
+
+Every cached object is recorded in an index (`index.json` in the cache directory)
+with its ETag, size, last-modified time and when it was last validated and used.
+A cached copy is served as is for `revalidate_interval` seconds; after that a HEAD
+request checks its ETag and the object is only downloaded again if it changed.
+Downloads go to a temporary file that is renamed into place, so readers never see
+a partial file, and the least recently used objects are evicted once the cache
+grows past `max_bytes`.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from .aws import download_from_s3, head_s3_object
+from .logging_config import logger
+
+
+class AssetCache:
+    """
+    A size-capped, ETag-validated local cache of S3 objects.
+
+    Args:
+        cache_dir (Path): The directory holding the cached objects and the index.
+        max_bytes (int): The total size of cached objects above which the least
+            recently used ones are evicted.
+        revalidate_interval (float): Seconds a validated copy is served without
+            checking S3 again.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        max_bytes: int = 2 * 1024**3,
+        revalidate_interval: float = 300.0,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.revalidate_interval = revalidate_interval
+        self.index_path = self.cache_dir / "index.json"
+        self._index_lock = threading.Lock()
+        # One lock per key, so concurrent requests for an object download it once
+        self._key_locks: defaultdict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._index = self._read_index()
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self.index_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable asset cache index: {e}")
+            return {}
+
+    def _write_index(self) -> None:
+        """Persists the index atomically. Must be called with `_index_lock` held."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = self.index_path.with_suffix(".tmp")
+        with open(temp_path, "w") as f:
+            json.dump(self._index, f)
+        os.replace(temp_path, self.index_path)
+
+    def local_path(self, key: str) -> Path:
+        """Returns where the object `key` is cached."""
+        return self.cache_dir / "objects" / key
+
+    def etag(self, key: str) -> str | None:
+        """Returns the ETag of the cached copy of `key`, or None if not cached."""
+        with self._index_lock:
+            entry = self._index.get(key)
+        return entry["etag"] if entry else None
+
+    def get(self, bucket: str, key: str, refresh: bool = False) -> Path | None:
+        """
+        Returns a local copy of an S3 object, downloading it only if it is missing
+        or has changed.
+        Args:
+            bucket (str): The S3 bucket name.
+            key (str): The key of the object.
+            refresh (bool): If True, the copy is revalidated now rather than after
+                `revalidate_interval`.
+        Returns:
+            Path | None: The local copy, or None if the object could not be
+                retrieved and nothing is cached.
+        """
+        local_path = self.local_path(key)
+        with self._key_locks[key]:
+            with self._index_lock:
+                entry = self._index.get(key)
+            cached = (
+                entry is not None
+                and local_path.exists()
+                and local_path.stat().st_size == entry["size"]
+            )
+            now = time.time()
+            if (
+                cached
+                and not refresh
+                and now - entry["validated_at"] < self.revalidate_interval
+            ):
+                self._touch(key, now)
+                return local_path
+
+            metadata = head_s3_object(bucket, key)
+            if metadata is None:
+                if cached:
+                    logger.warning(f"Could not revalidate {key}, serving cached copy.")
+                    self._touch(key, now)
+                    return local_path
+                return None
+            if cached and metadata["etag"] == entry["etag"]:
+                self._record(key, metadata, now)
+                return local_path
+
+            if not self._download(bucket, key, metadata):
+                return local_path if cached else None
+            self._record(key, metadata, now)
+        self.evict(keep=key)
+        return local_path
+
+    def _download(self, bucket: str, key: str, metadata: dict) -> bool:
+        """Downloads the version of the object described by `metadata` in place."""
+        local_path = self.local_path(key)
+        # A stable name lets an interrupted large download resume after a restart
+        temp_path = local_path.with_name(f".{local_path.name}.download")
+        # IfMatch makes S3 refuse the download if the object changed since the HEAD
+        if not download_from_s3(
+            bucket,
+            key,
+            temp_path,
+            needs_full_download=True,
+            extra_args={"IfMatch": f'"{metadata["etag"]}"'},
+        ):
+            temp_path.unlink(missing_ok=True)
+            return False
+        if temp_path.stat().st_size != metadata["size"]:
+            logger.error(f"Downloaded {key} does not match its S3 size, discarding it.")
+            temp_path.unlink(missing_ok=True)
+            return False
+        os.replace(temp_path, local_path)
+        return True
+
+    def _record(self, key: str, metadata: dict, now: float) -> None:
+        with self._index_lock:
+            self._index[key] = {
+                "etag": metadata["etag"],
+                "size": metadata["size"],
+                "last_modified": str(metadata["last_modified"]),
+                "validated_at": now,
+                "last_used": now,
+            }
+            self._write_index()
+
+    def _touch(self, key: str, now: float) -> None:
+        # Recency only affects eviction order, so it is persisted with the next write
+        with self._index_lock:
+            if key in self._index:
+                self._index[key]["last_used"] = now
+
+    def evict(self, keep: str | None = None) -> list[str]:
+        """
+        Removes the least recently used objects until the cache fits `max_bytes`.
+        Args:
+            keep (str | None): A key that is never evicted, e.g. the one just
+                downloaded.
+        Returns:
+            list[str]: The evicted keys.
+        """
+        evicted = []
+        with self._index_lock:
+            total = sum(entry["size"] for entry in self._index.values())
+            by_recency = sorted(self._index, key=lambda k: self._index[k]["last_used"])
+            for key in by_recency:
+                if total <= self.max_bytes:
+                    break
+                if key == keep:
+                    continue
+                total -= self._index.pop(key)["size"]
+                self.local_path(key).unlink(missing_ok=True)
+                evicted.append(key)
+            if evicted:
+                self._write_index()
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} assets from the cache: {evicted}")
+        return evicted
+
+    def prefetch(self, bucket: str, keys: list[str], max_workers: int = 4) -> dict:
+        """
+        Fetches several objects in parallel.
+        Args:
+            bucket (str): The S3 bucket name.
+            keys (list[str]): The keys of the objects.
+            max_workers (int): The number of parallel downloads.
+        Returns:
+            dict: The local copy of every key, or None for the ones that failed.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            paths = pool.map(lambda key: self.get(bucket, key), keys)
+            return dict(zip(keys, paths))
@@ -2,20 +2,50 @@ from pathlib import Path
 import os
 import sys
 from .load_config import PROJECT_ROOT, config
-from .aws import download_from_s3
+from .asset_cache import AssetCache
+from .aws import head_s3_object
 from .logging_config import logger
 
+cache_config = config.get("asset_cache", {})
+asset_cache = AssetCache(
+    PROJECT_ROOT / cache_config.get("dir", "assets/cache"),
+    max_bytes=cache_config.get("max_bytes", 2 * 1024**3),
+    revalidate_interval=cache_config.get("revalidate_interval_seconds", 300),
+)
 
-def get_asset_path(asset_key: str) -> Path:
+
+class AssetUnavailableError(RuntimeError):
+    """Raised by `get_asset_path` when an asset cannot be retrieved and exiting
+    the process was not requested."""
+
+
+def fail(message: str, exit_on_failure: bool) -> None:
+    """Exits the process, or raises `AssetUnavailableError`, for a missing asset."""
+    if exit_on_failure:
+        logger.critical(message)
+        sys.exit(1)
+    raise AssetUnavailableError(message)
+
+
+def get_asset_path(
+    asset_key: str, refresh: bool = False, exit_on_failure: bool = True
+) -> Path:
     """
     Returns the local filesystem path for a given asset key (e.g., 'model', 'data').
 
-    In 'production' mode, it downloads the asset from S3 to a temporary local
-    directory (assets) and returns the path to the local copy.
+    In 'production' mode, it returns the path to a copy of the asset in the local
+    asset cache, which is downloaded from S3 if it is missing or its ETag changed.
     In 'development' mode, it returns the direct local path from the config.
 
     Args:
         asset_key (str): The key for the asset, as defined in config.yaml.
+        refresh (bool): If True, the cached copy is revalidated against S3 now
+            instead of after the cache's revalidation interval. Has no effect in
+            'development' mode.
+        exit_on_failure (bool): If True, the process exits when the asset cannot
+            be retrieved, as required assets are needed to start. If False,
+            `AssetUnavailableError` is raised instead, e.g. for background
+            reloads that must leave the running service alone.
 
     Returns:
         Path: The local, ready-to-use path for the asset.
@@ -26,17 +56,93 @@ def get_asset_path(asset_key: str) -> Path:
         bucket = os.getenv("S3_BUCKET_NAME")
         s3_key = path_info
         if not bucket or not s3_key:
-            logger.critical("S3 bucket name or key is not configured in environment.")
-            sys.exit(1)
+            fail(
+                "S3 bucket name or key is not configured in environment.",
+                exit_on_failure,
+            )
 
-        local_path = PROJECT_ROOT / "assets" / Path(s3_key).name
-        if not download_from_s3(bucket, s3_key, local_path):
-            logger.critical(f"Failed to retrieve required asset {s3_key} from S3.")
-            sys.exit(1)
+        local_path = asset_cache.get(bucket, s3_key, refresh=refresh)
+        if local_path is None:
+            fail(
+                f"Failed to retrieve required asset {s3_key} from S3.", exit_on_failure
+            )
         return local_path
     else:
         dev_path = PROJECT_ROOT / path_info
         if not dev_path.exists():
-            logger.critical(f"Asset '{asset_key}' not found at local path: {dev_path}")
-            sys.exit(1)
+            fail(
+                f"Asset '{asset_key}' not found at local path: {dev_path}",
+                exit_on_failure,
+            )
         return dev_path
+
+
+def get_asset_version(asset_key: str) -> str | None:
+    """
+    Returns a cheap version identifier for a given asset key without loading it.
+
+    In 'production' mode, the version is the ETag of the S3 object.
+    In 'development' mode, it is derived from the local file's mtime and size.
+
+    Args:
+        asset_key (str): The key for the asset, as defined in config.yaml.
+
+    Returns:
+        str | None: The version identifier, or None if the asset is unavailable.
+    """
+    path_info = config["paths"][asset_key]
+
+    if config["env"] == "production":
+        bucket = os.getenv("S3_BUCKET_NAME")
+        if not bucket or not path_info:
+            logger.error("S3 bucket name or key is not configured in environment.")
+            return None
+        metadata = head_s3_object(bucket, path_info)
+        return metadata["etag"] if metadata else None
+    else:
+        dev_path = PROJECT_ROOT / path_info
+        if not dev_path.exists():
+            return None
+        stat = dev_path.stat()
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def get_local_asset_version(asset_key: str, local_path: Path) -> str:
+    """
+    Returns the version identifier, in the format of `get_asset_version`, of the
+    copy of an asset that `get_asset_path` returned. Unlike `get_asset_version`,
+    this describes the bytes that were actually fetched, even if the asset has
+    changed since.
+
+    Args:
+        asset_key (str): The key for the asset, as defined in config.yaml.
+        local_path (Path): The path returned by `get_asset_path`.
+
+    Returns:
+        str: The version identifier, or "unknown".
+    """
+    if config["env"] == "production":
+        # Downloads are conditional on the ETag recorded with the copy
+        return asset_cache.etag(config["paths"][asset_key]) or "unknown"
+    stat = Path(local_path).stat()
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def prefetch_assets() -> None:
+    """
+    Downloads every configured asset into the local cache in parallel, so the
+    first requests that need them do not wait on S3. Has no effect in
+    'development' mode. Assets that fail are logged and fetched again on use.
+    """
+    bucket = os.getenv("S3_BUCKET_NAME")
+    if config["env"] != "production" or not bucket:
+        return
+    keys = [key for key in config["paths"].values() if key]
+    paths = asset_cache.prefetch(
+        bucket, keys, max_workers=cache_config.get("prefetch_workers", 4)
+    )
+    failed = [key for key, path in paths.items() if path is None]
+    if failed:
+        logger.error(f"Failed to prefetch assets: {failed}")
+    else:
+        logger.info(f"Prefetched {len(keys)} assets.")
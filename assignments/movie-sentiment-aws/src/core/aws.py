@@ -1,12 +1,264 @@
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
+import io
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
 from pathlib import Path
-import boto3
 from .base_logger import setup_base_logger
+from .load_config import config
+from .review_scores import get_file_checksum
 
 # Create AWS-specific logger
 logger = setup_base_logger("aws")
 
+# Error codes that mean S3 itself is failing or throttling, rather than the request
+UNAVAILABLE_ERROR_CODES = {
+    "InternalError",
+    "ServiceUnavailable",
+    "SlowDown",
+    "RequestTimeout",
+    "Throttling",
+    "ThrottlingException",
+}
+
+
+class S3UnavailableError(Exception):
+    """Raised instead of calling S3 while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency for a while.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls fail
+    fast for `reset_timeout` seconds. Then one trial call is let through: success
+    closes the circuit, failure opens it again.
+
+    Args:
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_timeout (float): Seconds the circuit stays open before a trial call.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_running = False
+
+    @property
+    def state(self) -> str:
+        """ "closed", "open" or "half-open"."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return "open"
+            return "half-open"
+
+    def before_call(self) -> None:
+        """
+        Raises:
+            S3UnavailableError: If the circuit is open, or a trial call is running.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if (
+                time.monotonic() - self._opened_at < self.reset_timeout
+                or self._trial_running
+            ):
+                raise S3UnavailableError("S3 circuit breaker is open")
+            self._trial_running = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("S3 is reachable again, closing the circuit breaker.")
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or (
+                self._opened_at is None and self._failures >= self.failure_threshold
+            ):
+                logger.error(
+                    f"S3 failed {self._failures} times in a row, failing fast for "
+                    f"{self.reset_timeout}s."
+                )
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+    def record_other_error(self) -> None:
+        """
+        Records an error that says nothing about availability (e.g. a 404), which
+        leaves the state unchanged apart from letting the next trial call through.
+        """
+        with self._lock:
+            self._trial_running = False
+
+
+aws_config = config.get("aws", {})
+breaker_config = aws_config.get("circuit_breaker", {})
+circuit_breaker = CircuitBreaker(
+    failure_threshold=breaker_config.get("failure_threshold", 5),
+    reset_timeout=breaker_config.get("reset_timeout_seconds", 30),
+)
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_s3_client():
+    """
+    Returns the process-wide S3 client, creating it on first use.
+
+    boto3 clients are thread-safe, so one client (and its pool of keep-alive
+    connections) is shared by every thread instead of resolving credentials and
+    opening new connections on every call.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                # boto3 is imported on first use, so services that never call S3
+                # (or only in production) don't pay for it at import time
+                import boto3
+                from botocore.config import Config
+
+                _client = boto3.session.Session().client(
+                    "s3",
+                    # Set to use an S3-compatible stand-in, e.g. a local moto server
+                    endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+                    config=Config(
+                        connect_timeout=aws_config.get("connect_timeout_seconds", 5),
+                        read_timeout=aws_config.get("read_timeout_seconds", 30),
+                        retries={
+                            "mode": "adaptive",
+                            "max_attempts": aws_config.get("max_attempts", 5),
+                        },
+                        max_pool_connections=aws_config.get("max_pool_connections", 20),
+                        tcp_keepalive=True,
+                    ),
+                )
+    return _client
+
+
+def is_unavailable_error(error: Exception) -> bool:
+    """Whether an S3 error means S3 is unreachable or failing (vs. e.g. a 404)."""
+    # Managed transfers wrap the underlying error, e.g. in S3UploadFailedError
+    # (raised while handling the ClientError) or RetriesExceededError
+    while error is not None:
+        if isinstance(error, ClientError):
+            code = error.response.get("Error", {}).get("Code", "")
+            status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0)
+            return code in UNAVAILABLE_ERROR_CODES or status >= 500
+        if isinstance(error, BotoCoreError):
+            return True
+        error = (
+            getattr(error, "last_exception", None)
+            or error.__cause__
+            or error.__context__
+        )
+    return False
+
+
+def call_s3(operation: str, **kwargs):
+    """
+    Calls a method of the shared S3 client through the circuit breaker.
+
+    Args:
+        operation (str): The client method, e.g. "put_object".
+        **kwargs: The method's arguments.
+
+    Returns:
+        The method's result.
+
+    Raises:
+        S3UnavailableError: If the circuit breaker is open.
+    """
+    circuit_breaker.before_call()
+    try:
+        result = getattr(get_s3_client(), operation)(**kwargs)
+    except Exception as e:
+        if is_unavailable_error(e):
+            circuit_breaker.record_failure()
+        else:
+            circuit_breaker.record_other_error()
+        raise
+    circuit_breaker.record_success()
+    return result
+
+
+MB = 1024 * 1024
+transfer_settings = aws_config.get("transfer", {})
+# Uploads from this size up are sent in parallel parts; downloads always use
+# ranged GETs of PART_SIZE
+MULTIPART_THRESHOLD = transfer_settings.get("multipart_threshold_mb", 16) * MB
+PART_SIZE = transfer_settings.get("part_size_mb", 16) * MB
+MAX_CONCURRENCY = transfer_settings.get("max_concurrency", 8)
+
+
+@cache
+def get_transfer_config():
+    """Returns the `TransferConfig` of uploads, built on first use."""
+    from boto3.s3.transfer import TransferConfig
+
+    return TransferConfig(
+        multipart_threshold=MULTIPART_THRESHOLD,
+        multipart_chunksize=PART_SIZE,
+        max_concurrency=MAX_CONCURRENCY,
+    )
+
+
+# User metadata key holding the SHA-256 of an uploaded file's content
+CHECKSUM_METADATA_KEY = "sha256"
+
+
+class TransferProgress:
+    """
+    A thread-safe transfer callback that logs progress every `log_every` of the
+    transfer and the overall throughput once it is done.
+
+    Args:
+        name (str): What is transferred, for the log lines.
+        total (int): The transfer size in bytes.
+        log_every (float): The fraction of the transfer between progress lines.
+    """
+
+    def __init__(self, name: str, total: int, log_every: float = 0.25):
+        self.name = name
+        self.total = total
+        self.log_every = log_every
+        self.transferred = 0
+        self._next_log = log_every
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def __call__(self, bytes_amount: int) -> None:
+        with self._lock:
+            self.transferred += bytes_amount
+            if not self.total or self.transferred / self.total < self._next_log:
+                return
+            while self.transferred / self.total >= self._next_log:
+                self._next_log += self.log_every
+            percent = 100 * self.transferred / self.total
+        if percent < 100:
+            logger.info(f"{self.name}: {percent:.0f}% of {self.total / MB:.1f} MB")
+
+    def done(self) -> None:
+        elapsed = time.perf_counter() - self._start
+        logger.info(
+            f"{self.name}: {self.total / MB:.1f} MB in {elapsed:.2f}s "
+            f"({self.total / MB / max(elapsed, 1e-9):.1f} MB/s)"
+        )
+
 
 def upload_to_s3(local_path: Path, s3_key: str) -> bool:
     """
@@ -25,9 +277,24 @@ def upload_to_s3(local_path: Path, s3_key: str) -> bool:
         return False
 
     try:
-        s3 = boto3.client("s3")
         logger.info(f"Uploading {local_path.name} to s3://{bucket}/{s3_key}...")
-        s3.upload_file(str(local_path), bucket, s3_key)
+        progress = TransferProgress(
+            f"Upload of s3://{bucket}/{s3_key}", local_path.stat().st_size
+        )
+        # The content checksum travels with the object, so downloads can verify it
+        # whether or not it was uploaded in parts
+        call_s3(
+            "upload_file",
+            Filename=str(local_path),
+            Bucket=bucket,
+            Key=s3_key,
+            ExtraArgs={
+                "Metadata": {CHECKSUM_METADATA_KEY: get_file_checksum(local_path)}
+            },
+            Config=get_transfer_config(),
+            Callback=progress,
+        )
+        progress.done()
         logger.info("Upload to S3 successful!")
         return True
     except ClientError as e:
@@ -39,16 +306,26 @@ def upload_to_s3(local_path: Path, s3_key: str) -> bool:
 
 
 def download_from_s3(
-    bucket: str, key: str, local_path: Path, needs_full_download: bool = False
+    bucket: str,
+    key: str,
+    local_path: Path,
+    needs_full_download: bool = False,
+    extra_args: dict | None = None,
 ) -> bool:
     """
     Downloads a file from an S3 bucket to a local path.
 
+    Objects are downloaded as parallel ranged GETs that resume where an
+    interrupted download stopped (see `download_parts`).
+    Objects uploaded by `upload_to_s3` are verified against their SHA-256. The
+    local path only appears once the download is complete.
+
     Args:
         bucket (str): The S3 bucket name.
         key (str): The key (path) of the object in the bucket.
         local_path (Path): The local destination path.
         needs_full_download (bool): If True, the file will be downloaded even if it already exists locally.
+        extra_args (dict | None): Conditions on the object, e.g. {"IfMatch": etag}.
 
     Returns:
         bool: True if download was successful or file already exists, False otherwise.
@@ -57,10 +334,18 @@ def download_from_s3(
         logger.info(f"File {local_path} already exists locally. Skipping S3 download.")
         return True
     try:
-        s3 = boto3.client("s3")
         logger.info(f"Downloading s3://{bucket}/{key} to {local_path}...")
         local_path.parent.mkdir(parents=True, exist_ok=True)
-        s3.download_file(bucket, key, str(local_path))
+        head = call_s3("head_object", Bucket=bucket, Key=key, **(extra_args or {}))
+        size, etag = head["ContentLength"], head["ETag"].strip('"')
+        progress = TransferProgress(f"Download of s3://{bucket}/{key}", size)
+        download_parts(bucket, key, local_path, size, etag, progress)
+        expected = head.get("Metadata", {}).get(CHECKSUM_METADATA_KEY)
+        if expected and get_file_checksum(local_path) != expected:
+            logger.error(f"Checksum mismatch for s3://{bucket}/{key}, discarding it.")
+            local_path.unlink(missing_ok=True)
+            return False
+        progress.done()
         logger.info("Download complete.")
         return True
     except ClientError as e:
@@ -72,3 +357,357 @@ def download_from_s3(
     except Exception as e:
         logger.error(f"An unexpected error occurred during S3 download: {e}")
         return False
+
+
+def download_parts(
+    bucket: str,
+    key: str,
+    local_path: Path,
+    size: int,
+    etag: str,
+    progress: TransferProgress,
+) -> None:
+    """
+    Downloads an object as `PART_SIZE` ranged GETs, `MAX_CONCURRENCY` at a time.
+
+    Parts are written in place into `<local_path>.part`, and the finished parts
+    are recorded in `<local_path>.part.json`, so a download that was interrupted
+    continues with the missing parts as long as the object's ETag is unchanged.
+    Only one process may download to a given path at a time.
+
+    Raises:
+        ClientError: If a part cannot be downloaded, e.g. because the object
+            changed (its ETag no longer matches).
+    """
+    partial_path = local_path.with_name(local_path.name + ".part")
+    state_path = local_path.with_name(local_path.name + ".part.json")
+    state = {"etag": etag, "part_size": PART_SIZE, "done": []}
+    try:
+        with open(state_path, "r") as f:
+            saved = json.load(f)
+        if (
+            saved["etag"] == etag
+            and saved["part_size"] == PART_SIZE
+            and partial_path.exists()
+        ):
+            state = saved
+    except (OSError, ValueError, KeyError):
+        pass
+    done = set(state["done"])
+    if done:
+        logger.info(f"Resuming s3://{bucket}/{key} with {len(done)} parts done.")
+    else:
+        with open(partial_path, "wb") as f:
+            f.truncate(size)
+
+    parts = [
+        (start, min(start + PART_SIZE, size) - 1)
+        for start in range(0, size, PART_SIZE)
+        if start not in done
+    ]
+    progress(size - sum(end - start + 1 for start, end in parts))
+    state_lock = threading.Lock()
+    fd = os.open(partial_path, os.O_WRONLY)
+
+    def fetch(part: tuple[int, int]) -> None:
+        start, end = part
+        body = call_s3(
+            "get_object",
+            Bucket=bucket,
+            Key=key,
+            Range=f"bytes={start}-{end}",
+            IfMatch=f'"{etag}"',
+        )["Body"].read()
+        if len(body) != end - start + 1:
+            raise OSError(f"Short read of bytes {start}-{end} of s3://{bucket}/{key}")
+        os.pwrite(fd, body, start)
+        progress(len(body))
+        with state_lock:
+            done.add(start)
+            state["done"] = sorted(done)
+            temp_state_path = state_path.with_suffix(".tmp")
+            with open(temp_state_path, "w") as f:
+                json.dump(state, f)
+            os.replace(temp_state_path, state_path)
+
+    try:
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENCY) as pool:
+            futures = [pool.submit(fetch, part) for part in parts]
+            try:
+                for future in futures:
+                    future.result()
+            except Exception:
+                # Stop at the first failed part; the next attempt resumes from here
+                pool.shutdown(cancel_futures=True)
+                raise
+    finally:
+        os.close(fd)
+    os.replace(partial_path, local_path)
+    state_path.unlink(missing_ok=True)
+
+
+def head_s3_object(bucket: str, key: str) -> dict | None:
+    """
+    Fetches the metadata of an S3 object without downloading it.
+
+    Args:
+        bucket (str): The S3 bucket name.
+        key (str): The key (path) of the object in the bucket.
+
+    Returns:
+        dict | None: A dictionary with the object's "etag", "size" and "last_modified",
+            or None if the object could not be found.
+    """
+    try:
+        response = call_s3("head_object", Bucket=bucket, Key=key)
+        return {
+            "etag": response["ETag"].strip('"'),
+            "size": response["ContentLength"],
+            "last_modified": response["LastModified"],
+        }
+    except ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            logger.error(f"S3 object not found: s3://{bucket}/{key}")
+        else:
+            logger.error(f"Error fetching S3 object metadata: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"An unexpected error occurred during S3 head request: {e}")
+        return None
+
+
+def put_s3_object(bucket: str, key: str, body: bytes) -> bool:
+    """
+    Writes an in-memory payload to an S3 object.
+
+    Args:
+        bucket (str): The S3 bucket name.
+        key (str): The destination key (path) in the bucket.
+        body (bytes): The object content.
+
+    Returns:
+        bool: True if the write was successful, False otherwise.
+    """
+    try:
+        call_s3("put_object", Bucket=bucket, Key=key, Body=body)
+        return True
+    except ClientError as e:
+        logger.error(f"Failed to write s3://{bucket}/{key}: {e}")
+        return False
+    except Exception as e:
+        logger.error(f"An unexpected error occurred during S3 put: {e}")
+        return False
+
+
+def list_s3_objects(bucket: str, prefix: str) -> list[dict]:
+    """
+    Lists the objects under a prefix, following pagination.
+
+    Args:
+        bucket (str): The S3 bucket name.
+        prefix (str): The key prefix to list.
+
+    Returns:
+        list[dict]: The "key", "size" and "etag" of every object, sorted by key.
+            Empty if the listing failed.
+    """
+    try:
+        objects = []
+        kwargs = {"Bucket": bucket, "Prefix": prefix}
+        while True:
+            page = call_s3("list_objects_v2", **kwargs)
+            for obj in page.get("Contents", []):
+                objects.append(
+                    {
+                        "key": obj["Key"],
+                        "size": obj["Size"],
+                        "etag": obj["ETag"].strip('"'),
+                    }
+                )
+            if not page.get("IsTruncated"):
+                break
+            kwargs["ContinuationToken"] = page["NextContinuationToken"]
+        return sorted(objects, key=lambda obj: obj["key"])
+    except ClientError as e:
+        logger.error(f"Error listing s3://{bucket}/{prefix}: {e}")
+        return []
+    except Exception as e:
+        logger.error(f"An unexpected error occurred during S3 listing: {e}")
+        return []
+
+
+def delete_s3_objects(bucket: str, keys: list[str]) -> bool:
+    """
+    Deletes objects from an S3 bucket, in batches of up to 1000 keys.
+
+    Args:
+        bucket (str): The S3 bucket name.
+        keys (list[str]): The keys of the objects to delete.
+
+    Returns:
+        bool: True if every object was deleted, False otherwise.
+    """
+    try:
+        for start in range(0, len(keys), 1000):
+            response = call_s3(
+                "delete_objects",
+                Bucket=bucket,
+                Delete={
+                    "Objects": [{"Key": key} for key in keys[start : start + 1000]],
+                    "Quiet": True,
+                },
+            )
+            if response.get("Errors"):
+                logger.error(f"Failed to delete S3 objects: {response['Errors']}")
+                return False
+        return True
+    except ClientError as e:
+        logger.error(f"Failed to delete S3 objects: {e}")
+        return False
+    except Exception as e:
+        logger.error(f"An unexpected error occurred during S3 delete: {e}")
+        return False
+
+
+class S3ObjectReader(io.RawIOBase):
+    """
+    A read-only, seekable file over an S3 object, backed by ranged GETs.
+
+    Every read fetches only the requested byte range, pinned to the object's ETag
+    so a concurrent overwrite fails the read instead of mixing two versions. Wrap
+    it in `io.BufferedReader` (see `open_s3_object`) to read in large ranges.
+
+    Args:
+        bucket (str): The S3 bucket name.
+        key (str): The key of the object.
+        size (int): The object size in bytes.
+        etag (str): The object's ETag.
+    """
+
+    def __init__(self, bucket: str, key: str, size: int, etag: str):
+        super().__init__()
+        self.bucket = bucket
+        self.key = key
+        self.size = size
+        self.etag = etag
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: self.size}
+        self._position = max(0, base[whence] + offset)
+        return self._position
+
+    def _get_range(self, end: int) -> bytes:
+        """Fetches the bytes from the current position up to `end`, exclusive."""
+        body = call_s3(
+            "get_object",
+            Bucket=self.bucket,
+            Key=self.key,
+            Range=f"bytes={self._position}-{end - 1}",
+            IfMatch=f'"{self.etag}"',
+        )["Body"].read()
+        self._position += len(body)
+        return body
+
+    def readinto(self, buffer) -> int:
+        if self._position >= self.size:
+            return 0
+        data = self._get_range(min(self._position + len(buffer), self.size))
+        buffer[: len(data)] = data
+        return len(data)
+
+    def readall(self) -> bytes:
+        # One GET for the rest of the object, rather than one per default buffer
+        if self._position >= self.size:
+            return b""
+        return self._get_range(self.size)
+
+
+def open_s3_object(
+    bucket: str, key: str, buffer_size: int = 8 * MB
+) -> io.BufferedReader | None:
+    """
+    Opens an S3 object for streaming reads, without downloading it.
+
+    Args:
+        bucket (str): The S3 bucket name.
+        key (str): The key of the object.
+        buffer_size (int): The size of each ranged GET.
+
+    Returns:
+        io.BufferedReader | None: A binary file over the object, or None if the
+            object could not be found.
+    """
+    metadata = head_s3_object(bucket, key)
+    if metadata is None:
+        return None
+    return io.BufferedReader(
+        S3ObjectReader(bucket, key, metadata["size"], metadata["etag"]),
+        buffer_size=buffer_size,
+    )
+
+
+class S3TailReader:
+    """
+    Reads the lines appended to an append-style S3 object (one that is only ever
+    rewritten with more content at the end) since the previous read.
+
+    The byte offset of the first unread line is remembered between calls, so
+    each call fetches only the new bytes. A trailing line without a newline is
+    left for the next call. If the object shrinks, it was replaced, and reading
+    starts over from the beginning.
+
+    Args:
+        bucket (str): The S3 bucket name.
+        key (str): The key of the object.
+        buffer_size (int): The size of each ranged GET.
+    """
+
+    def __init__(self, bucket: str, key: str, buffer_size: int = 8 * MB):
+        self.bucket = bucket
+        self.key = key
+        self.buffer_size = buffer_size
+        self.offset = 0
+
+    def read_new_lines(self) -> tuple[list[bytes], bool]:
+        """
+        Returns:
+            tuple[list[bytes], bool]: The complete lines appended since the last
+                call, and whether the object was replaced, in which case the lines
+                start from the beginning and earlier ones should be discarded.
+        """
+        metadata = head_s3_object(self.bucket, self.key)
+        if metadata is None:
+            return [], False
+        replaced = metadata["size"] < self.offset
+        if replaced:
+            logger.warning(f"s3://{self.bucket}/{self.key} shrank, reading it again.")
+            self.offset = 0
+        if metadata["size"] == self.offset:
+            return [], replaced
+
+        lines = []
+        reader = io.BufferedReader(
+            S3ObjectReader(self.bucket, self.key, metadata["size"], metadata["etag"]),
+            buffer_size=self.buffer_size,
+        )
+        reader.seek(self.offset)
+        for line in reader:
+            if not line.endswith(b"\n"):
+                break
+            lines.append(line)
+            self.offset += len(line)
+        logger.info(
+            f"Read {len(lines)} new lines from s3://{self.bucket}/{self.key}, "
+            f"now at byte {self.offset}."
+        )
+        return lines, replaced
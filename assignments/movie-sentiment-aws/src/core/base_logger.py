@@ -1,11 +1,151 @@
+import atexit
 import logging
+import queue
+import random
 import sys
 from pathlib import Path
 from typing import Dict, Any
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 
+OVERFLOW_POLICIES = ("block", "drop", "sample")
+
+# Async handlers by logger name, for reporting their drop counters
+_async_handlers: Dict[str, "AsyncQueueHandler"] = {}
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Hands records to a background `QueueListener` through a bounded queue, so
+    formatting and writing happen off the calling thread.
+
+    When the queue is full, the overflow policy decides what happens:
+    - "block": the caller waits for room (no record is lost).
+    - "drop": the record is dropped.
+    - "sample": once the queue is past `high_watermark` of its capacity, only a
+      `sample_rate` fraction of records is enqueued; the rest are dropped.
+
+    Args:
+        handlers (list[logging.Handler]): The handlers the listener writes to.
+        queue_size (int): The capacity of the queue.
+        overflow (str): The overflow policy, one of "block", "drop" or "sample".
+        sample_rate (float): The fraction of records kept under pressure ("sample").
+        high_watermark (float): The queue fill ratio at which sampling starts.
+    """
+
+    def __init__(
+        self,
+        handlers: list[logging.Handler],
+        queue_size: int = 10000,
+        overflow: str = "block",
+        sample_rate: float = 0.1,
+        high_watermark: float = 0.8,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Unknown overflow policy '{overflow}', expected one of {OVERFLOW_POLICIES}"
+            )
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.overflow = overflow
+        self.sample_rate = sample_rate
+        self.high_watermark = max(1, int(queue_size * high_watermark))
+        self.dropped = 0
+        self.sampled_out = 0
+        self.target_handlers = handlers
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        self._stopped = False
+        atexit.register(self.stop)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike the stdlib QueueHandler, the record is not pre-formatted here:
+        # formatting is exactly the work that should leave the calling thread, and
+        # formatters such as JsonFormatter need the original message object.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self._stopped:
+            # The listener is gone (e.g. during interpreter exit): write directly
+            for handler in self.target_handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+            return
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        if (
+            self.overflow == "sample"
+            and self.queue.qsize() >= self.high_watermark
+            and random.random() >= self.sample_rate
+        ):
+            self.sampled_out += 1
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Waits until every queued record is written, then flushes the handlers."""
+        if not self._stopped:
+            self.queue.join()
+        for handler in self.target_handlers:
+            handler.flush()
+
+    def stop(self) -> None:
+        """Drains the queue and stops the listener thread."""
+        if not self._stopped:
+            self.listener.stop()
+            self._stopped = True
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: The queue depth and drop counters of the handler.
+        """
+        return {
+            "overflow": self.overflow,
+            "queue_depth": self.queue.qsize(),
+            "queue_size": self.queue.maxsize,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+        }
+
+
+def make_async(logger: logging.Logger, async_config: Dict[str, Any]) -> logging.Logger:
+    """
+    Moves a logger's handlers behind an `AsyncQueueHandler`.
+
+    Args:
+        logger (logging.Logger): The logger whose handlers are made asynchronous.
+        async_config (Dict[str, Any]): The "async" section of the logger's config.
+
+    Returns:
+        logging.Logger: The same logger.
+    """
+    handlers = list(logger.handlers)
+    for handler in handlers:
+        logger.removeHandler(handler)
+    queue_handler = AsyncQueueHandler(
+        handlers,
+        queue_size=async_config.get("queue_size", 10000),
+        overflow=async_config.get("overflow", "block"),
+        sample_rate=async_config.get("sample_rate", 0.1),
+        high_watermark=async_config.get("high_watermark", 0.8),
+    )
+    logger.addHandler(queue_handler)
+    _async_handlers[logger.name] = queue_handler
+    return logger
+
+
+def get_logging_stats() -> Dict[str, dict]:
+    """
+    Returns:
+        Dict[str, dict]: The queue statistics of every asynchronous logger.
+    """
+    return {name: handler.stats() for name, handler in _async_handlers.items()}
+
 
 def setup_base_logger(name: str, log_config: Dict[str, Any] = None) -> logging.Logger:
     """
@@ -43,6 +183,9 @@ def setup_base_logger(name: str, log_config: Dict[str, Any] = None) -> logging.L
         fh.setFormatter(formatter)
         logger.addHandler(fh)
 
+    if log_config and log_config.get("async", {}).get("enabled", False):
+        make_async(logger, log_config["async"])
+
     return logger
 
 
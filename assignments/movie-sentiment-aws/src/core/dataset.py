@@ -0,0 +1,159 @@
+"""
+Module for the columnar dataset cache.
+
+The IMDB CSV is converted once into an uncompressed Arrow IPC (Feather v2) file,
+with "sentiment" as a categorical (dictionary-encoded) column and the length of
+every review precomputed:
+
+    <cache dir>/<source stem>-<sha256 of the source's content>.arrow
+
+Later loads memory-map that file and only materialize the requested columns, so
+reading "sentiment" does not touch the reviews at all. The cache is keyed by the
+source's content, so a replaced dataset (a new local file, or a new S3 object
+fetched by the asset cache) is converted again, and the copy of the previous one
+is removed.
+
+Usage (from the project root):
+    uv run -m src.core.dataset  # Converts the configured dataset ahead of time
+"""
+
+import os
+import threading
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+from pyarrow import feather
+from .load_config import PROJECT_ROOT, config
+from .logging_config import logger
+from .review_scores import get_file_checksum
+
+SCHEMA = pa.schema(
+    [
+        ("review", pa.string()),
+        ("sentiment", pa.dictionary(pa.int8(), pa.string())),
+        ("review_length", pa.int32()),
+    ]
+)
+COLUMNS = SCHEMA.names
+
+cache_config = config.get("dataset_cache", {})
+CACHE_DIR = PROJECT_ROOT / cache_config.get("dir", "assets/cache/datasets")
+
+# (path, mtime, size) -> content hash, so a source is only hashed once per process
+_source_hashes: dict[tuple[str, int, int], str] = {}
+_lock = threading.Lock()
+
+
+def get_source_hash(source: Path) -> str:
+    """
+    Args:
+        source (Path): The CSV dataset.
+    Returns:
+        str: The SHA-256 of the source's content.
+    """
+    stat = source.stat()
+    key = (str(source.resolve()), stat.st_mtime_ns, stat.st_size)
+    if key not in _source_hashes:
+        _source_hashes[key] = get_file_checksum(source)
+    return _source_hashes[key]
+
+
+def convert_csv(source: Path, destination: Path) -> None:
+    """
+    Converts a CSV dataset with "review" and "sentiment" columns into the cached
+    columnar format. The file is written under a temporary name and renamed, so
+    readers never see a partial file.
+    Args:
+        source (Path): The CSV dataset.
+        destination (Path): The Arrow file to write.
+    """
+    table = pa_csv.read_csv(
+        source,
+        # Reviews are quoted and may span lines
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=["review", "sentiment"],
+            column_types={"review": pa.string(), "sentiment": pa.string()},
+        ),
+    )
+    table = pa.table(
+        [
+            table["review"],
+            pc.utf8_trim_whitespace(table["sentiment"])
+            .dictionary_encode()
+            .cast(SCHEMA.field("sentiment").type),
+            pc.utf8_length(table["review"]).cast(pa.int32()),
+        ],
+        schema=SCHEMA,
+    )
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = destination.with_name(f".{destination.name}.{os.getpid()}.tmp")
+    try:
+        # Uncompressed, so the columns can be memory-mapped without a copy
+        feather.write_feather(table, temp_path, compression="uncompressed")
+        os.replace(temp_path, destination)
+    finally:
+        temp_path.unlink(missing_ok=True)
+
+
+def get_dataset_path(source: Path) -> Path:
+    """
+    Returns the columnar copy of a CSV dataset, converting it if it is missing.
+    Args:
+        source (Path): The CSV dataset.
+    Returns:
+        Path: The Arrow file.
+    """
+    source = Path(source)
+    name = f"{source.stem}-{get_source_hash(source)}.arrow"
+    path = CACHE_DIR / name
+    if path.exists():
+        return path
+    with _lock:
+        if not path.exists():
+            logger.info(f"Converting {source.name} to a columnar dataset...")
+            convert_csv(source, path)
+            logger.info(f"Dataset cached at {path}.")
+            # Copies of previous versions of the source are no longer used
+            for stale in CACHE_DIR.glob(f"{source.stem}-*.arrow"):
+                if stale != path:
+                    stale.unlink(missing_ok=True)
+    return path
+
+
+def load_table(source: Path, columns: list[str] | None = None) -> pa.Table:
+    """
+    Loads selected columns of a dataset as an Arrow table backed by a memory
+    mapping of its columnar copy.
+    Args:
+        source (Path): The CSV dataset.
+        columns (list[str], optional): The columns to load (see `COLUMNS`), all of
+            them by default.
+    Returns:
+        pa.Table: The dataset.
+    """
+    # Opening the file reads only its footer; the selected columns' buffers are
+    # slices of the mapping, and the others are never touched
+    table = pa.ipc.open_file(pa.memory_map(str(get_dataset_path(source)))).read_all()
+    return table.select(columns) if columns is not None else table
+
+
+def load_dataset(source: Path, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Loads selected columns of a dataset. "sentiment" is a categorical column.
+    Args:
+        source (Path): The CSV dataset.
+        columns (list[str], optional): The columns to load (see `COLUMNS`), all of
+            them by default.
+    Returns:
+        pd.DataFrame: The dataset.
+    """
+    return load_table(source, columns).to_pandas()
+
+
+if __name__ == "__main__":
+    from .asset_resolution import get_asset_path
+
+    print(get_dataset_path(get_asset_path("data")))
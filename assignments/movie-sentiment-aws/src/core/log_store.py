@@ -0,0 +1,429 @@
+"""
+Module for the columnar prediction log store.
+
+Prediction and feedback records are written as compressed Parquet segments with a
+fixed schema, partitioned by date, hour and endpoint:
+
+    <root>/date=YYYY-MM-DD/hour=HH/endpoint=<endpoint>/<timestamp>-<host>-<pid>-<id>.parquet
+
+The root is a local directory (development) or an S3 prefix (production). Reads
+prune partitions from the segment paths and only decode the requested columns,
+and `compact` merges the many small segments of closed hours into one.
+
+Usage (compaction, from the project root):
+    uv run -m src.core.log_store
+"""
+
+import io
+import os
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from .aws import delete_s3_objects, download_from_s3, list_s3_objects, put_s3_object
+from .base_logger import PROJECT_ROOT
+from .logging_config import BatchingHandler, logger, make_part_name, text_hash
+
+SCHEMA = pa.schema(
+    [
+        ("timestamp", pa.timestamp("ms", tz="UTC")),
+        ("endpoint", pa.string()),
+        ("prediction_id", pa.string()),
+        ("text_hash", pa.string()),
+        ("text_length", pa.int32()),
+        ("predicted_sentiment", pa.string()),
+        ("probability", pa.float32()),
+        ("true_sentiment", pa.string()),
+        ("model_version", pa.string()),
+    ]
+)
+COLUMNS = SCHEMA.names
+COMPRESSION = "zstd"
+
+
+def text_fields(text: str | None, hash_: str | None, length: int | None) -> dict:
+    """
+    Returns the text columns of a row, from the full text when it was logged or
+    from the hash and length logged in its place (see `PayloadPolicy`).
+    """
+    if text is not None:
+        return {"text_hash": text_hash(text), "text_length": len(text)}
+    return {"text_hash": hash_, "text_length": length}
+
+
+def endpoint_partition(endpoint: str | None) -> str:
+    """Returns the partition value of an endpoint, e.g. "predict_proba"."""
+    return (endpoint or "").strip("/").replace("/", "_") or "unknown"
+
+
+def rows_from_log(message: dict, created: float) -> list[dict]:
+    """
+    Converts a prediction logger payload into log store rows. Batch payloads
+    ("predicted_sentiments" or "feedback" lists) become one row per item. Payloads
+    whose text was redacted by the `PayloadPolicy` keep their logged hash and
+    length.
+    Args:
+        message (dict): The payload passed to `prediction_logger.info`.
+        created (float): The time the record was logged.
+    Returns:
+        list[dict]: The rows, following `SCHEMA`.
+    """
+    timestamp = datetime.fromtimestamp(created, tz=timezone.utc)
+    common = {
+        "timestamp": timestamp,
+        "endpoint": message.get("endpoint"),
+        "model_version": message.get("model_version"),
+    }
+    if "feedback" in message:
+        return [
+            row
+            for feedback in message["feedback"]
+            for row in rows_from_log({**common, **feedback}, created)
+        ]
+    if "predicted_sentiments" in message:
+        count = len(message["predicted_sentiments"])
+        texts = message.get("request_texts") or [None] * count
+        hashes = message.get("text_hashes") or [None] * count
+        lengths = message.get("text_lengths") or [None] * count
+        probabilities = message.get("probabilities") or [None] * count
+        prediction_ids = message.get("prediction_ids") or [None] * count
+        return [
+            {
+                **common,
+                "prediction_id": prediction_id,
+                **text_fields(text, hash_, length),
+                "predicted_sentiment": sentiment,
+                "probability": probability,
+                "true_sentiment": None,
+            }
+            for text, hash_, length, sentiment, probability, prediction_id in zip(
+                texts,
+                hashes,
+                lengths,
+                message["predicted_sentiments"],
+                probabilities,
+                prediction_ids,
+            )
+        ]
+    return [
+        {
+            **common,
+            "prediction_id": message.get("prediction_id"),
+            **text_fields(
+                message.get("request_text"),
+                message.get("text_hash"),
+                message.get("text_length"),
+            ),
+            "predicted_sentiment": message.get("predicted_sentiment"),
+            "probability": message.get("probability"),
+            "true_sentiment": message.get("true_sentiment"),
+        }
+    ]
+
+
+def parse_partition(name: str) -> dict:
+    """
+    Args:
+        name (str): A segment name relative to the store root.
+    Returns:
+        dict: The "date", "hour" and "endpoint" partition values of the segment.
+    """
+    values = {}
+    for part in name.split("/")[:-1]:
+        key, _, value = part.partition("=")
+        values[key] = value
+    return values
+
+
+def read_segment(path: Path, columns: list[str]) -> pa.Table:
+    """
+    Reads columns of a segment. Columns that the segment predates are null.
+    Args:
+        path (Path): The segment file.
+        columns (list[str]): The columns to read.
+    Returns:
+        pa.Table: The columns, typed as in `SCHEMA`.
+    """
+    available = set(pq.read_schema(path).names)
+    table = pq.read_table(path, columns=[c for c in columns if c in available])
+    return pa.table(
+        [
+            table[column].cast(SCHEMA.field(column).type)
+            if column in available
+            else pa.nulls(len(table), SCHEMA.field(column).type)
+            for column in columns
+        ],
+        schema=pa.schema([SCHEMA.field(column) for column in columns]),
+    )
+
+
+class LogStore:
+    """
+    Reads and writes the partitioned Parquet segments of the prediction logs.
+
+    Args:
+        path (Path, optional): The local root directory (development).
+        bucket (str, optional): The S3 bucket (production).
+        prefix (str, optional): The S3 key prefix of the store (production).
+        cache_dir (Path, optional): Where S3 segments are cached for reading.
+            Segments are immutable, so each one is downloaded once.
+    """
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        bucket: str | None = None,
+        prefix: str | None = None,
+        cache_dir: Path | None = None,
+    ):
+        self.path = Path(path) if path is not None else None
+        self.bucket = bucket
+        self.prefix = (prefix or "").rstrip("/")
+        self.cache_dir = cache_dir or PROJECT_ROOT / "assets" / "logs" / "store_cache"
+
+    @property
+    def is_s3(self) -> bool:
+        return self.bucket is not None
+
+    def write(self, rows: list[dict]) -> list[dict]:
+        """
+        Writes rows as one segment per partition.
+        Args:
+            rows (list[dict]): The rows to write, following `SCHEMA`.
+        Returns:
+            list[dict]: The rows whose segment could not be written.
+        """
+        partitions = defaultdict(list)
+        for row in rows:
+            partitions[
+                (row["timestamp"].strftime("%Y-%m-%d/%H"), row["endpoint"])
+            ].append(row)
+
+        failed = []
+        for (_, endpoint), partition_rows in partitions.items():
+            started_at = partition_rows[0]["timestamp"].timestamp()
+            date_hour, _, file_name = make_part_name(started_at, ".parquet").rpartition(
+                "/"
+            )
+            name = f"{date_hour}/endpoint={endpoint_partition(endpoint)}/{file_name}"
+            table = pa.Table.from_pylist(partition_rows, schema=SCHEMA)
+            if not self._write_segment(name, table):
+                failed.extend(partition_rows)
+        return failed
+
+    def _write_segment(self, name: str, table: pa.Table) -> bool:
+        """Writes a table as a new segment. Local segments appear atomically."""
+        buffer = io.BytesIO()
+        pq.write_table(table, buffer, compression=COMPRESSION)
+        if self.is_s3:
+            return put_s3_object(
+                self.bucket, f"{self.prefix}/{name}", buffer.getvalue()
+            )
+        path = self.path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f".{path.name}.tmp")
+        temp_path.write_bytes(buffer.getvalue())
+        os.replace(temp_path, path)
+        return True
+
+    def list_segments(self) -> list[str]:
+        """
+        Returns:
+            list[str]: The names of all segments relative to the store root, sorted.
+        """
+        if self.is_s3:
+            return [
+                obj["key"][len(self.prefix) + 1 :]
+                for obj in list_s3_objects(self.bucket, f"{self.prefix}/")
+                if obj["key"].endswith(".parquet")
+            ]
+        if not self.path.exists():
+            return []
+        return sorted(
+            path.relative_to(self.path).as_posix()
+            for path in self.path.rglob("*.parquet")
+        )
+
+    def _local_segment(self, name: str) -> Path | None:
+        """Returns a local path to read a segment from, downloading it if needed."""
+        if not self.is_s3:
+            return self.path / name
+        path = self.cache_dir / name
+        if path.exists() or download_from_s3(
+            self.bucket, f"{self.prefix}/{name}", path
+        ):
+            return path
+        return None
+
+    def select_segments(
+        self,
+        endpoints: list[str] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[str]:
+        """
+        Prunes segments by their partition values.
+        Args:
+            endpoints (list[str], optional): Only segments of these endpoints.
+            start (datetime, optional): Only segments of this hour or later.
+            end (datetime, optional): Only segments before this hour.
+        Returns:
+            list[str]: The selected segment names.
+        """
+        wanted = {endpoint_partition(e) for e in endpoints} if endpoints else None
+        start_key = f"{start:%Y-%m-%d/%H}" if start else None
+        end_key = f"{end:%Y-%m-%d/%H}" if end else None
+        selected = []
+        for name in self.list_segments():
+            partition = parse_partition(name)
+            hour_key = f"{partition.get('date')}/{partition.get('hour')}"
+            if wanted is not None and partition.get("endpoint") not in wanted:
+                continue
+            if (start_key and hour_key < start_key) or (
+                end_key and hour_key >= end_key
+            ):
+                continue
+            selected.append(name)
+        return selected
+
+    def read(
+        self,
+        columns: list[str] | None = None,
+        endpoints: list[str] | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> pd.DataFrame:
+        """
+        Reads the selected columns of the segments in the selected partitions.
+        Args:
+            columns (list[str], optional): The columns to read (all by default).
+            endpoints (list[str], optional): Only rows of these endpoints.
+            start (datetime, optional): Only rows from this hour or later.
+            end (datetime, optional): Only rows before this hour.
+        Returns:
+            pd.DataFrame: The rows, in segment order.
+        """
+        columns = columns or COLUMNS
+        tables = []
+        for name in self.select_segments(endpoints, start, end):
+            path = self._local_segment(name)
+            if path is None:
+                continue
+            try:
+                tables.append(read_segment(path, columns))
+            except Exception as e:
+                logger.error(f"Error reading log segment {name}: {e}")
+        if not tables:
+            return SCHEMA.empty_table().select(columns).to_pandas()
+        return pa.concat_tables(tables).to_pandas()
+
+    def compact(self, before: datetime | None = None) -> int:
+        """
+        Merges the segments of every closed partition into a single segment.
+
+        The merged segment is written before the originals are deleted, so no rows
+        are lost if compaction is interrupted.
+
+        Args:
+            before (datetime, optional): Only partitions of earlier hours are
+                compacted. Defaults to the current hour, which may still be written.
+        Returns:
+            int: The number of segments that were merged away.
+        """
+        before = before or datetime.now(timezone.utc)
+        before_key = f"{before:%Y-%m-%d/%H}"
+        partitions = defaultdict(list)
+        for name in self.list_segments():
+            partitions[name.rpartition("/")[0]].append(name)
+
+        merged = 0
+        for partition, names in partitions.items():
+            values = parse_partition(names[0])
+            if len(names) < 2 or f"{values['date']}/{values['hour']}" >= before_key:
+                continue
+            paths = [self._local_segment(name) for name in names]
+            if any(path is None for path in paths):
+                logger.error(f"Skipping compaction of {partition}: download failed.")
+                continue
+            table = pa.concat_tables(
+                read_segment(path, COLUMNS) for path in paths
+            ).sort_by("timestamp")
+            name = f"{partition}/compacted-{uuid.uuid4().hex[:8]}.parquet"
+            if not self._write_segment(name, table):
+                continue
+            if self.is_s3:
+                delete_s3_objects(
+                    self.bucket, [f"{self.prefix}/{old}" for old in names]
+                )
+                for path in paths:
+                    path.unlink(missing_ok=True)
+            else:
+                for path in paths:
+                    path.unlink()
+            merged += len(names)
+            logger.info(f"Compacted {len(names)} log segments in {partition}.")
+        return merged
+
+
+class ParquetLogHandler(BatchingHandler):
+    """
+    A logging handler that writes prediction logger payloads to a `LogStore`
+    in batches, from a background thread.
+
+    Args:
+        store (LogStore): The log store to write to.
+        **kwargs: The batching thresholds, see `BatchingHandler`.
+    """
+
+    thread_name = "parquet-log-writer"
+    # Approximate in-memory size of one buffered row
+    ROW_BYTES = 256
+
+    def __init__(self, store: LogStore, **kwargs):
+        self.store = store
+        super().__init__(**kwargs)
+
+    def serialize(self, record):
+        if not isinstance(record.msg, dict):
+            return []
+        return [
+            (row, self.ROW_BYTES) for row in rows_from_log(record.msg, record.created)
+        ]
+
+    def write_batch(self, items, started_at):
+        return self.store.write(items)
+
+
+def get_log_store(config: dict) -> LogStore | None:
+    """
+    Builds the log store configured under `prediction_logging.parquet`.
+    Args:
+        config (dict): The application configuration.
+    Returns:
+        LogStore | None: The log store, or None if it is disabled.
+    """
+    parquet_config = config.get("prediction_logging", {}).get("parquet", {})
+    if not parquet_config.get("enabled", False):
+        return None
+    if config.get("env") == "production":
+        bucket = os.getenv("S3_BUCKET_NAME")
+        if not bucket or not parquet_config.get("prefix"):
+            logger.error("S3_BUCKET_NAME or log store prefix not configured.")
+            return None
+        return LogStore(bucket=bucket, prefix=parquet_config["prefix"])
+    return LogStore(path=PROJECT_ROOT / parquet_config["path"])
+
+
+if __name__ == "__main__":
+    from .load_config import config
+
+    store = get_log_store(config)
+    if store is None:
+        logger.warning("The Parquet log store is not enabled.")
+    else:
+        # Leave the previous hour alone as well, in case of late flushes
+        merged = store.compact(datetime.now(timezone.utc) - timedelta(hours=1))
+        logger.info(f"Compaction merged {merged} segments.")
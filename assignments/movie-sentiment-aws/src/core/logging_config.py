@@ -1,9 +1,23 @@
+import hashlib
 import logging
 import json
+import random
 from logging.handlers import RotatingFileHandler
 import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Iterable
 from .load_config import config
-from .base_logger import setup_base_logger, PROJECT_ROOT
+from .base_logger import setup_base_logger, make_async, PROJECT_ROOT
+
+try:
+    import orjson
+except ImportError:  # Optional fast JSON backend, the stdlib is used without it
+    orjson = None
 
 
 class JsonFormatter(logging.Formatter):
@@ -24,37 +38,383 @@ class JsonFormatter(logging.Formatter):
         return json.dumps(log_record)
 
 
-class S3FileHandler(logging.Handler):
+class FastJsonFormatter(JsonFormatter):
+    """
+    Formats log records as the same JSON objects as `JsonFormatter`, faster.
+
+    The timestamp text of the current second is cached, so `strftime` runs once
+    per second rather than once per record, and the payload is serialized with
+    orjson when it is installed. Records orjson cannot serialize (e.g. non-string
+    keys) fall back to the stdlib encoder.
+
+    Only the parsed objects are the same, not the text: orjson writes compact
+    separators and raw UTF-8 where `json.dumps` writes ", " and "\\uXXXX"
+    escapes, so log consumers must parse lines rather than compare them.
+
+    Args:
+        datefmt (str | None): The timestamp format, as for `logging.Formatter`.
+        json_backend (str): "orjson", "json" or "auto" (orjson if installed).
+    """
+
+    def __init__(self, datefmt: str | None = None, json_backend: str = "auto"):
+        super().__init__(datefmt=datefmt)
+        if json_backend == "orjson" and orjson is None:
+            raise ValueError("The orjson JSON backend is not installed")
+        self.use_orjson = orjson is not None and json_backend != "json"
+        # (second, formatted second), replaced as a whole so threads never see a mix
+        self._second_cache: tuple[int, str] = (-1, "")
+
+    def formatTime(self, record, datefmt=None):
+        second = int(record.created)
+        cached_second, text = self._second_cache
+        if second != cached_second:
+            text = time.strftime(
+                datefmt or self.default_time_format, self.converter(record.created)
+            )
+            self._second_cache = (second, text)
+        if datefmt:
+            return text
+        return self.default_msec_format % (text, record.msecs)
+
+    def format(self, record):
+        message = record.msg
+        if isinstance(message, dict):
+            log_record = {
+                "timestamp": self.formatTime(record, self.datefmt),
+                "pathname": record.pathname,
+                **message,
+            }
+        else:
+            log_record = {
+                "timestamp": self.formatTime(record, self.datefmt),
+                "pathname": record.pathname,
+                "message": record.getMessage(),
+            }
+        if self.use_orjson:
+            try:
+                return orjson.dumps(log_record).decode()
+            except TypeError:
+                pass
+        return json.dumps(log_record)
+
+
+def text_hash(text: str) -> str:
+    """
+    Args:
+        text (str): A request text.
+    Returns:
+        str: A stable content hash of the text (128-bit SHA-256 prefix, hex).
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+class PayloadPolicy(logging.Filter):
     """
-    A logging handler that appends logs to a file in S3.
+    Decides how much request text the prediction logs keep.
+
+    A sampled fraction of records keeps the full text. Every other record has its
+    text replaced by a content hash, its length and a short prefix, which is
+    enough for drift monitoring and for matching duplicate texts. Records of the
+    `full_text_endpoints` (user feedback) always keep the full text.
+
+    Feedback usually references its prediction by ID only, so the texts of the
+    most recent redacted predictions are remembered by prediction ID, and
+    feedback records that lack a text get the full text of their prediction.
+
+    Installed as a filter on the prediction logger, so the policy applies to every
+    handler and the caller's payload is never modified.
+
+    Args:
+        full_text_sample_rate (float): The fraction of records that keep the full
+            text. 1.0 keeps every text.
+        prefix_chars (int): The number of characters of each text kept in
+            redacted records. 0 keeps none.
+        full_text_endpoints (Iterable[str]): Endpoints whose records always keep
+            the full text.
+        recent_texts (int): The number of redacted texts remembered for feedback.
     """
 
-    def __init__(self, bucket: str, key: str):
+    def __init__(
+        self,
+        full_text_sample_rate: float = 1.0,
+        prefix_chars: int = 100,
+        full_text_endpoints: Iterable[str] = (),
+        recent_texts: int = 10000,
+    ):
         super().__init__()
-        self.bucket = bucket
-        self.key = key
-        self.local_temp_path = (
-            PROJECT_ROOT / "assets" / "logs" / "temp_prediction_logs.json"
+        self.full_text_sample_rate = full_text_sample_rate
+        self.prefix_chars = prefix_chars
+        self.full_text_endpoints = frozenset(full_text_endpoints)
+        self.recent_texts = recent_texts
+        # Prediction ID -> redacted text, least recently logged first
+        self._texts: OrderedDict[str, str] = OrderedDict()
+        self._texts_lock = threading.Lock()
+
+    def filter(self, record):
+        if isinstance(record.msg, dict):
+            record.msg = self.apply(record.msg)
+        return True
+
+    def apply(self, message: dict) -> dict:
+        """
+        Args:
+            message (dict): A prediction logger payload.
+        Returns:
+            dict: The payload to log; `message` itself if it keeps its full text
+                and has no text to add.
+        """
+        if message.get("endpoint") in self.full_text_endpoints:
+            return self.add_feedback_texts(message)
+        if self.full_text_sample_rate >= 1.0 or (
+            random.random() < self.full_text_sample_rate
+        ):
+            return message
+
+        redacted = dict(message)
+        if "request_text" in redacted:
+            text = redacted.pop("request_text")
+            redacted["text_hash"] = text_hash(text)
+            redacted["text_length"] = len(text)
+            if self.prefix_chars:
+                redacted["request_text_prefix"] = text[: self.prefix_chars]
+            if "prediction_id" in redacted:
+                self.remember([redacted["prediction_id"]], [text])
+        if "request_texts" in redacted:
+            texts = redacted.pop("request_texts")
+            redacted["text_hashes"] = [text_hash(text) for text in texts]
+            redacted["text_lengths"] = [len(text) for text in texts]
+            if self.prefix_chars:
+                redacted["request_text_prefixes"] = [
+                    text[: self.prefix_chars] for text in texts
+                ]
+            if "prediction_ids" in redacted:
+                self.remember(redacted["prediction_ids"], texts)
+        return redacted
+
+    def remember(self, prediction_ids: list[str], texts: list[str]) -> None:
+        """Remembers redacted texts by prediction ID, for later feedback."""
+        if not self.recent_texts:
+            return
+        with self._texts_lock:
+            self._texts.update(zip(prediction_ids, texts))
+            while len(self._texts) > self.recent_texts:
+                self._texts.popitem(last=False)
+
+    def add_feedback_texts(self, message: dict) -> dict:
+        """
+        Args:
+            message (dict): A single or batched (`"feedback"`) feedback payload.
+        Returns:
+            dict: The payload, with the remembered text of every feedback that
+                references a redacted prediction without sending its text.
+        """
+
+        def with_text(feedback: dict) -> dict:
+            if "request_text" in feedback or "prediction_id" not in feedback:
+                return feedback
+            with self._texts_lock:
+                text = self._texts.get(feedback["prediction_id"])
+            return feedback if text is None else {**feedback, "request_text": text}
+
+        if "feedback" in message:
+            items = [with_text(feedback) for feedback in message["feedback"]]
+            if all(
+                item is feedback for item, feedback in zip(items, message["feedback"])
+            ):
+                return message
+            return {**message, "feedback": items}
+        return with_text(message)
+
+
+def make_payload_policy(payload_config: dict) -> PayloadPolicy:
+    """
+    Args:
+        payload_config (dict): The `prediction_logging.payload` settings.
+    Returns:
+        PayloadPolicy: The configured policy.
+    """
+    return PayloadPolicy(
+        full_text_sample_rate=payload_config.get("full_text_sample_rate", 1.0),
+        prefix_chars=payload_config.get("prefix_chars", 100),
+        full_text_endpoints=payload_config.get("full_text_endpoints", ()),
+        recent_texts=payload_config.get("recent_texts", 10000),
+    )
+
+
+class BatchingHandler(logging.Handler):
+    """
+    Base class for handlers that write records in batches from a background thread.
+
+    `emit` only appends to an in-memory buffer. A background thread hands the
+    buffered items to `write_batch` once the buffer reaches `max_records` or
+    `max_bytes`, or every `flush_interval` seconds, and once more when the handler
+    is closed (e.g. at interpreter exit). Batches that fail to write are retried
+    on the next flush.
+
+    Subclasses implement `serialize` and `write_batch`.
+
+    Args:
+        max_records (int): The number of buffered items that triggers a flush.
+        max_bytes (int): The buffered payload size that triggers a flush.
+        flush_interval (float): The maximum number of seconds between flushes.
+        max_retained_bytes (int): How much unwritten data is kept while writes are
+            failing; the oldest items are dropped beyond it.
+    """
+
+    thread_name = "log-batcher"
+
+    def __init__(
+        self,
+        max_records: int = 500,
+        max_bytes: int = 1024 * 1024,
+        flush_interval: float = 60.0,
+        max_retained_bytes: int = 64 * 1024 * 1024,
+    ):
+        super().__init__()
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.max_retained_bytes = max_retained_bytes
+        self.dropped = 0
+        self.parts_written = 0
+        # Only ever held briefly to swap the buffer, never during I/O
+        self._buffer_lock = threading.Lock()
+        self._buffer: list[tuple[object, int]] = []
+        self._buffer_bytes = 0
+        self._buffer_started_at: float | None = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=self.thread_name, daemon=True
         )
-        self.local_temp_path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread.start()
+
+    def serialize(self, record: logging.LogRecord) -> list[tuple[object, int]]:
+        """
+        Args:
+            record (logging.LogRecord): The record to buffer.
+        Returns:
+            list[tuple[object, int]]: The items to buffer and their approximate sizes.
+        """
+        raise NotImplementedError
+
+    def write_batch(self, items: list, started_at: float) -> list:
+        """
+        Args:
+            items (list): The buffered items, in logging order.
+            started_at (float): The creation time of the oldest record in the batch.
+        Returns:
+            list: The items that could not be written and should be retried
+                (empty on success).
+        """
+        raise NotImplementedError
 
     def emit(self, record):
-        from .aws import (
-            upload_to_s3,
-            download_from_s3,
-        )  # Import here to avoid circular dependency
+        try:
+            items = self.serialize(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self._buffer_lock:
+            self._buffer.extend(items)
+            self._buffer_bytes += sum(size for _, size in items)
+            if self._buffer_started_at is None:
+                self._buffer_started_at = record.created
+            full = (
+                len(self._buffer) >= self.max_records
+                or self._buffer_bytes >= self.max_bytes
+            )
+        if full:
+            self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered items as one batch."""
+        with self._buffer_lock:
+            buffer, started_at = self._buffer, self._buffer_started_at
+            self._buffer, self._buffer_bytes, self._buffer_started_at = [], 0, None
+        if not buffer:
+            return
+
+        try:
+            failed = self.write_batch([item for item, _ in buffer], started_at)
+        except Exception as e:
+            logging.getLogger("main").error(f"Failed to write log batch: {e}")
+            failed = [item for item, _ in buffer]
+        if not failed:
+            self.parts_written += 1
+            return
+
+        # Keep the failed items for the next attempt, ahead of anything logged since
+        failed_ids = {id(item) for item in failed}
+        buffer = [entry for entry in buffer if id(entry[0]) in failed_ids]
+        with self._buffer_lock:
+            self._buffer[:0] = buffer
+            self._buffer_bytes += sum(size for _, size in buffer)
+            self._buffer_started_at = started_at
+            while self._buffer and self._buffer_bytes > self.max_retained_bytes:
+                self._buffer_bytes -= self._buffer.pop(0)[1]
+                self.dropped += 1
+
+    def close(self):
+        self._stopping.set()
+        self._wake.set()
+        self._thread.join(timeout=30)
+        self.flush()
+        super().close()
+
 
-        log_entry = self.format(record)
+def make_part_name(started_at: float, suffix: str) -> str:
+    """
+    Returns a unique, time-partitioned name for a new log part,
+    `date=YYYY-MM-DD/hour=HH/<timestamp>-<host>-<pid>-<id><suffix>`.
+    Args:
+        started_at (float): The creation time of the oldest record in the part.
+        suffix (str): The file extension.
+    """
+    created = datetime.fromtimestamp(started_at, tz=timezone.utc)
+    return (
+        f"date={created:%Y-%m-%d}/hour={created:%H}/"
+        f"{created:%Y%m%dT%H%M%S%fZ}-{socket.gethostname()}-{os.getpid()}-"
+        f"{uuid.uuid4().hex[:8]}{suffix}"
+    )
+
+
+class S3BatchHandler(BatchingHandler):
+    """
+    A logging handler that ships logs to S3 in batches.
+
+    Formatted records are written as immutable, time-partitioned JSON-lines part
+    objects (`<prefix>/date=YYYY-MM-DD/hour=HH/<timestamp>-<host>-<pid>-<id>.jsonl`),
+    so `emit` never touches the network.
+
+    Args:
+        bucket (str): The S3 bucket name.
+        prefix (str): The key prefix under which the parts are written.
+        **kwargs: The batching thresholds, see `BatchingHandler`.
+    """
 
-        # Download the current log file from S3, if it exists
-        download_from_s3(self.bucket, self.key, self.local_temp_path)
+    thread_name = "s3-log-shipper"
 
-        # Append the new log entry
-        with open(self.local_temp_path, "a") as f:
-            f.write(log_entry + "\n")
+    def __init__(self, bucket: str, prefix: str, **kwargs):
+        self.bucket = bucket
+        self.prefix = prefix.rstrip("/")
+        super().__init__(**kwargs)
+
+    def serialize(self, record):
+        line = self.format(record) + "\n"
+        return [(line, len(line))]
+
+    def write_batch(self, items, started_at):
+        from .aws import put_s3_object  # Import here to avoid circular dependency
 
-        # Upload the updated log file back to S3
-        upload_to_s3(self.local_temp_path, self.key)
+        key = f"{self.prefix}/{make_part_name(started_at, '.jsonl')}"
+        return [] if put_s3_object(self.bucket, key, "".join(items).encode()) else items
 
 
 def setup_prediction_logger(config: dict) -> logging.Logger:
@@ -76,23 +436,33 @@ def setup_prediction_logger(config: dict) -> logging.Logger:
     handler_type = log_config.get("handler")
     env = config.get("env")
 
+    logger.addFilter(make_payload_policy(log_config.get("payload", {})))
+
     if env == "production" and handler_type == "s3":
         bucket_name = os.getenv("S3_BUCKET_NAME")
-        s3_key = log_config.get("key")
-        if bucket_name and s3_key:
-            handler = S3FileHandler(bucket=bucket_name, key=s3_key)
-            handler.setFormatter(JsonFormatter())
+        s3_prefix = log_config.get("prefix")
+        if bucket_name and s3_prefix:
+            handler = S3BatchHandler(
+                bucket=bucket_name,
+                prefix=s3_prefix,
+                max_records=log_config.get("max_buffer_records", 500),
+                max_bytes=log_config.get("max_buffer_bytes", 1024 * 1024),
+                flush_interval=log_config.get("flush_interval_seconds", 60),
+            )
+            handler.setFormatter(FastJsonFormatter())
             logger.addHandler(handler)
         else:
-            logger.error("S3_BUCKET_NAME or S3 key not configured for production.")
+            logger.error("S3_BUCKET_NAME or S3 prefix not configured for production.")
             logger.addHandler(logging.NullHandler())
     elif handler_type == "file":
         log_path_str = log_config.get("path", "assets/logs/prediction_logs.json")
         log_path = PROJECT_ROOT / log_path_str
         log_path.parent.mkdir(parents=True, exist_ok=True)
 
-        fh = RotatingFileHandler(log_path, maxBytes=5 * 1024 * 1024, backupCount=5)
-        fh.setFormatter(JsonFormatter())
+        fh = RotatingFileHandler(
+            log_path, maxBytes=5 * 1024 * 1024, backupCount=5, encoding="utf-8"
+        )
+        fh.setFormatter(FastJsonFormatter())
         logger.addHandler(fh)
     else:
         logger.error(
@@ -100,9 +470,40 @@ def setup_prediction_logger(config: dict) -> logging.Logger:
         )
         logger.addHandler(logging.NullHandler())
 
+    # Optionally also write the columnar log store used by the monitoring dashboard
+    parquet_config = log_config.get("parquet", {})
+    if parquet_config.get("enabled", False):
+        from .log_store import ParquetLogHandler, get_log_store
+
+        store = get_log_store(config)
+        if store is not None:
+            logger.addHandler(
+                ParquetLogHandler(
+                    store,
+                    max_records=parquet_config.get("max_buffer_records", 5000),
+                    flush_interval=parquet_config.get("flush_interval_seconds", 300),
+                )
+            )
+
+    async_config = log_config.get("async", {})
+    if async_config.get("enabled", False):
+        make_async(logger, async_config)
+
     return logger
 
 
-# Create the loggers using base configuration
+# Create the main logger using base configuration
 logger = setup_base_logger("main", config.get("main_logging", {}))
-prediction_logger = setup_prediction_logger(config)
+logger.info(f"Configuration loaded for '{config['env']}' environment.")
+_prediction_logger_lock = threading.Lock()
+
+
+def __getattr__(name: str):
+    # The prediction logger, and any shipping threads of its handlers, is only set
+    # up once a service that logs predictions asks for it
+    if name == "prediction_logger":
+        with _prediction_logger_lock:
+            if "prediction_logger" not in globals():
+                globals()["prediction_logger"] = setup_prediction_logger(config)
+        return globals()["prediction_logger"]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,93 @@
+"""
+Module for the precomputed per-review scores artifact.
+
+At training time every review of the dataset is scored with the new model and the
+results are stored as a compact, row-aligned columnar file next to the data:
+one int8 predicted label and one float32 probability per review, plus the checksum
+of the model artifact that produced them. Serving uses the scores only while that
+model is the one being served.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
+
+
+@dataclass(frozen=True)
+class ReviewScores:
+    """The predictions of one model for every review of the dataset, in file order."""
+
+    labels: np.ndarray
+    probabilities: np.ndarray
+    model_checksum: str
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def get(self, index: int) -> dict:
+        """
+        Args:
+            index (int): The review number.
+        Returns:
+            dict: The "predicted_sentiment" and "probability" of the review.
+        """
+        sentiment = "positive" if self.labels[index] == 1 else "negative"
+        return {
+            "predicted_sentiment": sentiment,
+            "probability": round(float(self.probabilities[index]), 2),
+        }
+
+
+def get_file_checksum(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Args:
+        path (Path): The file to hash.
+        chunk_size (int): The number of bytes read at a time.
+    Returns:
+        str: The SHA-256 hex digest of the file's content.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_review_scores(
+    path: Path, probabilities: np.ndarray, model_checksum: str
+) -> None:
+    """
+    Writes the scores artifact.
+    Args:
+        path (Path): The destination file (.npz).
+        probabilities (np.ndarray): The (n_reviews, 2) class probabilities.
+        model_checksum (str): The checksum of the model artifact that scored them.
+    """
+    labels = probabilities.argmax(axis=1)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        np.savez(
+            f,
+            labels=labels.astype(np.int8),
+            probabilities=probabilities[np.arange(len(labels)), labels].astype(
+                np.float32
+            ),
+            model_checksum=np.array(model_checksum),
+        )
+
+
+def load_review_scores(path: Path) -> ReviewScores:
+    """
+    Reads the scores artifact.
+    Args:
+        path (Path): The artifact written by `save_review_scores`.
+    Returns:
+        ReviewScores: The precomputed scores.
+    """
+    with np.load(path) as artifact:
+        return ReviewScores(
+            labels=artifact["labels"],
+            probabilities=artifact["probabilities"],
+            model_checksum=str(artifact["model_checksum"]),
+        )
@@ -5,41 +5,282 @@ This API provides endpoints for sentiment analysis of movie reviews.
 It is environment-aware and can load assets from local disk or S3.
 """
 
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
-from fastapi import FastAPI, HTTPException, Response, Depends
-from starlette.middleware.base import BaseHTTPMiddleware
-import pandas as pd
+from typing import Literal
+from fastapi import FastAPI, HTTPException, Query, Request, Response, Depends
+import numpy as np
 from src.core import (
+    config,
     logger,
     get_asset_path,
+    get_asset_version,
+    prefetch_assets,
+    get_logging_stats,
     prediction_logger,
+    ReviewScores,
+    load_review_scores,
 )
-from src.fastapi_backend.utils.middleware import (
-    log_middleware_request,
-    log_middleware_response,
-)
+from src.fastapi_backend.utils.middleware import RequestLoggingMiddleware
 from src.fastapi_backend.utils.schemas import (
     PredictRequest,
+    BatchPredictRequest,
+    BatchSentimentResponse,
+    BatchSentimentProbabilityResponse,
     SentimentFeedback,
     SentimentResponse,
     SentimentProbabilityResponse,
     ExampleResponse,
+    ExamplesResponse,
+    BatchSentimentFeedback,
+)
+from src.fastapi_backend.utils.model_loader import (
+    LoadedModel,
+    model_manager,
+    run_model_in_worker,
+)
+from src.fastapi_backend.utils.batcher import MicroBatcher
+from src.fastapi_backend.utils.executors import ExecutionLayer
+from src.fastapi_backend.utils.cache import PredictionCache
+from src.fastapi_backend.utils.review_store import ReviewStore
+from src.fastapi_backend.utils.streaming import (
+    iter_lines,
+    iter_csv_records,
+    iter_ndjson_records,
+    score_records,
+    gzip_stream,
+    RequestBodyStreamingResponse,
+)
+
+serving_config = config.get("model_serving", {})
+MAX_BATCH_SIZE = serving_config.get("max_batch_size", 256)
+MAX_BATCH_CHARS = serving_config.get("max_batch_chars", 2_000_000)
+STREAM_CHUNK_SIZE = serving_config.get("stream_chunk_size", 512)
+STREAM_MAX_RECORD_BYTES = serving_config.get("stream_max_record_bytes", 1_000_000)
+MAX_EXAMPLES = serving_config.get("max_examples", 50)
+
+# Pools that keep blocking inference and I/O off the event loop
+execution_config = config.get("execution", {})
+execution = ExecutionLayer(
+    enabled=execution_config.get("enabled", True),
+    inference_pool=execution_config.get("inference_pool", "thread"),
+    inference_workers=execution_config.get("inference_workers", 4),
+    io_workers=execution_config.get("io_workers", 8),
+    max_pending=execution_config.get("max_pending", 64),
+)
+
+
+async def run_model(current: LoadedModel, method: str, texts: list[str]):
+    """
+    Runs a model method on the inference pool.
+    Args:
+        current (LoadedModel): The model snapshot the request is scored with.
+        method (str): The model method to call, e.g. "predict_proba".
+        texts (list[str]): The texts to score.
+    Returns:
+        The method's return value.
+    """
+    if execution.enabled and execution.inference_pool == "process":
+        # Models are not shipped to worker processes, only their version
+        return await execution.run_inference(
+            run_model_in_worker, current.version, method, texts
+        )
+    return await execution.run_inference(getattr(current.model, method), texts)
+
+
+# Opt-in micro-batching of concurrent /predict and /predict_proba requests
+micro_batching_config = serving_config.get("micro_batching", {})
+micro_batcher = (
+    MicroBatcher(
+        score_fn=lambda texts, current: run_model(current, "predict_proba", texts),
+        max_batch_size=micro_batching_config.get("max_batch_size", 32),
+        max_wait_ms=micro_batching_config.get("max_wait_ms", 5),
+    )
+    if micro_batching_config.get("enabled", False)
+    else None
+)
+
+# In-process cache of single-text predictions, invalidated on every model swap
+cache_config = serving_config.get("prediction_cache", {})
+prediction_cache = (
+    PredictionCache(
+        max_entries=cache_config.get("max_entries", 10000),
+        max_bytes=cache_config.get("max_bytes", 16 * 1024 * 1024),
+        ttl_seconds=cache_config.get("ttl_seconds", 3600),
+    )
+    if cache_config.get("enabled", True)
+    else None
 )
-from src.fastapi_backend.utils.model_loader import load_model
+if prediction_cache is not None:
+    model_manager.on_swap(lambda _: prediction_cache.clear())
+
+
+async def score_text(text: str, current: LoadedModel) -> np.ndarray:
+    """
+    Computes the class probabilities of a single text, going through the
+    prediction cache and the micro-batcher when they are enabled.
+    Args:
+        text (str): The text to score.
+        current (LoadedModel): The model snapshot the request is scored with.
+    Returns:
+        np.ndarray: The class probabilities of the text.
+    """
+
+    async def compute() -> np.ndarray:
+        if micro_batcher is not None:
+            return await micro_batcher.submit(text, current)
+        return (await run_model(current, "predict_proba", [text]))[0]
+
+    if prediction_cache is None:
+        return await compute()
+    return await prediction_cache.get_or_compute(text, current.version, compute)
+
+
+# Byte-offset index over the dataset, built once so /example never re-reads the CSV
+review_store: ReviewStore | None = None
+
+
+def get_review_store() -> ReviewStore:
+    """
+    Builds the review index on first use (normally at startup).
+    Returns:
+        ReviewStore: The shared review store.
+    """
+    global review_store
+    if review_store is None:
+        # Get the path to the dataset, which may be downloaded from S3
+        review_store = ReviewStore(get_asset_path("data"))
+    return review_store
+
 
-app = FastAPI()
+# Predictions precomputed at training time for every review of the dataset. They
+# are reloaded after every model swap and only used while they match the live model.
+review_scores: ReviewScores | None = None
+review_scores_stale = True
+
+
+def get_review_scores() -> ReviewScores | None:
+    """
+    Loads the review scores artifact, if there is one, after startup or a swap.
+    Returns:
+        ReviewScores | None: The precomputed scores, or None if unavailable.
+    """
+    global review_scores, review_scores_stale
+    if review_scores_stale:
+        review_scores_stale = False
+        try:
+            if get_asset_version("review_scores") is None:
+                review_scores = None
+            else:
+                review_scores = load_review_scores(
+                    get_asset_path("review_scores", refresh=True)
+                )
+        except Exception as e:
+            logger.warning(f"Could not load precomputed review scores: {e}")
+            review_scores = None
+    return review_scores
+
+
+def invalidate_review_scores(_) -> None:
+    """Marks the review scores for reloading, e.g. after a model swap."""
+    global review_scores_stale
+    review_scores_stale = True
+
+
+model_manager.on_swap(invalidate_review_scores)
+
+
+async def score_examples(store: ReviewStore, indices: list[int]) -> list[dict]:
+    """
+    Returns the predicted sentiment and probability of dataset reviews, from the
+    precomputed scores when they belong to the live model and from a single
+    vectorized model call otherwise.
+    Args:
+        store (ReviewStore): The review store the indices refer to.
+        indices (list[int]): The review numbers.
+    Returns:
+        list[dict]: The "predicted_sentiment" and "probability" of each review.
+    """
+    current = model_manager.current
+    scores = (
+        review_scores
+        if not review_scores_stale
+        else await execution.run_io(get_review_scores)
+    )
+    if (
+        scores is not None
+        and scores.model_checksum == current.checksum
+        and len(scores) == len(store)
+    ):
+        return [scores.get(index) for index in indices]
+
+    texts = [store.get(index)["review"] for index in indices]
+    probabilities = np.asarray(await run_model(current, "predict_proba", texts))
+    labels = probabilities.argmax(axis=1)
+    return [
+        {
+            "predicted_sentiment": "positive" if label == 1 else "negative",
+            "probability": round(float(probability), 2),
+        }
+        for label, probability in zip(
+            labels, probabilities[np.arange(len(labels)), labels]
+        )
+    ]
+
+
+def flush_prediction_logs() -> None:
+    """Flushes every handler of the prediction logger."""
+    for handler in prediction_logger.handlers:
+        handler.flush()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Loads and warms the model once at startup and watches for new artifacts
+    for as long as the app is running.
+    """
+    # Download every asset in parallel instead of one after the other on first use
+    await execution.run_io(prefetch_assets)
+    model_manager.load()
+    await execution.run_io(get_review_store)
+    await execution.run_io(get_review_scores)
+    watcher = asyncio.create_task(model_manager.watch())
+    if micro_batcher is not None:
+        micro_batcher.start()
+    yield
+    watcher.cancel()
+    if micro_batcher is not None:
+        await micro_batcher.stop()
+    if review_store is not None:
+        review_store.close()
+    # Ship any buffered prediction logs before the process exits
+    await execution.run_io(flush_prediction_logs)
+    execution.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Middleware to log requests and responses
-app.add_middleware(BaseHTTPMiddleware, dispatch=log_middleware_request)
-app.add_middleware(BaseHTTPMiddleware, dispatch=log_middleware_response)
+request_logging_config = config.get("request_logging", {})
+app.add_middleware(
+    RequestLoggingMiddleware,
+    sample_rate=request_logging_config.get("sample_rate", 1.0),
+    max_payload_chars=request_logging_config.get("max_payload_chars", 1000),
+    exclude_paths=request_logging_config.get(
+        "exclude_paths", ["/health", "/favicon.ico"]
+    ),
+)
 
 logger.info("FastAPI App initialized successfully!")
 
 
 # Dependency to get model
 def get_model():
-    """Dependency to get the ML model"""
-    return load_model()
+    """Dependency to get the shared ML model"""
+    return model_manager.get()
 
 
 @app.get("/")
@@ -68,16 +309,31 @@ async def health_check(model=Depends(get_model)) -> dict:
         return {
             "status": "healthy",
             "timestamp": datetime.now(timezone.utc).isoformat(),
+            **model_manager.status(),
         }
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
         raise HTTPException(status_code=503, detail="Service unhealthy")
 
 
+@app.get("/stats")
+async def stats() -> dict:
+    """
+    Serving statistics endpoint
+    Returns:
+        dict: Runtime statistics of the serving components that are enabled
+    """
+    return {
+        "micro_batcher": micro_batcher.stats() if micro_batcher is not None else None,
+        "prediction_cache": prediction_cache.stats()
+        if prediction_cache is not None
+        else None,
+        "logging": get_logging_stats(),
+    }
+
+
 @app.post("/predict")
-async def predict(
-    request: PredictRequest, model=Depends(get_model)
-) -> SentimentResponse:
+async def predict(request: PredictRequest) -> SentimentResponse:
     """
     Predict sentiment endpoint
     Args:
@@ -85,27 +341,32 @@ async def predict(
     Returns:
         SentimentResponse object
     """
+    # One snapshot per request, so a concurrent swap can't mislabel the prediction
+    current = model_manager.current
     try:
-        prediction = model.predict([request.text])[0]
+        # Scored through predict_proba so /predict and /predict_proba share cache
+        # entries; the predicted class is the most probable one
+        prediction = int(np.argmax(await score_text(request.text, current)))
         sentiment = "positive" if prediction == 1 else "negative"
+        prediction_id = new_prediction_id()
 
         prediction = {
             "endpoint": "/predict",
+            "prediction_id": prediction_id,
             "request_text": request.text,
+            "model_version": current.version,
             "predicted_sentiment": sentiment,
         }
-        prediction_logger.info(prediction)
+        await execution.run_io(prediction_logger.info, prediction)
 
-        return {"sentiment": sentiment}
+        return {"sentiment": sentiment, "prediction_id": prediction_id}
     except Exception as e:
         logger.error(f"Error making prediction: {str(e)}")
         raise HTTPException(status_code=500, detail="Error making prediction")
 
 
 @app.post("/predict_proba")
-async def predict_proba(
-    request: PredictRequest, model=Depends(get_model)
-) -> SentimentProbabilityResponse:
+async def predict_proba(request: PredictRequest) -> SentimentProbabilityResponse:
     """
     Predict sentiment with probability endpoint based on the input text.
     Args:
@@ -113,25 +374,34 @@ async def predict_proba(
     Returns:
         SentimentProbabilityResponse object
     """
+    current = model_manager.current
     try:
-        prediction_int = model.predict([request.text])[0]
-        probabilities = model.predict_proba([request.text])[0]
+        probabilities = await score_text(request.text, current)
+        # The predicted class is the most probable one, so a single pass suffices
+        prediction_int = int(np.argmax(probabilities))
         if prediction_int == 1:
             prediction_str = "positive"
             probability = probabilities[1]
         else:
             prediction_str = "negative"
             probability = probabilities[0]
+        prediction_id = new_prediction_id()
 
         prediction = {
             "endpoint": "/predict_proba",
+            "prediction_id": prediction_id,
             "request_text": request.text,
+            "model_version": current.version,
             "predicted_sentiment": prediction_str,
-            "probability": round(probability, 2),
+            "probability": round(float(probability), 2),
         }
-        prediction_logger.info(prediction)
+        await execution.run_io(prediction_logger.info, prediction)
 
-        return {"sentiment": prediction_str, "probability": round(probability, 2)}
+        return {
+            "sentiment": prediction_str,
+            "probability": round(float(probability), 2),
+            "prediction_id": prediction_id,
+        }
     except ValueError as e:
         logger.error(f"Pydantic validation error: {str(e)}")
         raise HTTPException(status_code=422, detail="Invalid input format")
@@ -142,22 +412,221 @@ async def predict_proba(
         )
 
 
+def new_prediction_id() -> str:
+    """Returns a unique ID that feedback can reference a prediction by."""
+    return uuid.uuid4().hex
+
+
+def validate_batch(texts: list[str]) -> None:
+    """
+    Enforces the configured batch size and payload limits.
+    Args:
+        texts (list[str]): The texts in the batch request.
+    Raises:
+        HTTPException: 422 if the batch is empty, 413 if it exceeds the limits.
+    """
+    if not texts:
+        raise HTTPException(status_code=422, detail="texts must not be empty")
+    if len(texts) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size {len(texts)} exceeds the limit of {MAX_BATCH_SIZE}",
+        )
+    total_chars = sum(len(text) for text in texts)
+    if total_chars > MAX_BATCH_CHARS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch payload of {total_chars} characters exceeds the limit "
+            f"of {MAX_BATCH_CHARS}",
+        )
+
+
+@app.post("/predict_batch")
+async def predict_batch(request: BatchPredictRequest) -> BatchSentimentResponse:
+    """
+    Predict sentiment for a batch of texts with a single vectorized model call.
+    Args:
+        request (BatchPredictRequest):  {"texts": ["string", ...]}
+    Returns:
+        BatchSentimentResponse object with predictions in input order
+    """
+    validate_batch(request.texts)
+    current = model_manager.current
+    try:
+        predictions = await run_model(current, "predict", request.texts)
+        sentiments = [
+            "positive" if prediction == 1 else "negative" for prediction in predictions
+        ]
+        prediction_ids = [new_prediction_id() for _ in sentiments]
+
+        await execution.run_io(
+            prediction_logger.info,
+            {
+                "endpoint": "/predict_batch",
+                "prediction_ids": prediction_ids,
+                "request_texts": request.texts,
+                "model_version": current.version,
+                "predicted_sentiments": sentiments,
+            },
+        )
+
+        return {
+            "predictions": [
+                {"sentiment": sentiment, "prediction_id": prediction_id}
+                for sentiment, prediction_id in zip(sentiments, prediction_ids)
+            ]
+        }
+    except Exception as e:
+        logger.error(f"Error making batch prediction: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error making batch prediction")
+
+
+@app.post("/predict_proba_batch")
+async def predict_proba_batch(
+    request: BatchPredictRequest,
+) -> BatchSentimentProbabilityResponse:
+    """
+    Predict sentiment with probability for a batch of texts with a single
+    vectorized model call.
+    Args:
+        request (BatchPredictRequest):  {"texts": ["string", ...]}
+    Returns:
+        BatchSentimentProbabilityResponse object with predictions in input order
+    """
+    validate_batch(request.texts)
+    current = model_manager.current
+    try:
+        probabilities = np.asarray(
+            await run_model(current, "predict_proba", request.texts)
+        )
+        # Column 1 is the positive class, so argmax doubles as the predicted label
+        labels = probabilities.argmax(axis=1)
+        sentiments = ["positive" if label == 1 else "negative" for label in labels]
+        scores = [
+            round(float(probability), 2)
+            for probability in probabilities[np.arange(len(labels)), labels]
+        ]
+        prediction_ids = [new_prediction_id() for _ in sentiments]
+
+        await execution.run_io(
+            prediction_logger.info,
+            {
+                "endpoint": "/predict_proba_batch",
+                "prediction_ids": prediction_ids,
+                "request_texts": request.texts,
+                "model_version": current.version,
+                "predicted_sentiments": sentiments,
+                "probabilities": scores,
+            },
+        )
+
+        return {
+            "predictions": [
+                {
+                    "sentiment": sentiment,
+                    "probability": score,
+                    "prediction_id": prediction_id,
+                }
+                for sentiment, score, prediction_id in zip(
+                    sentiments, scores, prediction_ids
+                )
+            ]
+        }
+    except Exception as e:
+        logger.error(f"Error making batch prediction with probabilities: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail="Error making batch prediction with probabilities"
+        )
+
+
+@app.post("/predict_stream")
+async def predict_stream(
+    request: Request, gzip: bool = False
+) -> RequestBodyStreamingResponse:
+    """
+    Streaming bulk scoring endpoint for large rescoring jobs.
+
+    Reads an NDJSON body ({"text": "string", "id": optional} per line) or, with a
+    `text/csv` content type, a CSV body with a "text" or "review" column.
+    The body may be gzip-compressed (`Content-Encoding: gzip`). Records are scored
+    in vectorized chunks with a single model version and streamed back as NDJSON
+    in input order, so memory stays flat regardless of the input size.
+    Args:
+        request (Request): The raw request, read incrementally.
+        gzip (bool): Whether to gzip-compress the response.
+    Returns:
+        RequestBodyStreamingResponse of NDJSON lines
+            {"line": int, "id": optional, "sentiment": "string", "probability": float}
+            or {"line": int, "error": "string"} for records that could not be parsed
+    """
+    # Score the whole stream with the model that is live when it starts
+    current = model_manager.current
+    lines = iter_lines(
+        request.stream(),
+        gzipped=request.headers.get("content-encoding", "").lower() == "gzip",
+        max_line_bytes=STREAM_MAX_RECORD_BYTES,
+    )
+    if "csv" in request.headers.get("content-type", ""):
+        records = iter_csv_records(lines, max_record_chars=STREAM_MAX_RECORD_BYTES)
+    else:
+        records = iter_ndjson_records(lines)
+
+    async def log_chunk(texts, sentiments, probabilities):
+        await execution.run_io(
+            prediction_logger.info,
+            {
+                "endpoint": "/predict_stream",
+                "request_texts": texts,
+                "model_version": current.version,
+                "predicted_sentiments": sentiments,
+                "probabilities": probabilities,
+            },
+        )
+
+    body = score_records(
+        records,
+        score_fn=lambda texts: run_model(current, "predict_proba", texts),
+        chunk_size=STREAM_CHUNK_SIZE,
+        on_chunk=log_chunk,
+    )
+    headers = {}
+    if gzip:
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+    return RequestBodyStreamingResponse(
+        body, media_type="application/x-ndjson", headers=headers
+    )
+
+
 @app.get("/example")
-async def example() -> ExampleResponse:
+async def example(
+    sentiment: Literal["positive", "negative"] | None = None,
+    count: int = Query(1, ge=1, le=MAX_EXAMPLES),
+) -> ExampleResponse | ExamplesResponse:
     """
-    Example endpoint to get a random review from the dataset
+    Example endpoint to get random reviews from the dataset, together with the
+    live model's prediction for them
+    Args:
+        sentiment (str, optional): Only return reviews with this sentiment.
+        count (int): The number of reviews to return.
     Returns:
-        ExampleResponse object
+        ExampleResponse object, or ExamplesResponse object if count > 1
     """
     try:
-        # Get the path to the dataset, which may be downloaded from S3
-        data_path = get_asset_path("data")
-        df = pd.read_csv(data_path)
-        random_review = df.sample(n=1)["review"].iloc[0]
-        return {"review": random_review}
+        store = review_store or await execution.run_io(get_review_store)
+        indices = store.sample_indices(count=count, sentiment=sentiment)
+        examples = [
+            {**store.get(index), **score}
+            for index, score in zip(indices, await score_examples(store, indices))
+        ]
     except Exception as e:
         logger.error(f"Error getting random review: {str(e)}")
         raise HTTPException(status_code=500, detail="Error retrieving example review")
+    if not examples:
+        raise HTTPException(status_code=404, detail="No matching example review")
+    if count == 1:
+        return examples[0]
+    return {"examples": examples}
 
 
 @app.post("/true_sentiment")
@@ -165,17 +634,11 @@ async def true_sentiment(request: SentimentFeedback) -> dict:
     """
     True sentiment endpoint
     Args:
-        request (TrueSentimentRequest):  {"is_sentiment_correct": "bool"}
+        request (SentimentFeedback):  {"prediction_id": "string", "true_sentiment": "string", "is_sentiment_correct": "bool"}
     """
     try:
-        feedback = {
-            "endpoint": "/true_sentiment",
-            "request_text": request.request_text,
-            "predicted_sentiment": request.predicted_sentiment,
-            "probability": request.probability,
-            "true_sentiment": request.true_sentiment,
-        }
-        prediction_logger.info(feedback)
+        feedback = {"endpoint": "/true_sentiment", **feedback_record(request)}
+        await execution.run_io(prediction_logger.info, feedback)
         logger.info({"true_sentiment": feedback["true_sentiment"]})
         return {"message": "Feedback received"}
     except Exception as e:
@@ -185,6 +648,46 @@ async def true_sentiment(request: SentimentFeedback) -> dict:
         )
 
 
+@app.post("/true_sentiment_batch")
+async def true_sentiment_batch(request: BatchSentimentFeedback) -> dict:
+    """
+    Batched true sentiment endpoint, logged as a single record
+    Args:
+        request (BatchSentimentFeedback):  {"feedback": [SentimentFeedback, ...]}
+    """
+    if not request.feedback:
+        raise HTTPException(status_code=422, detail="feedback must not be empty")
+    if len(request.feedback) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size {len(request.feedback)} exceeds the limit of "
+            f"{MAX_BATCH_SIZE}",
+        )
+    try:
+        await execution.run_io(
+            prediction_logger.info,
+            {
+                "endpoint": "/true_sentiment_batch",
+                "feedback": [feedback_record(item) for item in request.feedback],
+            },
+        )
+        return {"message": f"Feedback received for {len(request.feedback)} predictions"}
+    except Exception as e:
+        logger.error(f"Error processing batched sentiment feedback: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail="Error processing sentiment feedback"
+        )
+
+
+def feedback_record(feedback: SentimentFeedback) -> dict:
+    """
+    Returns the log record fields of a feedback. Feedback that references a
+    prediction ID is joined to the prediction record by monitoring, so only the
+    fields the client actually sent are logged.
+    """
+    return feedback.model_dump(exclude_none=True, exclude={"is_sentiment_correct"})
+
+
 @app.get("/favicon.ico")
 async def favicon():
     """
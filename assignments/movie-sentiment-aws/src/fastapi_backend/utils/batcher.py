@@ -0,0 +1,183 @@
+"""
+Module for server-side micro-batching of single-text predictions.
+
+Concurrent requests are collected for up to `max_wait_ms` milliseconds or
+`max_batch_size` items, scored with one vectorized call per model they were
+submitted for, and the results are fanned back out to the waiting coroutines.
+"""
+
+import asyncio
+import inspect
+from typing import Any, Awaitable, Callable, Sequence
+import numpy as np
+from src.core import logger
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-text predictions into vectorized batches.
+
+    Args:
+        score_fn (Callable): Scores a list of texts with the model they were
+            submitted for and returns one row of class probabilities per text, in
+            input order. May be a coroutine function, e.g. one that runs on an
+            inference pool.
+        max_batch_size (int): The maximum number of texts scored in one call.
+        max_wait_ms (float): The maximum time the first request of a batch waits
+            for more requests to arrive.
+    """
+
+    def __init__(
+        self,
+        score_fn: Callable[
+            [Sequence[str], Any],
+            Sequence[Sequence[float]] | Awaitable[Sequence[Sequence[float]]],
+        ],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+        self._in_flight: set[asyncio.Task] = set()
+        # Requests taken off the queue for the batch that is still forming
+        self._forming: list[tuple[str, Any, asyncio.Future]] = []
+
+    def start(self) -> None:
+        """Starts the batching worker on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._worker = self._loop.create_task(self._run())
+        logger.info(
+            f"Micro-batcher started (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait * 1000:g})."
+        )
+
+    async def stop(self) -> None:
+        """
+        Stops the batching worker. Requests that are already queued are still
+        scored, so every waiting caller gets its result (or the scoring error).
+        """
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            pending, self._forming = self._forming, []
+            while not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            for start in range(0, len(pending), self.max_batch_size):
+                await self._flush(pending[start : start + self.max_batch_size])
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    async def submit(self, text: str, model: Any = None) -> np.ndarray:
+        """
+        Queues a text for scoring and waits for its batch to be scored.
+        Args:
+            text (str): The text to score.
+            model (optional): Passed on to `score_fn`, so a request is scored by
+                the model it was submitted for even if the live one has changed.
+                Texts for different models are never scored in the same call.
+        Returns:
+            np.ndarray: The class probabilities for the text.
+        """
+        # (Re)start lazily if the app was not started through its lifespan
+        # or the event loop has changed underneath us.
+        if self._worker is None or self._loop is not asyncio.get_running_loop():
+            self.start()
+        future = self._loop.create_future()
+        self._queue.put_nowait((text, model, future))
+        return await future
+
+    async def _run(self) -> None:
+        """Worker loop that forms and scores batches until cancelled."""
+        while True:
+            self._forming = batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                # Take whatever is already queued before waiting for more
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except TimeoutError:
+                    break
+            self._forming = []
+            # Score in the background so the next batch can form meanwhile
+            task = self._loop.create_task(self._flush(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _flush(self, batch: list[tuple[str, Any, asyncio.Future]]) -> None:
+        """
+        Scores a batch, one call per model, and resolves the futures of its requests.
+        Args:
+            batch (list): The (text, model, future) triples to score.
+        """
+        groups: dict[int, list[tuple[str, Any, asyncio.Future]]] = {}
+        for item in batch:
+            groups.setdefault(id(item[1]), []).append(item)
+        for group in groups.values():
+            await self._score(group, group[0][1])
+
+    async def _score(
+        self, batch: list[tuple[str, Any, asyncio.Future]], model: Any
+    ) -> None:
+        """
+        Scores texts submitted for the same model and resolves their futures.
+        Args:
+            batch (list): The (text, model, future) triples to score.
+            model: The model the texts were submitted for.
+        """
+        texts = [text for text, _, _ in batch]
+        try:
+            result = self.score_fn(texts, model)
+            if inspect.isawaitable(result):
+                result = await result
+            probabilities = np.asarray(result)
+            if len(probabilities) != len(batch):
+                raise ValueError(
+                    f"Expected {len(batch)} rows of probabilities, "
+                    f"got {len(probabilities)}"
+                )
+        except Exception as e:
+            logger.error(f"Micro-batch of {len(texts)} texts failed: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self._batches += 1
+        self._items += len(batch)
+        self._largest_batch = max(self._largest_batch, len(batch))
+        for (_, _, future), row in zip(batch, probabilities):
+            if not future.done():
+                future.set_result(row)
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: The current queue depth and batch-size statistics.
+        """
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self._batches,
+            "items": self._items,
+            "mean_batch_size": round(self._items / self._batches, 2)
+            if self._batches
+            else 0.0,
+            "max_batch_size_seen": self._largest_batch,
+        }
@@ -0,0 +1,181 @@
+"""
+Module for the in-process prediction cache.
+
+Results are keyed by a hash of the normalized text plus the model version, bounded
+by entry count, memory and TTL, and evicted least-recently-used first. Concurrent
+requests for the same key are coalesced so only one of them computes the result.
+"""
+
+import asyncio
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+import numpy as np
+
+# Approximate per-entry bookkeeping overhead (OrderedDict node, tuple, ndarray header)
+ENTRY_OVERHEAD_BYTES = 200
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes a text for cache lookups. Only surrounding and repeated whitespace
+    is collapsed, which the word tokenizer ignores anyway, so the prediction for a
+    normalized text is the same as for the original.
+    Args:
+        text (str): The raw request text.
+    Returns:
+        str: The normalized text.
+    """
+    return " ".join(text.split())
+
+
+class PredictionCache:
+    """
+    LRU/TTL cache of prediction results with single-flight deduplication.
+
+    Args:
+        max_entries (int): The maximum number of cached results.
+        max_bytes (int): The approximate memory bound of the cached results.
+        ttl_seconds (float): How long a result stays valid (0 disables expiry).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: int = 16 * 1024 * 1024,
+        ttl_seconds: float = 3600,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires_at, size, value)
+        self._entries: OrderedDict[str, tuple[float, int, np.ndarray]] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(text: str, model_version: str) -> str:
+        """
+        Args:
+            text (str): The request text.
+            model_version (str): The version of the model that scores the text.
+        Returns:
+            str: The cache key.
+        """
+        digest = hashlib.sha256(normalize_text(text).encode("utf-8"))
+        digest.update(b"\0" + model_version.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> np.ndarray | None:
+        """Returns the cached value for a key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, size, value = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: np.ndarray) -> None:
+        """Stores a value, evicting least-recently-used entries past the bounds."""
+        size = sys.getsizeof(key) + value.nbytes + ENTRY_OVERHEAD_BYTES
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else 0.0
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (expires_at, size, value)
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    async def get_or_compute(
+        self,
+        text: str,
+        model_version: str,
+        compute: Callable[[], Awaitable[np.ndarray]],
+    ) -> np.ndarray:
+        """
+        Returns the cached result for a text, computing it at most once at a time.
+        Args:
+            text (str): The request text.
+            model_version (str): The version of the model that scores the text.
+            compute (Callable): Computes the result on a cache miss.
+        Returns:
+            np.ndarray: The prediction result.
+        """
+        key = self.make_key(text, model_version)
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None and in_flight.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # The computation runs in its own task, so a caller that is cancelled
+            # (e.g. its client disconnected) does not cancel it for the others
+            in_flight = asyncio.ensure_future(self._compute(key, compute))
+            in_flight.add_done_callback(self._retrieve_exception)
+            self._in_flight[key] = in_flight
+        return await asyncio.shield(in_flight)
+
+    async def _compute(
+        self, key: str, compute: Callable[[], Awaitable[np.ndarray]]
+    ) -> np.ndarray:
+        """Computes and caches the result of a key, for every waiting caller."""
+        try:
+            value = np.asarray(await compute())
+            self.put(key, value)
+            return value
+        finally:
+            self._in_flight.pop(key, None)
+
+    @staticmethod
+    def _retrieve_exception(task: asyncio.Task) -> None:
+        """Marks a failed computation's exception as retrieved, in case every
+        caller waiting for it was cancelled."""
+        if not task.cancelled():
+            task.exception()
+
+    def clear(self) -> None:
+        """Drops every cached result, e.g. when a new model is swapped in."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: The size and hit/miss counters of the cache.
+        """
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4)
+            if lookups
+            else 0.0,
+        }
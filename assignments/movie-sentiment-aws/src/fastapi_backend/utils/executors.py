@@ -0,0 +1,123 @@
+"""
+Module for running blocking work off the asyncio event loop.
+
+CPU-bound inference and blocking I/O (dataset reads, S3-backed logging) each get
+their own bounded pool, so one slow request cannot stall every other connection
+on the uvicorn worker.
+"""
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+from src.core import logger
+
+
+class ExecutionLayer:
+    """
+    Bounded inference and I/O pools that async handlers can await.
+
+    Args:
+        enabled (bool): If False, work runs inline on the event loop.
+        inference_pool (str): "thread" or "process". A process pool sidesteps the
+            GIL for tokenization but requires picklable callables and arguments.
+        inference_workers (int): The number of inference workers.
+        io_workers (int): The number of blocking I/O threads.
+        max_pending (int): The maximum number of jobs submitted to each pool at
+            once. Further callers wait on the event loop instead of piling up.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        inference_pool: str = "thread",
+        inference_workers: int = 4,
+        io_workers: int = 8,
+        max_pending: int = 64,
+    ):
+        if inference_pool not in ("thread", "process"):
+            raise ValueError(f"Unknown inference pool type: {inference_pool}")
+        self.enabled = enabled
+        self.inference_pool = inference_pool
+        self.inference_workers = inference_workers
+        self.io_workers = io_workers
+        self.max_pending = max_pending
+        self._inference_executor: Executor | None = None
+        self._io_executor: Executor | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def inference_executor(self) -> Executor:
+        """The inference pool, created on first use."""
+        if self._inference_executor is None:
+            if self.inference_pool == "process":
+                self._inference_executor = ProcessPoolExecutor(
+                    max_workers=self.inference_workers
+                )
+            else:
+                self._inference_executor = ThreadPoolExecutor(
+                    max_workers=self.inference_workers, thread_name_prefix="inference"
+                )
+            logger.info(
+                f"Started {self.inference_pool} inference pool with "
+                f"{self.inference_workers} workers."
+            )
+        return self._inference_executor
+
+    @property
+    def io_executor(self) -> Executor:
+        """The blocking I/O pool, created on first use."""
+        if self._io_executor is None:
+            self._io_executor = ThreadPoolExecutor(
+                max_workers=self.io_workers, thread_name_prefix="io"
+            )
+        return self._io_executor
+
+    def _semaphore(self, pool: str) -> asyncio.Semaphore:
+        """Returns the semaphore bounding a pool on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphores = {}
+        if pool not in self._semaphores:
+            self._semaphores[pool] = asyncio.Semaphore(self.max_pending)
+        return self._semaphores[pool]
+
+    async def _run(self, pool: str, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Runs a call in the given pool, or inline if the layer is disabled."""
+        if not self.enabled:
+            return fn(*args, **kwargs)
+        executor = self.inference_executor if pool == "inference" else self.io_executor
+        async with self._semaphore(pool):
+            return await asyncio.get_running_loop().run_in_executor(
+                executor, partial(fn, *args, **kwargs)
+            )
+
+    async def run_inference(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Runs a CPU-bound call in the inference pool.
+        Args:
+            fn (Callable): The function to call.
+        Returns:
+            The function's return value.
+        """
+        return await self._run("inference", fn, *args, **kwargs)
+
+    async def run_io(self, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Runs a blocking I/O call in the I/O pool.
+        Args:
+            fn (Callable): The function to call.
+        Returns:
+            The function's return value.
+        """
+        return await self._run("io", fn, *args, **kwargs)
+
+    def shutdown(self) -> None:
+        """Shuts down both pools, waiting for running jobs to finish."""
+        for executor in (self._inference_executor, self._io_executor):
+            if executor is not None:
+                executor.shutdown(wait=True)
+        self._inference_executor = None
+        self._io_executor = None
@@ -1,63 +1,92 @@
 """
 Module for logging the requests and responses of the FastAPI app. Implements the concept of middleware so that
 the logging is automatically done for every request and response instead of manually adding it to each endpoint.
+
+The middleware is a pure ASGI middleware: it observes the request and response messages as they pass through
+instead of buffering the bodies, so it adds no copies and works with streaming endpoints.
 """
 
-from fastapi import Request
-from fastapi.responses import Response
+import random
+import time
+from typing import Iterable
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from src.core import logger
 
 
-async def log_middleware_request(request: Request, call_next):
+class RequestLoggingMiddleware:
     """
-    Middleware to log requests
+    Logs one line per sampled request with its method, URL, status code, duration
+    and truncated request/response payloads.
+
     Args:
-        request: Request object
-        call_next: Next middleware function
-    Returns:
-        Response object
+        app (ASGIApp): The wrapped ASGI app.
+        sample_rate (float): The fraction of requests that are logged.
+        max_payload_chars (int): The number of characters of each payload to log.
+            0 disables payload logging.
+        exclude_paths (Iterable[str]): Paths that are never logged.
     """
-    log_dict = {
-        "url": request.url,
-        "method": request.method,
-        "input": str(await request.body()),
-    }
-    logger.info(f"Request: {log_dict}")
-    response = await call_next(request)
-    return response
 
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: float = 1.0,
+        max_payload_chars: int = 1000,
+        exclude_paths: Iterable[str] = ("/health", "/favicon.ico"),
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.max_payload_chars = max_payload_chars
+        self.exclude_paths = frozenset(exclude_paths)
 
-async def log_middleware_response(request: Request, call_next):
-    """
-    Middleware to log responses
-    Args:
-        request: Request object
-        call_next: Next middleware function
-    Returns:
-        Response object
-    """
-    # Process request
-    response = await call_next(request)
-
-    # Log response
-    response_body = b""
-    async for chunk in response.body_iterator:
-        response_body += chunk
-
-    # Reconstruct response with body
-    new_response = Response(
-        content=response_body,
-        status_code=response.status_code,
-        headers=dict(response.headers),
-        media_type=response.media_type,
-    )
-
-    response_log = {
-        "url": str(request.url),
-        "method": request.method,
-        "status_code": response.status_code,
-        "response": response_body.decode() if response_body else None,
-    }
-    logger.info(f"Response: {response_log}")
-
-    return new_response
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["path"] in self.exclude_paths
+            or (self.sample_rate < 1.0 and random.random() >= self.sample_rate)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.max_payload_chars
+        request_preview = bytearray()
+        response_preview = bytearray()
+        status_code = None
+        start = time.perf_counter()
+
+        async def receive_wrapper() -> Message:
+            message = await receive()
+            if message["type"] == "http.request" and len(request_preview) < limit:
+                request_preview.extend(
+                    message.get("body", b"")[: limit - len(request_preview)]
+                )
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif (
+                message["type"] == "http.response.body"
+                and len(response_preview) < limit
+            ):
+                response_preview.extend(
+                    message.get("body", b"")[: limit - len(response_preview)]
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            log_dict = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status_code": status_code,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+            }
+            if limit:
+                log_dict["input"] = request_preview.decode("utf-8", errors="replace")
+                log_dict["response"] = response_preview.decode(
+                    "utf-8", errors="replace"
+                )
+            logger.info(f"Request: {log_dict}")
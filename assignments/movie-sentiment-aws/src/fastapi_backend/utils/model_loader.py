@@ -1,14 +1,43 @@
 """
 Module for loading the sentiment analysis model.
+
+The `ModelManager` keeps a single, shared copy of the model in memory for the
+lifetime of the process and hot-swaps it when a newly trained artifact appears.
 """
 
+import asyncio
 import sys
-import joblib
-from sklearn.pipeline import Pipeline
-from src.core import logger, get_asset_path
+import threading
+from typing import TYPE_CHECKING, Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from src.core import (
+    config,
+    logger,
+    get_asset_path,
+    get_asset_version,
+    get_local_asset_version,
+    get_file_checksum,
+)
+from src.fastapi_backend.utils.scorer import CompiledNBScorer, compile_model
+
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
+
+WARMUP_TEXT = "This movie was great."
+
+
+def load_artifact(path) -> "Pipeline":
+    """
+    Unpickles a model artifact. joblib and scikit-learn are imported here, on the
+    first load, rather than when the backend is imported.
+    """
+    import joblib
+
+    return joblib.load(path)
 
 
-def load_model() -> Pipeline:
+def load_model() -> "Pipeline":
     """
     Loads the sentiment analysis model.
 
@@ -22,9 +51,206 @@ def load_model() -> Pipeline:
     try:
         logger.info("Attempting to load sentiment analysis model...")
         model_path = get_asset_path("model")
-        model = joblib.load(model_path)
+        model = load_artifact(model_path)
         logger.info("Model loaded successfully.")
         return model
     except Exception as e:
         logger.critical(f"Failed to load model. Error: {e}")
         sys.exit(1)
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    """An immutable snapshot of the model currently being served."""
+
+    model: "Pipeline"
+    version: str
+    loaded_at: datetime
+    # Content hash of the artifact, matching the one recorded with its review scores
+    checksum: str | None = None
+
+
+class ModelManager:
+    """
+    Owns the lifecycle of the served model.
+
+    The model is loaded and warmed once, then handed out as a shared reference.
+    A background watcher polls the artifact's version (local mtime or S3 ETag) and,
+    when it changes, loads the new model off the request path and swaps it in with
+    a single reference assignment. In-flight requests keep using the snapshot they
+    already hold, so a swap never fails a request.
+    """
+
+    def __init__(
+        self,
+        asset_key: str = "model",
+        reload_interval: float = 30.0,
+        compiled_scorer: bool = True,
+    ):
+        self.asset_key = asset_key
+        self.reload_interval = reload_interval
+        self.compiled_scorer = compiled_scorer
+        self._current: LoadedModel | None = None
+        self._load_lock = threading.Lock()
+        self._swap_callbacks: list[Callable[[LoadedModel], None]] = []
+
+    @property
+    def current(self) -> LoadedModel:
+        """Returns the live model snapshot, loading it on first access."""
+        current = self._current
+        if current is None:
+            with self._load_lock:
+                if self._current is None:
+                    self._current = self._load(refresh=False)
+                current = self._current
+        return current
+
+    def get(self) -> "Pipeline":
+        """Returns the live model."""
+        return self.current.model
+
+    def on_swap(self, callback: Callable[[LoadedModel], None]) -> None:
+        """
+        Registers a callback that is called with the new snapshot after every swap,
+        e.g. to invalidate caches that depend on the model.
+        Args:
+            callback (Callable): The callback to register.
+        """
+        self._swap_callbacks.append(callback)
+
+    def swap(
+        self, model: "Pipeline", version: str, checksum: str | None = None
+    ) -> LoadedModel:
+        """
+        Atomically replaces the live model.
+        Args:
+            model (Pipeline): The new model to serve.
+            version (str): The version identifier of the new model.
+            checksum (str, optional): The content hash of the model artifact.
+        Returns:
+            LoadedModel: The new live snapshot.
+        """
+        loaded = LoadedModel(
+            model=model,
+            version=version,
+            loaded_at=datetime.now(timezone.utc),
+            checksum=checksum,
+        )
+        self._current = loaded
+        logger.info(f"Now serving model version {version}.")
+        for callback in self._swap_callbacks:
+            callback(loaded)
+        return loaded
+
+    def _load(self, refresh: bool) -> LoadedModel:
+        """
+        Loads and warms the model artifact, then swaps it in.
+        Args:
+            refresh (bool): Whether to force a fresh download of the artifact.
+        Returns:
+            LoadedModel: The new live snapshot.
+        """
+        # A failed reload raises instead of exiting, so the current model keeps
+        # serving (see `refresh`)
+        model_path = get_asset_path(
+            self.asset_key, refresh=refresh, exit_on_failure=not refresh
+        )
+        # The version of the fetched copy, which may be newer than the one that
+        # triggered the reload
+        version = get_local_asset_version(self.asset_key, model_path)
+        logger.info(f"Loading model version {version}...")
+        checksum = get_file_checksum(model_path)
+        model = load_artifact(model_path)
+        if self.compiled_scorer:
+            model = compile_model(model)
+        # Warm the model so the first real request doesn't pay for lazy setup
+        model.predict_proba([WARMUP_TEXT])
+        return self.swap(model, version, checksum=checksum)
+
+    def load(self) -> LoadedModel:
+        """
+        Loads the model at startup. Exits the application if it cannot be loaded.
+        Returns:
+            LoadedModel: The live snapshot.
+        """
+        try:
+            with self._load_lock:
+                self._current = self._load(refresh=False)
+            return self._current
+        except Exception as e:
+            logger.critical(f"Failed to load model. Error: {e}")
+            sys.exit(1)
+
+    def refresh(self) -> bool:
+        """
+        Reloads the model if its artifact has changed since it was loaded.
+
+        Failures are logged and the previous model keeps serving.
+
+        Returns:
+            bool: True if a new model was swapped in, False otherwise.
+        """
+        try:
+            version = get_asset_version(self.asset_key)
+            current = self._current
+            if version is None or (current is not None and version == current.version):
+                return False
+            with self._load_lock:
+                self._load(refresh=True)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to reload model, keeping current version. Error: {e}")
+            return False
+
+    async def watch(self) -> None:
+        """
+        Polls for new model artifacts until cancelled.
+        """
+        if self.reload_interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            await asyncio.to_thread(self.refresh)
+
+    def status(self) -> dict:
+        """
+        Returns:
+            dict: The version and load time of the live model.
+        """
+        current = self._current
+        if current is None:
+            return {"model_version": None, "model_loaded_at": None}
+        return {
+            "model_version": current.version,
+            "model_loaded_at": current.loaded_at.isoformat(),
+            "model_engine": "compiled"
+            if isinstance(current.model, CompiledNBScorer)
+            else "pipeline",
+        }
+
+
+serving_config = config.get("model_serving", {})
+model_manager = ModelManager(
+    reload_interval=serving_config.get("reload_interval_seconds", 30),
+    compiled_scorer=serving_config.get("compiled_scorer", True),
+)
+
+
+def run_model_in_worker(version: str, method: str, texts: list[str]):
+    """
+    Runs a model method inside an inference worker process.
+
+    Each worker keeps its own copy of the model and reloads it when the parent
+    process has moved on to a newer version.
+
+    Args:
+        version (str): The model version the parent process is serving.
+        method (str): The model method to call, e.g. "predict_proba".
+        texts (list[str]): The texts to score.
+
+    Returns:
+        The method's return value.
+    """
+    if model_manager.current.version != version:
+        model_manager.refresh()
+    return getattr(model_manager.get(), method)(texts)
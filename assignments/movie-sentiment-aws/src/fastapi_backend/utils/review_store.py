@@ -0,0 +1,123 @@
+"""
+Module for serving random reviews from the IMDB dataset without re-parsing it.
+
+The reviews are read from the columnar copy of the dataset (see
+`src.core.dataset`), which is memory-mapped: a random review is a slice of the
+mapping, and only the compact sentiment labels are held in memory.
+"""
+
+from pathlib import Path
+import numpy as np
+from src.core import logger
+
+SENTIMENTS = ("negative", "positive")
+
+
+class ReviewStore:
+    """
+    Random access to the reviews of a dataset.
+
+    Args:
+        path (Path): The path to a CSV file with "review" and "sentiment" columns.
+    """
+
+    def __init__(self, path: Path):
+        # pyarrow is only imported once the reviews are needed
+        from src.core.dataset import load_table
+
+        self.path = Path(path)
+        table = load_table(self.path, columns=["review", "sentiment"])
+        self._reviews = table["review"]
+        self._sentiments = table["sentiment"]
+        self.labels = self._build_labels()
+        self._by_label = {
+            sentiment: np.flatnonzero(self.labels == label)
+            for label, sentiment in enumerate(SENTIMENTS)
+        }
+        self._rng = np.random.default_rng()
+        logger.info(
+            f"Loaded {len(self)} reviews from {self.path.name} "
+            f"({self.labels.nbytes} bytes of labels in memory)."
+        )
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def _build_labels(self) -> np.ndarray:
+        """
+        Returns:
+            np.ndarray: The label of each record (-1 if unknown), as int8.
+        """
+        labels = []
+        for chunk in self._sentiments.chunks:
+            # Map the chunk's dictionary to labels, then look up every record
+            mapping = np.array(
+                [
+                    SENTIMENTS.index(value) if value in SENTIMENTS else -1
+                    for value in chunk.dictionary.to_pylist()
+                ]
+                + [-1],
+                dtype=np.int8,
+            )
+            indices = chunk.indices.fill_null(-1).to_numpy(zero_copy_only=False)
+            labels.append(mapping[indices])
+        return np.concatenate(labels) if labels else np.empty(0, dtype=np.int8)
+
+    def get(self, index: int) -> dict:
+        """
+        Args:
+            index (int): The record number.
+        Returns:
+            dict: The "review" and "sentiment" of the record.
+        """
+        return {
+            "review": self._reviews[index].as_py(),
+            "sentiment": self._sentiments[index].as_py(),
+        }
+
+    def sample_indices(
+        self,
+        count: int = 1,
+        sentiment: str | None = None,
+        rng: np.random.Generator | None = None,
+    ) -> list[int]:
+        """
+        Draws random record numbers without replacement.
+        Args:
+            count (int): The number of records to draw.
+            sentiment (str, optional): Only draw records with this sentiment.
+            rng (np.random.Generator, optional): The random generator to use.
+        Returns:
+            list[int]: The sampled record numbers.
+        """
+        rng = rng or self._rng
+        if sentiment is None:
+            population = len(self)
+            indices = rng.choice(population, size=min(count, population), replace=False)
+        else:
+            candidates = self._by_label[sentiment]
+            indices = rng.choice(
+                candidates, size=min(count, len(candidates)), replace=False
+            )
+        return [int(index) for index in indices]
+
+    def sample(
+        self,
+        count: int = 1,
+        sentiment: str | None = None,
+        rng: np.random.Generator | None = None,
+    ) -> list[dict]:
+        """
+        Draws random reviews without replacement.
+        Args:
+            count (int): The number of reviews to draw.
+            sentiment (str, optional): Only draw reviews with this sentiment.
+            rng (np.random.Generator, optional): The random generator to use.
+        Returns:
+            list[dict]: The sampled reviews.
+        """
+        return [self.get(index) for index in self.sample_indices(count, sentiment, rng)]
+
+    def close(self) -> None:
+        """Releases the memory mapping."""
+        self._reviews = self._sentiments = None
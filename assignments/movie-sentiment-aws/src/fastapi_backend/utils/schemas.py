@@ -2,7 +2,7 @@
 Pydantic models for the FastAPI app
 """
 
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 
 
 class PredictRequest(BaseModel):
@@ -20,61 +20,158 @@ class PredictRequest(BaseModel):
 
 class SentimentResponse(BaseModel):
     """Response model for sentiment prediction returned by the API
-    as a key-value pair with a single key "sentiment".
+    as a key-value pair with the keys "sentiment" and "prediction_id".
+    The prediction ID is used to send feedback about the prediction.
 
     Example response:
         {
-            "sentiment": "positive"
+            "sentiment": "positive",
+            "prediction_id": "3f2b6c1e9a7d4e0f8b5a2c9d1e6f7a8b"
         }
     """
 
     sentiment: str
+    prediction_id: str | None = None
 
 
 class SentimentProbabilityResponse(BaseModel):
     """Response model for sentiment prediction with probability score returned by the API
-    as a key-value pair with a two keys: "sentiment" and "probability".
+    as a key-value pair with the keys "sentiment", "probability" and "prediction_id".
 
     Example response:
         {
             "sentiment": "positive",
-            "probability": 0.92
+            "probability": 0.92,
+            "prediction_id": "3f2b6c1e9a7d4e0f8b5a2c9d1e6f7a8b"
         }
     """
 
     sentiment: str
     probability: float
+    prediction_id: str | None = None
 
 
 class ExampleResponse(BaseModel):
     """Response model for example movie review returned by the API
-    as a key-value pair with a single key "review".
+    with its labeled "sentiment" and the model's "predicted_sentiment" and "probability".
 
     Example response:
         {
-            "review": "One of the best films I've seen this year..."
+            "review": "One of the best films I've seen this year...",
+            "sentiment": "positive",
+            "predicted_sentiment": "positive",
+            "probability": 0.93
         }
     """
 
     review: str
+    sentiment: str | None = None
+    predicted_sentiment: str | None = None
+    probability: float | None = None
+
+
+class ExamplesResponse(BaseModel):
+    """Response model for several example movie reviews returned by the API,
+    e.g. so a client can prefetch them in one call.
+
+    Example response:
+        {
+            "examples": [
+                {"review": "One of the best films...", "sentiment": "positive"},
+                {"review": "Two hours I will never get back...", "sentiment": "negative"}
+            ]
+        }
+    """
+
+    examples: list[ExampleResponse]
 
 
 class SentimentFeedback(BaseModel):
-    """Request/response model for true sentiment prediction sent to the API
-    as a JSON object with a single key "is_sentiment_correct".
+    """Request model for true sentiment feedback sent to the API.
+    The feedback references the prediction by its "prediction_id", so the review
+    text doesn't have to be sent (and logged) again.
 
     Example request:
         {
-            "request_text": "Movie was buns..",
-            "predicted_sentiment": "positive",
-            "probability": 0.12,
-            "true_sentiment": "negative"
+            "prediction_id": "3f2b6c1e9a7d4e0f8b5a2c9d1e6f7a8b",
+            "true_sentiment": "negative",
             "is_sentiment_correct": false
         }
+
+    Feedback about a prediction without an ID (e.g. a precomputed example score)
+    sends "request_text", "predicted_sentiment" and "probability" instead.
     """
 
-    request_text: str
-    predicted_sentiment: str
-    probability: float
+    prediction_id: str | None = None
+    request_text: str | None = None
+    predicted_sentiment: str | None = None
+    probability: float | None = None
     true_sentiment: str
     is_sentiment_correct: bool
+
+    @model_validator(mode="after")
+    def check_prediction_reference(self) -> "SentimentFeedback":
+        if self.prediction_id is None and (
+            self.request_text is None or self.predicted_sentiment is None
+        ):
+            raise ValueError(
+                "Feedback needs a prediction_id, or a request_text and predicted_sentiment"
+            )
+        return self
+
+
+class BatchSentimentFeedback(BaseModel):
+    """Request model for batched true sentiment feedback sent to the API.
+
+    Example request:
+        {
+            "feedback": [
+                {"prediction_id": "3f2b...", "true_sentiment": "negative", "is_sentiment_correct": false},
+                {"prediction_id": "9c1d...", "true_sentiment": "positive", "is_sentiment_correct": true}
+            ]
+        }
+    """
+
+    feedback: list[SentimentFeedback]
+
+
+class BatchPredictRequest(BaseModel):
+    """Request model for batch sentiment prediction sent to the API
+    as a JSON object with a single key "texts".
+
+    Example request:
+        {
+            "texts": ["This movie was fantastic!", "Worst film of the year."]
+        }
+    """
+
+    texts: list[str]
+
+
+class BatchSentimentResponse(BaseModel):
+    """Response model for batch sentiment prediction returned by the API.
+    Predictions are returned in the same order as the input texts.
+
+    Example response:
+        {
+            "predictions": [{"sentiment": "positive"}, {"sentiment": "negative"}]
+        }
+    """
+
+    predictions: list[SentimentResponse]
+
+
+class BatchSentimentProbabilityResponse(BaseModel):
+    """Response model for batch sentiment prediction with probability scores
+    returned by the API. Predictions are returned in the same order as the input texts.
+
+    Example response:
+        {
+            "predictions": [
+                {"sentiment": "positive", "probability": 0.92},
+                {"sentiment": "negative", "probability": 0.81}
+            ]
+        }
+    """
+
+    predictions: list[SentimentProbabilityResponse]
@@ -0,0 +1,183 @@
+"""
+Module for the compiled serving engine of the sentiment analysis model.
+
+The trained `TfidfVectorizer` + `MultinomialNB` pipeline is flattened into plain
+NumPy arrays (IDF weights, per-feature class log-probabilities, class log-priors)
+so that a prediction is a single pass over the sparse TF-IDF row of each text,
+computing the label and the probabilities together without going through the
+generic sklearn `Pipeline` dispatch.
+"""
+
+from typing import TYPE_CHECKING, Sequence
+import numpy as np
+from src.core import logger
+
+if TYPE_CHECKING:
+    from sklearn.pipeline import Pipeline
+
+VERIFICATION_TEXTS = [
+    "This movie was great, I loved every minute of it!",
+    "Terrible acting and a boring, predictable plot.",
+    "",
+]
+
+
+class CompiledNBScorer:
+    """
+    Single-pass scorer for a fitted TF-IDF + Multinomial Naive Bayes pipeline.
+
+    Exposes the same `predict`/`predict_proba` interface as the pipeline so it can
+    be served in its place.
+
+    Args:
+        pipeline (Pipeline): A fitted pipeline of a `TfidfVectorizer` followed by a
+            `MultinomialNB` classifier.
+
+    Raises:
+        TypeError: If the pipeline is not a supported TF-IDF + NB pipeline.
+    """
+
+    def __init__(self, pipeline: "Pipeline"):
+        # sklearn is only needed once a model is loaded, not to import this module
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.naive_bayes import MultinomialNB
+        from sklearn.pipeline import Pipeline
+
+        if not isinstance(pipeline, Pipeline) or len(pipeline.steps) != 2:
+            raise TypeError("Expected a two-step scikit-learn Pipeline.")
+        vectorizer, classifier = (step for _, step in pipeline.steps)
+        if not isinstance(vectorizer, TfidfVectorizer) or not isinstance(
+            classifier, MultinomialNB
+        ):
+            raise TypeError(
+                "Expected a TfidfVectorizer followed by a MultinomialNB classifier, "
+                f"got {type(vectorizer).__name__} and {type(classifier).__name__}."
+            )
+        if vectorizer.norm not in ("l1", "l2", None):
+            raise TypeError(f"Unsupported TF-IDF norm: {vectorizer.norm}")
+
+        self.pipeline = pipeline
+        self.classes_ = classifier.classes_
+        # The analyzer applies the exact preprocessing, tokenization,
+        # stop-word removal and n-gram generation used at training time.
+        self._analyze = vectorizer.build_analyzer()
+        self._vocabulary = vectorizer.vocabulary_
+        self._binary = vectorizer.binary
+        self._sublinear_tf = vectorizer.sublinear_tf
+        self._norm = vectorizer.norm
+        self._idf = (
+            np.ascontiguousarray(vectorizer.idf_, dtype=np.float64)
+            if vectorizer.use_idf
+            else None
+        )
+        # Row-major (n_features, n_classes) so a sparse row gathers contiguous rows
+        self._feature_log_prob = np.ascontiguousarray(
+            classifier.feature_log_prob_.T, dtype=np.float64
+        )
+        self._class_log_prior = np.ascontiguousarray(
+            classifier.class_log_prior_, dtype=np.float64
+        )
+
+    def _joint_log_likelihood(self, text: str) -> np.ndarray:
+        """
+        Computes the NB joint log-likelihood of one text from its sparse TF-IDF row.
+        Args:
+            text (str): The text to score.
+        Returns:
+            np.ndarray: The joint log-likelihood of each class.
+        """
+        vocabulary = self._vocabulary
+        indices = [
+            index
+            for index in map(vocabulary.get, self._analyze(text))
+            if index is not None
+        ]
+        if not indices:
+            return self._class_log_prior.copy()
+
+        indices, counts = np.unique(np.asarray(indices), return_counts=True)
+        weights = counts.astype(np.float64)
+        if self._binary:
+            weights[:] = 1.0
+        elif self._sublinear_tf:
+            weights = np.log(weights) + 1.0
+        if self._idf is not None:
+            weights *= self._idf[indices]
+        if self._norm == "l2":
+            weights /= np.sqrt(weights @ weights)
+        elif self._norm == "l1":
+            weights /= np.abs(weights).sum()
+
+        return weights @ self._feature_log_prob[indices] + self._class_log_prior
+
+    def predict_with_proba(self, texts: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Computes labels and class probabilities in a single pass.
+        Args:
+            texts (Sequence[str]): The texts to score.
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The predicted labels and the class
+                probabilities, one row per text.
+        """
+        jll = np.empty((len(texts), len(self.classes_)), dtype=np.float64)
+        for row, text in enumerate(texts):
+            jll[row] = self._joint_log_likelihood(text)
+        labels = self.classes_[jll.argmax(axis=1)]
+        # Normalize with log-sum-exp, as MultinomialNB.predict_proba does
+        jll -= jll.max(axis=1, keepdims=True)
+        probabilities = np.exp(jll)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+        return labels, probabilities
+
+    def predict(self, texts: Sequence[str]) -> np.ndarray:
+        """Predicts the class label of each text."""
+        return self.predict_with_proba(texts)[0]
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        """Predicts the class probabilities of each text."""
+        return self.predict_with_proba(texts)[1]
+
+    def verify(self, texts: Sequence[str], atol: float = 1e-9) -> bool:
+        """
+        Checks that the compiled scorer matches the original pipeline.
+        Args:
+            texts (Sequence[str]): The texts to compare predictions on.
+            atol (float): The absolute tolerance for the probabilities.
+        Returns:
+            bool: True if labels match exactly and probabilities within tolerance.
+        """
+        labels, probabilities = self.predict_with_proba(texts)
+        return bool(
+            np.array_equal(labels, self.pipeline.predict(texts))
+            and np.allclose(
+                probabilities, self.pipeline.predict_proba(texts), rtol=0, atol=atol
+            )
+        )
+
+
+def compile_model(model):
+    """
+    Compiles a model into a `CompiledNBScorer` when supported.
+
+    Falls back to the original model for unsupported model types or if the
+    compiled scorer does not reproduce the model's predictions.
+
+    Args:
+        model: The loaded model, typically a scikit-learn Pipeline.
+
+    Returns:
+        The compiled scorer, or the original model as a fallback.
+    """
+    try:
+        scorer = CompiledNBScorer(model)
+    except TypeError as e:
+        logger.info(f"Serving the model with the sklearn pipeline: {e}")
+        return model
+
+    if not scorer.verify(VERIFICATION_TEXTS):
+        logger.warning(
+            "Compiled scorer does not match the pipeline. Falling back to the pipeline."
+        )
+        return model
+    logger.info("Serving the model with the compiled TF-IDF + Naive Bayes scorer.")
+    return scorer
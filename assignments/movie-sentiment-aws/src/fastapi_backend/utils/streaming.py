@@ -0,0 +1,391 @@
+"""
+Module for streaming bulk scoring.
+
+Request bodies (NDJSON or CSV, optionally gzip-compressed) are read incrementally,
+scored in vectorized chunks and streamed back as NDJSON, so memory stays flat no
+matter how large the input is.
+"""
+
+import csv
+import json
+import zlib
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Iterator
+import numpy as np
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+from src.core import logger
+
+TEXT_COLUMNS = ("text", "review")
+
+
+class UndecodableLine(bytes):
+    """The raw bytes of an input line that is not valid UTF-8."""
+
+
+@dataclass(frozen=True)
+class LineError:
+    """An input line that could not be read at all, e.g. because it is too long."""
+
+    error: str
+
+
+Line = str | UndecodableLine | LineError
+
+INVALID_UTF8_ERROR = "Invalid UTF-8"
+SCORING_ERROR = "Scoring failed"
+# Largest piece a gzip body is inflated into at a time
+DECOMPRESS_CHUNK_BYTES = 64 * 1024
+
+
+def decode_line(line: bytes) -> str | UndecodableLine:
+    """Decodes a line, or wraps its bytes if it is not valid UTF-8."""
+    line = line.rstrip(b"\r")
+    try:
+        return line.decode("utf-8")
+    except UnicodeDecodeError:
+        return UndecodableLine(line)
+
+
+class LineSplitter:
+    """
+    Splits bytes fed in arbitrary pieces into lines. Only the new piece is
+    searched for line terminators, and a line longer than `max_line_bytes` is
+    dropped as it arrives instead of being buffered.
+
+    Args:
+        max_line_bytes (int): The maximum length of a line.
+    """
+
+    def __init__(self, max_line_bytes: int):
+        self.max_line_bytes = max_line_bytes
+        self._parts: list[bytes] = []
+        self._size = 0
+        self._oversized = False
+
+    def feed(self, data: bytes) -> list[Line]:
+        """Returns the lines completed by a piece of data."""
+        lines = []
+        start = 0
+        while (end := data.find(b"\n", start)) != -1:
+            self._append(data[start:end])
+            lines.append(self._take())
+            start = end + 1
+        self._append(data[start:])
+        return lines
+
+    def close(self) -> list[Line]:
+        """Returns the last line, if the data did not end with a terminator."""
+        return [self._take()] if self._size or self._oversized else []
+
+    def _append(self, piece: bytes) -> None:
+        if self._oversized or not piece:
+            return
+        self._size += len(piece)
+        if self._size > self.max_line_bytes:
+            self._oversized = True
+            self._parts.clear()
+        else:
+            self._parts.append(piece)
+
+    def _take(self) -> Line:
+        if self._oversized:
+            line = LineError(f"Line exceeds {self.max_line_bytes} bytes")
+        else:
+            line = decode_line(b"".join(self._parts))
+        self._parts, self._size, self._oversized = [], 0, False
+        return line
+
+
+async def iter_lines(
+    chunks: AsyncIterator[bytes],
+    gzipped: bool = False,
+    max_line_bytes: int = 1_000_000,
+) -> AsyncIterator[Line]:
+    """
+    Splits a stream of byte chunks into decoded lines.
+    Args:
+        chunks (AsyncIterator[bytes]): The raw body chunks.
+        gzipped (bool): Whether the body is gzip-compressed.
+        max_line_bytes (int): Longer lines are dropped and reported as a
+            `LineError`. So is a corrupt or truncated gzip body, which ends the
+            lines.
+    Yields:
+        Line: Each line, without its line terminator. Lines that are not valid
+            UTF-8 are yielded undecoded, so the parsers report them as an error
+            record instead of failing the whole stream.
+    """
+    decompressor = zlib.decompressobj(wbits=31) if gzipped else None
+    splitter = LineSplitter(max_line_bytes)
+    try:
+        async for chunk in chunks:
+            pieces = [chunk] if decompressor is None else inflate(decompressor, chunk)
+            for piece in pieces:
+                for line in splitter.feed(piece):
+                    yield line
+        if decompressor is not None and not decompressor.eof:
+            yield LineError("Truncated gzip body")
+            return
+    except zlib.error as e:
+        # The rest of the body cannot be read, but the records so far stand
+        yield LineError(f"Invalid gzip body: {e}")
+        return
+    for line in splitter.close():
+        yield line
+
+
+def inflate(decompressor, chunk: bytes) -> Iterator[bytes]:
+    """
+    Decompresses a chunk of a gzip body in pieces of at most
+    `DECOMPRESS_CHUNK_BYTES`, so a highly compressed body never expands into
+    memory at once.
+    """
+    data = decompressor.decompress(chunk, DECOMPRESS_CHUNK_BYTES)
+    while data:
+        yield data
+        if len(data) < DECOMPRESS_CHUNK_BYTES and not decompressor.unconsumed_tail:
+            return
+        data = decompressor.decompress(
+            decompressor.unconsumed_tail, DECOMPRESS_CHUNK_BYTES
+        )
+
+
+async def iter_ndjson_records(
+    lines: AsyncIterator[Line],
+) -> AsyncIterator[dict]:
+    """
+    Parses NDJSON lines of the form {"text": "...", "id": ...}. A bare JSON string
+    is accepted as the text as well.
+    Args:
+        lines (AsyncIterator[Line]): The input lines.
+    Yields:
+        dict: A record with a "text" (and optional "id"), or an "error".
+    """
+    async for line in lines:
+        if isinstance(line, LineError):
+            yield {"error": line.error}
+            continue
+        if not line.strip():
+            continue
+        if isinstance(line, UndecodableLine):
+            yield {"error": INVALID_UTF8_ERROR}
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield {"error": f"Invalid JSON: {e.msg}"}
+            continue
+        if isinstance(record, str):
+            record = {"text": record}
+        if not isinstance(record, dict) or not isinstance(record.get("text"), str):
+            yield {"error": 'Expected an object with a string "text" field'}
+            continue
+        if "id" in record:
+            yield {"text": record["text"], "id": record["id"]}
+        else:
+            yield {"text": record["text"]}
+
+
+def ends_in_quoted_field(line: str | bytes, in_quotes: bool = False) -> bool:
+    """
+    Returns whether a CSV line ends inside a quoted field, i.e. whether its record
+    continues on the next line. Follows the grammar `csv.reader` parses: a field
+    is quoted only if it starts with a quote, and a doubled quote inside it is an
+    escaped quote. The quote byte never occurs inside a multi-byte character, so
+    undecodable lines are scanned as bytes.
+    Args:
+        line (str | bytes): The line.
+        in_quotes (bool): Whether the line starts inside a quoted field.
+    """
+    quote, delimiter = (b'"', b",") if isinstance(line, bytes) else ('"', ",")
+    position = 0
+    if not in_quotes and line.startswith(quote):
+        in_quotes, position = True, 1
+    while True:
+        if in_quotes:
+            end = line.find(quote, position)
+            if end == -1:
+                return True
+            if line.startswith(quote, end + 1):
+                position = end + 2
+                continue
+            in_quotes, position = False, end + 1
+        # The rest of the field is unquoted, whatever quotes it contains
+        delimiter_at = line.find(delimiter, position)
+        if delimiter_at == -1:
+            return False
+        position = delimiter_at + 1
+        if line.startswith(quote, position):
+            in_quotes, position = True, position + 1
+
+
+async def iter_csv_records(
+    lines: AsyncIterator[Line],
+    max_record_chars: int = 1_000_000,
+) -> AsyncIterator[dict]:
+    """
+    Parses CSV lines with a header row containing a "text" or "review" column and
+    an optional "id" column. Quoted fields may span several lines.
+    Args:
+        lines (AsyncIterator[Line]): The input lines.
+        max_record_chars (int): The maximum size of a record. A longer one (e.g.
+            a quoted field that is never closed) is reported as an error, and
+            parsing resumes with the next line.
+    Yields:
+        dict: A record with a "text" (and optional "id"), or an "error".
+    """
+    header = None
+    pending = []
+    in_quotes, pending_chars = False, 0
+    async for line in lines:
+        if isinstance(line, LineError):
+            # The record the line belongs to cannot be parsed either
+            pending, in_quotes, pending_chars = [], False, 0
+            yield {"error": line.error}
+            if header is None:
+                return
+            continue
+        pending.append(line)
+        in_quotes = ends_in_quoted_field(line, in_quotes)
+        pending_chars += len(line) + 1
+        if in_quotes:
+            if pending_chars > max_record_chars:
+                pending, in_quotes, pending_chars = [], False, 0
+                yield {
+                    "error": f"Record exceeds {max_record_chars} characters "
+                    "(unterminated quoted field?)"
+                }
+            continue
+        record_lines, pending = pending, []
+        pending_chars = 0
+        if any(isinstance(part, UndecodableLine) for part in record_lines):
+            if header is None:
+                yield {"error": f"{INVALID_UTF8_ERROR} in CSV header"}
+                return
+            yield {"error": INVALID_UTF8_ERROR}
+            continue
+        row = next(csv.reader(["\n".join(record_lines)]), [])
+        if not row:
+            continue
+        if header is None:
+            header = row
+            text_column = next((c for c in TEXT_COLUMNS if c in header), None)
+            if text_column is None:
+                yield {"error": 'CSV header has no "text" or "review" column'}
+                return
+            text_index = header.index(text_column)
+            id_index = header.index("id") if "id" in header else None
+            continue
+        if len(row) != len(header):
+            yield {"error": f"Expected {len(header)} fields, got {len(row)}"}
+            continue
+        record = {"text": row[text_index]}
+        if id_index is not None:
+            record["id"] = row[id_index]
+        yield record
+    if pending:
+        yield {"error": "Unterminated quoted field at end of input"}
+
+
+async def score_records(
+    records: AsyncIterator[dict],
+    score_fn: Callable[[list[str]], Awaitable[np.ndarray]],
+    chunk_size: int,
+    on_chunk: Callable[[list[str], list[str], list[float]], Awaitable[None]]
+    | None = None,
+) -> AsyncIterator[bytes]:
+    """
+    Scores records in vectorized chunks and serializes the results as NDJSON.
+
+    Every output line carries the zero-based "line" index of its input record
+    (and its "id", if one was given), in input order. Records that could not be
+    parsed, or whose chunk failed to score, carry an "error" instead of a result.
+
+    Args:
+        records (AsyncIterator[dict]): The parsed input records.
+        score_fn (Callable): Returns the class probabilities of a list of texts.
+        chunk_size (int): The number of texts scored per model call.
+        on_chunk (Callable, optional): Called with the texts, sentiments and
+            probabilities of every scored chunk, e.g. to log it.
+    Yields:
+        bytes: NDJSON output, one chunk of lines at a time.
+    """
+    pending: list[tuple[int, dict]] = []
+
+    async def flush() -> bytes:
+        scored = [(line, record) for line, record in pending if "error" not in record]
+        results = {}
+        if scored:
+            texts = [record["text"] for _, record in scored]
+            try:
+                probabilities = np.asarray(await score_fn(texts))
+                labels = probabilities.argmax(axis=1)
+            except Exception as e:
+                # The records of this chunk fail, the rest of the stream goes on
+                logger.error(
+                    f"Scoring a stream chunk of {len(texts)} texts failed: {e}"
+                )
+                results = {line: {"error": SCORING_ERROR} for line, _ in scored}
+            else:
+                sentiments = [
+                    "positive" if label == 1 else "negative" for label in labels
+                ]
+                scores = [
+                    round(float(probability), 2)
+                    for probability in probabilities[np.arange(len(labels)), labels]
+                ]
+                for (line, _), sentiment, score in zip(scored, sentiments, scores):
+                    results[line] = {"sentiment": sentiment, "probability": score}
+                if on_chunk is not None:
+                    await on_chunk(texts, sentiments, scores)
+
+        output = []
+        for line, record in pending:
+            result = {"line": line}
+            if "id" in record:
+                result["id"] = record["id"]
+            result.update(results.get(line) or {"error": record["error"]})
+            output.append(json.dumps(result))
+        pending.clear()
+        return ("\n".join(output) + "\n").encode("utf-8")
+
+    line = 0
+    async for record in records:
+        pending.append((line, record))
+        line += 1
+        if len(pending) >= chunk_size:
+            yield await flush()
+    if pending:
+        yield await flush()
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Gzip-compresses a stream of byte chunks incrementally.
+    Args:
+        chunks (AsyncIterator[bytes]): The uncompressed chunks.
+    Yields:
+        bytes: The compressed stream.
+    """
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        # Sync-flush every chunk so clients can decode results as they arrive
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+class RequestBodyStreamingResponse(StreamingResponse):
+    """
+    A StreamingResponse whose body is produced while the request body is still
+    being read.
+
+    The stock StreamingResponse listens for client disconnects by calling
+    `receive()` concurrently with the body iterator, which would steal the request
+    body chunks from it. Here the body iterator is the only consumer of `receive()`,
+    and a disconnect surfaces from `request.stream()` instead.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
@@ -5,6 +5,7 @@ In a 'development' environment, the model is saved locally.
 In a 'production' environment, the model is uploaded to an S3 bucket.
 """
 
+import argparse
 import os
 from pathlib import Path
 import pandas as pd
@@ -19,11 +20,18 @@ from src.core import (
     config,
     PROJECT_ROOT,
     upload_to_s3,
+    get_file_checksum,
+    save_review_scores,
 )
+from src.core.dataset import load_dataset
 from src.sklearn_training.utils.data_loader import download_kaggle_dataset
+from src.sklearn_training.utils.feature_cache import feature_cache
 
 pd.set_option("future.no_silent_downcasting", True)
 
+# Reviews scored per predict_proba call when precomputing the dataset's scores
+SCORING_CHUNK_SIZE = 10000
+
 
 def load_and_preprocess_data(data_path: Path) -> tuple[np.ndarray, np.ndarray]:
     """
@@ -34,11 +42,18 @@ def load_and_preprocess_data(data_path: Path) -> tuple[np.ndarray, np.ndarray]:
         A tuple containing the features (X) and labels (y).
     """
     logger.info(f"Loading dataset from {data_path}...")
-    df = pd.read_csv(data_path)
+    # Read from the columnar copy of the CSV, converted on first load
+    df = load_dataset(data_path, columns=["review", "sentiment"])
     logger.info(f"Dataset loaded successfully! Shape: {df.shape}")
 
     X = df["review"].values
-    y = df["sentiment"].replace({"negative": 0, "positive": 1}).astype(int).values
+    y = (
+        df["sentiment"]
+        .astype(str)
+        .replace({"negative": 0, "positive": 1})
+        .astype(int)
+        .values
+    )
     return X, y
 
 
@@ -52,69 +67,170 @@ def create_and_train_model_pipeline(X, y) -> Pipeline:
         The trained scikit-learn pipeline.
     """
     logger.info("Creating and training the model pipeline...")
-    pipeline = Pipeline(
-        [
-            ("tfidf", TfidfVectorizer(max_features=10000, stop_words="english")),
-            ("classifier", MultinomialNB()),
-        ]
+    # The features only depend on the data and the vectorizer settings, so they
+    # are reused across runs, and for scoring the training set below
+    vectorizer, features = feature_cache.fit_transform(
+        TfidfVectorizer(max_features=10000, stop_words="english"), X
     )
-    pipeline.fit(X, y)
+    classifier = MultinomialNB().fit(features, y)
+    pipeline = Pipeline([("tfidf", vectorizer), ("classifier", classifier)])
     logger.info("Model training completed!")
-    logger.info(f"Training accuracy: {pipeline.score(X, y):.4f}")
+    logger.info(f"Training accuracy: {classifier.score(features, y):.4f}")
     return pipeline
 
 
-def save_model(pipeline: Pipeline) -> None:
+def tune_model_pipeline(X, y) -> Pipeline:
+    """
+    Tune the vectorizer and classifier settings of the pipeline (see
+    `src.sklearn_training.utils.tuning`), and train the best candidate.
+    The report of every candidate is written to `training.tuning.report_path`.
+    Args:
+        X (np.ndarray): Features (reviews).
+        y (np.ndarray): Labels (sentiments).
+    Returns:
+        The trained scikit-learn pipeline of the winner.
+    """
+    # Only needed in tuning mode
+    from src.sklearn_training.utils.tuning import tune_pipeline
+
+    tuning_config = config["training"]["tuning"]
+    logger.info("Tuning the model pipeline...")
+    pipeline, report = tune_pipeline(X, y, tuning_config)
+    report_path = PROJECT_ROOT / tuning_config["report_path"]
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report.to_csv(report_path, index=False)
+    logger.info(
+        f"Tuning report saved to {report_path}. Top candidates:\n"
+        f"{report.head(10).to_string(index=False)}"
+    )
+    return pipeline
+
+
+def score_reviews(pipeline: Pipeline, reviews) -> np.ndarray:
+    """
+    Scores every review of the dataset with batch inference.
+    Args:
+        pipeline (Pipeline): The trained model pipeline.
+        reviews: The reviews, in dataset order, or an iterator of chunks of them
+            when the dataset is streamed.
+    Returns:
+        np.ndarray: The (n_reviews, 2) class probabilities.
+    """
+    if not hasattr(reviews, "__len__"):
+        logger.info("Precomputing predictions for the streamed reviews...")
+        return np.concatenate([pipeline.predict_proba(chunk) for chunk in reviews])
+
+    logger.info(f"Precomputing predictions for {len(reviews)} reviews...")
+    if len(pipeline) == 2:
+        # Reuses the training features when these are the reviews it was fitted on
+        features = feature_cache.transform(pipeline[0], reviews)
+        model = pipeline[-1]
+    else:
+        features, model = reviews, pipeline
+    return np.concatenate(
+        [
+            model.predict_proba(features[start : start + SCORING_CHUNK_SIZE])
+            for start in range(0, len(reviews), SCORING_CHUNK_SIZE)
+        ]
+    )
+
+
+def save_model(pipeline: Pipeline, reviews) -> None:
     """
-    Saves the trained model pipeline.
+    Saves the trained model pipeline together with its predictions for every
+    review of the dataset, so the two artifacts always match.
+
+    - In 'development', saves to the local file paths defined in config.
+    - In 'production', saves to temporary local files, uploads them to S3,
+      and then deletes the temporary files.
+
+    The scores are published before the model, so a server that picks up the new
+    model can already find the scores that belong to it.
 
-    - In 'development', saves to a local file path defined in config.
-    - In 'production', saves to a temporary local file, uploads it to S3,
-      and then deletes the temporary file.
+    Args:
+        pipeline (Pipeline): The trained model pipeline.
+        reviews: The reviews of the dataset, in file order, or an iterator of
+            chunks of them when the dataset is streamed.
     """
     env = config["env"]
     model_path_info = config["paths"]["model"]
+    scores_path_info = config["paths"]["review_scores"]
 
     if env == "production":
-        # Save to a temporary local file first for uploading
+        # Save to temporary local files first for uploading
         temp_dir = PROJECT_ROOT / "assets"
         temp_dir.mkdir(exist_ok=True)
         local_path = temp_dir / Path(model_path_info).name
-        logger.info(f"Saving model temporarily to {local_path} for S3 upload...")
-        joblib.dump(pipeline, local_path)
+        scores_path = temp_dir / Path(scores_path_info).name
+    else:
+        # In development, write next to the final paths and rename into place
+        local_path = PROJECT_ROOT / model_path_info
+        scores_path = PROJECT_ROOT / scores_path_info
+    temp_model_path = local_path.with_name(local_path.name + ".tmp")
+    temp_model_path.parent.mkdir(parents=True, exist_ok=True)
+
+    logger.info(f"Saving model to {temp_model_path}...")
+    joblib.dump(pipeline, temp_model_path)
+    model_checksum = get_file_checksum(temp_model_path)
+    save_review_scores(scores_path, score_reviews(pipeline, reviews), model_checksum)
+    logger.info(f"Review scores saved to {scores_path}")
 
+    if env == "production":
         # Upload to S3 and then clean up
-        s3_key = model_path_info
-        if upload_to_s3(local_path, s3_key):
-            logger.info(f"Removing temporary model file: {local_path}")
-            os.remove(local_path)
+        if upload_to_s3(scores_path, scores_path_info):
+            os.remove(scores_path)
+        if upload_to_s3(temp_model_path, model_path_info):
+            logger.info(f"Removing temporary model file: {temp_model_path}")
+            os.remove(temp_model_path)
     else:
-        # In development, save directly to the local path
-        local_path = PROJECT_ROOT / model_path_info
-        local_path.parent.mkdir(parents=True, exist_ok=True)
-        logger.info(f"Saving model locally to {local_path}...")
-        joblib.dump(pipeline, local_path)
+        # The rename is atomic, so the backend never loads a half-written model
+        os.replace(temp_model_path, local_path)
         file_size = local_path.stat().st_size / (1024 * 1024)
         logger.info(f"Model saved successfully! File size: {file_size:.2f} MB")
 
 
-def run_training():
+def run_training(mode: str | None = None):
     """
     Main entry point for the training process.
+    Args:
+        mode (str, optional): "fixed" trains the default pipeline, "tune"
+            searches its settings first, and "streaming" trains a hashing
+            pipeline out of core. Defaults to `training.mode` in config.
     """
-    logger.info("Starting IMDB Sentiment Analysis Model Training...")
+    mode = mode or config.get("training", {}).get("mode", "fixed")
+    logger.info(f"Starting IMDB Sentiment Analysis Model Training ({mode} mode)...")
     try:
         # Download the dataset (which also handles S3 upload in prod)
         local_data_path = download_kaggle_dataset()
 
-        # Load and preprocess the data from the local file
-        X_train, y_train = load_and_preprocess_data(local_data_path)
-
-        # Train the model
-        pipeline = create_and_train_model_pipeline(X_train, y_train)
+        if mode == "streaming":
+            # The dataset is never loaded as a whole, only streamed in chunks
+            from src.sklearn_training.utils.streaming import (
+                iter_review_chunks,
+                train_streaming_pipeline,
+            )
+
+            streaming_config = config["training"]["streaming"]
+            pipeline = train_streaming_pipeline(local_data_path, streaming_config)
+            reviews = (
+                chunk
+                for chunk, _ in iter_review_chunks(
+                    local_data_path, streaming_config.get("chunk_size", 10000)
+                )
+            )
+        else:
+            # Load and preprocess the data from the local file
+            X_train, y_train = load_and_preprocess_data(local_data_path)
+
+            # Train the model
+            if mode == "tune":
+                pipeline = tune_model_pipeline(X_train, y_train)
+            else:
+                pipeline = create_and_train_model_pipeline(X_train, y_train)
+            reviews = X_train
 
         # Save the model (which also handles S3 upload in prod)
-        save_model(pipeline)
+        save_model(pipeline, reviews)
 
         logger.info("Training process completed successfully!")
 
@@ -124,4 +240,6 @@ def run_training():
 
 
 if __name__ == "__main__":
-    run_training()
+    parser = argparse.ArgumentParser(description="Train the sentiment model.")
+    parser.add_argument("--mode", choices=["fixed", "tune", "streaming"], default=None)
+    run_training(parser.parse_args().mode)
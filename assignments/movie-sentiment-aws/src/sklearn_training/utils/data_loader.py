@@ -4,7 +4,6 @@ Module for downloading the training dataset and uploading it to S3.
 
 import shutil
 from pathlib import Path
-import kagglehub
 from src.core import logger, config, PROJECT_ROOT, upload_to_s3
 
 
@@ -17,6 +16,9 @@ def download_kaggle_dataset() -> Path:
     Returns:
         Path: The local path to the downloaded dataset file.
     """
+    # Only needed when the dataset is downloaded, and slow to import
+    import kagglehub
+
     try:
         dataset_path = config["kaggle"]["dataset_path"]
         dataset_name = config["kaggle"]["dataset_name"]
@@ -0,0 +1,197 @@
+"""
+Module for caching TF-IDF features across training runs.
+
+Fitting the vectorizer tokenizes every review, which dominates training time and
+does not depend on the classifier. The fitted vectorizer and the sparse
+document-term matrix of the dataset are stored on disk, keyed by the content of
+the dataset and the vectorizer's parameters:
+
+    <cache dir>/<key>/vectorizer.joblib
+    <cache dir>/<key>/features.npz
+    <cache dir>/<key>/meta.json
+
+Within a run, the matrix of the last fit is also kept in memory, so scoring the
+training set (accuracy, precomputed review scores) does not transform it again.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+import joblib
+import numpy as np
+import scipy.sparse as sp
+import sklearn
+from sklearn.base import clone
+from src.core import logger, config, PROJECT_ROOT
+
+
+def get_documents_hash(documents) -> str:
+    """
+    Args:
+        documents: The texts, in order.
+    Returns:
+        str: The SHA-256 of the texts.
+    """
+    digest = hashlib.sha256()
+    for document in documents:
+        digest.update(str(document).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def get_params_hash(vectorizer) -> str:
+    """
+    Args:
+        vectorizer: An unfitted scikit-learn vectorizer.
+    Returns:
+        str: The SHA-256 of its class, parameters and the scikit-learn version.
+    """
+    description = {
+        "class": f"{type(vectorizer).__module__}.{type(vectorizer).__qualname__}",
+        "params": vectorizer.get_params(),
+        "sklearn": sklearn.__version__,
+    }
+    encoded = json.dumps(description, sort_keys=True, default=repr)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class FeatureCache:
+    """
+    On-disk cache of fitted vectorizers and the feature matrices of the documents
+    they were fitted on.
+
+    Args:
+        cache_dir (Path): The directory the entries are stored in.
+        max_entries (int): Least recently used entries are removed beyond this
+            number.
+        enabled (bool): If False, features are always computed.
+    """
+
+    def __init__(self, cache_dir: Path, max_entries: int = 4, enabled: bool = True):
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.enabled = enabled
+        # (vectorizer, documents, matrix) of the last fit, compared by identity
+        self._last = None
+
+    def fit_transform(self, vectorizer, documents) -> tuple[object, sp.csr_matrix]:
+        """
+        Fits a vectorizer on documents and returns their feature matrix, from the
+        cache if the same vectorizer settings were fitted on the same documents
+        before.
+        Args:
+            vectorizer: An unfitted scikit-learn vectorizer. It is not modified.
+            documents: The texts.
+        Returns:
+            tuple: The fitted vectorizer and the (n_documents, n_features) matrix.
+        """
+        vectorizer = clone(vectorizer)
+        if not self.enabled:
+            matrix = vectorizer.fit_transform(documents)
+            self._last = (vectorizer, documents, matrix)
+            return vectorizer, matrix
+
+        start = time.perf_counter()
+        key = get_params_hash(vectorizer)[:16] + get_documents_hash(documents)[:16]
+        entry_dir = self.cache_dir / key
+        cached = self._load(entry_dir)
+        if cached is not None:
+            vectorizer, matrix, fit_seconds = cached
+            load_seconds = time.perf_counter() - start
+            logger.info(
+                f"Feature cache hit ({key}): loaded {matrix.shape[0]} rows in "
+                f"{load_seconds:.2f}s instead of fitting in {fit_seconds:.2f}s, "
+                f"saving {fit_seconds - load_seconds:.2f}s."
+            )
+        else:
+            start = time.perf_counter()
+            matrix = vectorizer.fit_transform(documents).tocsr()
+            fit_seconds = time.perf_counter() - start
+            logger.info(f"Fitted features in {fit_seconds:.2f}s (cache miss {key}).")
+            self._store(entry_dir, vectorizer, matrix, fit_seconds)
+        self._last = (vectorizer, documents, matrix)
+        return vectorizer, matrix
+
+    def transform(self, vectorizer, documents) -> sp.csr_matrix:
+        """
+        Returns the feature matrix of documents, reusing the matrix of the last
+        `fit_transform` if it was for this vectorizer and these documents.
+        Args:
+            vectorizer: A fitted scikit-learn vectorizer.
+            documents: The texts.
+        Returns:
+            sp.csr_matrix: The (n_documents, n_features) matrix.
+        """
+        if self._last is not None:
+            last_vectorizer, last_documents, matrix = self._last
+            if last_vectorizer is vectorizer and last_documents is documents:
+                return matrix
+        return vectorizer.transform(documents)
+
+    def _load(self, entry_dir: Path) -> tuple[object, sp.csr_matrix, float] | None:
+        """
+        Returns:
+            tuple | None: The cached vectorizer, matrix and the seconds the fit
+                took, or None on a miss.
+        """
+        meta_path = entry_dir / "meta.json"
+        if not meta_path.exists():
+            return None
+        try:
+            meta = json.loads(meta_path.read_text())
+            vectorizer = joblib.load(entry_dir / "vectorizer.joblib")
+            matrix = sp.load_npz(entry_dir / "features.npz").tocsr()
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable feature cache entry {entry_dir}: {e}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+        os.utime(meta_path)  # Marks the entry as recently used
+        return vectorizer, matrix, meta["fit_seconds"]
+
+    def _store(
+        self, entry_dir: Path, vectorizer, matrix: sp.csr_matrix, fit_seconds: float
+    ) -> None:
+        """
+        Writes an entry under a temporary name and renames it, so readers never
+        see a partial entry. Failures are logged, not raised.
+        """
+        temp_dir = entry_dir.with_name(f".{entry_dir.name}.{os.getpid()}.tmp")
+        try:
+            temp_dir.mkdir(parents=True, exist_ok=True)
+            joblib.dump(vectorizer, temp_dir / "vectorizer.joblib")
+            # Uncompressed, so loading is a plain read
+            sp.save_npz(temp_dir / "features.npz", matrix, compressed=False)
+            meta = {
+                "fit_seconds": fit_seconds,
+                "shape": list(matrix.shape),
+                "dtype": np.dtype(matrix.dtype).name,
+            }
+            (temp_dir / "meta.json").write_text(json.dumps(meta))
+            os.replace(temp_dir, entry_dir)
+        except OSError as e:
+            logger.warning(f"Failed to cache features in {entry_dir}: {e}")
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Removes the least recently used entries beyond `max_entries`."""
+        entries = sorted(
+            self.cache_dir.glob("*/meta.json"),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        for meta_path in entries[self.max_entries :]:
+            logger.info(f"Evicting feature cache entry {meta_path.parent.name}.")
+            shutil.rmtree(meta_path.parent, ignore_errors=True)
+
+
+cache_config = config.get("feature_cache", {})
+feature_cache = FeatureCache(
+    PROJECT_ROOT / cache_config.get("dir", "assets/cache/features"),
+    max_entries=cache_config.get("max_entries", 4),
+    enabled=cache_config.get("enabled", True),
+)
@@ -0,0 +1,127 @@
+"""
+Module for training the sentiment model out of core.
+
+The dataset is streamed from the CSV in chunks, so memory stays bounded however
+many reviews it has:
+- Reviews are featurized with a stateless `HashingVectorizer`, so there is no
+  vocabulary to fit or hold in memory.
+- With `idf` enabled, a first pass counts the document frequency of every hashed
+  feature, and the IDF weights are computed from those counts as
+  `TfidfTransformer` would.
+- A `MultinomialNB` classifier is updated chunk by chunk with `partial_fit`.
+
+The model is a regular scikit-learn pipeline (hashing, optional TF-IDF, Naive
+Bayes), so the backend loads and serves it like the default model.
+"""
+
+import time
+from typing import Iterator
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+from src.core import logger
+
+SENTIMENTS = ("negative", "positive")
+
+
+def iter_review_chunks(
+    data_path, chunk_size: int = 10000
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """
+    Streams a CSV dataset with "review" and "sentiment" columns in chunks of rows.
+    Args:
+        data_path (Path): The CSV dataset.
+        chunk_size (int): The number of reviews parsed at a time.
+    Yields:
+        tuple[np.ndarray, np.ndarray]: The reviews of a chunk and their labels
+            (0 for negative, 1 for positive), in file order.
+    """
+    # pandas parses the file incrementally, unlike pyarrow's streaming reader,
+    # which reads ahead as fast as it can and so buffers most of a large file
+    for chunk in pd.read_csv(
+        data_path, usecols=["review", "sentiment"], chunksize=chunk_size
+    ):
+        sentiments = chunk["sentiment"].astype(str).str.strip()
+        yield (
+            chunk["review"].to_numpy(dtype=object),
+            (sentiments == SENTIMENTS[1]).to_numpy(dtype=np.int8),
+        )
+
+
+def make_hashing_vectorizer(streaming_config: dict, idf: bool) -> HashingVectorizer:
+    """
+    Returns:
+        HashingVectorizer: Raw term counts when IDF weights are applied after it,
+            L2-normalized term frequencies otherwise.
+    """
+    return HashingVectorizer(
+        n_features=streaming_config.get("n_features", 2**18),
+        ngram_range=tuple(streaming_config.get("ngram_range", (1, 1))),
+        stop_words=streaming_config.get("stop_words", "english"),
+        # Naive Bayes needs non-negative features
+        alternate_sign=False,
+        norm=None if idf else "l2",
+    )
+
+
+def fit_streaming_idf(
+    vectorizer: HashingVectorizer, chunks: Iterator[tuple[np.ndarray, np.ndarray]]
+) -> np.ndarray:
+    """
+    Computes smoothed IDF weights, as `TfidfTransformer` does, from the document
+    frequencies of the hashed features counted one chunk at a time.
+    Returns:
+        np.ndarray: The IDF weight of every hashed feature.
+    """
+    document_frequency = np.zeros(vectorizer.n_features, dtype=np.int64)
+    n_documents = 0
+    for reviews, _ in chunks:
+        counts = vectorizer.transform(reviews).tocsr()
+        document_frequency += np.bincount(
+            counts.indices, minlength=vectorizer.n_features
+        )
+        n_documents += counts.shape[0]
+    return np.log((1 + n_documents) / (1 + document_frequency)) + 1
+
+
+def train_streaming_pipeline(data_path, streaming_config: dict) -> Pipeline:
+    """
+    Trains the hashing + Naive Bayes pipeline on a dataset streamed in chunks.
+    Args:
+        data_path (Path): The CSV dataset.
+        streaming_config (dict): The `training.streaming` settings of config.yaml.
+    Returns:
+        Pipeline: The trained pipeline.
+    """
+    chunk_size = streaming_config.get("chunk_size", 10000)
+    idf = streaming_config.get("idf", True)
+    vectorizer = make_hashing_vectorizer(streaming_config, idf)
+    steps = [("hashing", vectorizer)]
+
+    start = time.perf_counter()
+    if idf:
+        transformer = TfidfTransformer(
+            sublinear_tf=streaming_config.get("sublinear_tf", False)
+        )
+        transformer.idf_ = fit_streaming_idf(
+            vectorizer, iter_review_chunks(data_path, chunk_size)
+        )
+        steps.append(("tfidf", transformer))
+        logger.info(f"Computed streaming IDF in {time.perf_counter() - start:.2f}s.")
+
+    classifier = MultinomialNB(alpha=streaming_config.get("alpha", 1.0))
+    steps.append(("classifier", classifier))
+    pipeline = Pipeline(steps)
+    n_reviews = 0
+    for reviews, labels in iter_review_chunks(data_path, chunk_size):
+        # Every step before the classifier is already fitted or stateless
+        classifier.partial_fit(pipeline[:-1].transform(reviews), labels, classes=[0, 1])
+        n_reviews += len(reviews)
+        logger.info(f"Trained on {n_reviews} reviews...")
+    logger.info(
+        f"Streaming training on {n_reviews} reviews completed in "
+        f"{time.perf_counter() - start:.2f}s."
+    )
+    return pipeline
@@ -0,0 +1,399 @@
+"""
+Module for tuning the TF-IDF + Naive Bayes pipeline with successive halving.
+
+Tokenization dominates the cost of fitting a candidate, and only depends on the
+analyzer settings (n-gram range, stop words). So the reviews are tokenized once
+per analyzer setting into a term-count matrix, and the other settings are
+searched on top of it:
+- `TermSelector` applies the vocabulary settings (min_df, max_df, max_features)
+  by selecting columns.
+- `TfidfTransformer` applies the weighting settings (sublinear_tf).
+- `MultinomialNB` applies the smoothing (alpha).
+
+Each analyzer setting is searched with `HalvingGridSearchCV` over a held-out
+validation split, with the candidates fitted in parallel. The candidates that
+survive to the last halving iteration are then exported as regular
+`TfidfVectorizer` + `MultinomialNB` pipelines with a fixed vocabulary (no
+tokenization needed) to report their validation accuracy, inference latency and
+size, and the best one is refitted on all the data.
+"""
+
+import itertools
+import pickle
+import statistics
+import time
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.experimental import enable_halving_search_cv
+from sklearn.feature_extraction.text import (
+    CountVectorizer,
+    TfidfTransformer,
+    TfidfVectorizer,
+)
+from sklearn.model_selection import (
+    HalvingGridSearchCV,
+    PredefinedSplit,
+    train_test_split,
+)
+from sklearn.naive_bayes import MultinomialNB
+from sklearn.pipeline import Pipeline
+from src.core import logger
+
+# Searched parameter -> the step of the search pipeline it belongs to
+SEARCH_STEPS = {
+    "min_df": "select",
+    "max_df": "select",
+    "max_features": "select",
+    "sublinear_tf": "tfidf",
+    "alpha": "classifier",
+}
+ANALYZER_PARAMS = ["ngram_range", "stop_words"]
+
+
+class TermSelector(TransformerMixin, BaseEstimator):
+    """
+    Selects the columns of a term-count matrix that `CountVectorizer` would keep
+    with the same min_df, max_df and max_features, from the documents it is
+    fitted on.
+
+    Args:
+        min_df (int | float): Minimum document frequency (count or proportion).
+        max_df (int | float): Maximum document frequency (count or proportion).
+        max_features (int, optional): Keep only the most frequent terms.
+    """
+
+    def __init__(self, min_df=1, max_df=1.0, max_features=None):
+        self.min_df = min_df
+        self.max_df = max_df
+        self.max_features = max_features
+
+    def fit(self, X, y=None):
+        n_documents = X.shape[0]
+        document_frequency = np.bincount(X.indices, minlength=X.shape[1])
+        min_df = (
+            self.min_df if isinstance(self.min_df, int) else self.min_df * n_documents
+        )
+        max_df = (
+            self.max_df if isinstance(self.max_df, int) else self.max_df * n_documents
+        )
+        columns = np.flatnonzero(
+            (document_frequency >= max(min_df, 1)) & (document_frequency <= max_df)
+        )
+        if self.max_features is not None and len(columns) > self.max_features:
+            term_frequency = np.asarray(X[:, columns].sum(axis=0)).ravel()
+            top = np.argsort(-term_frequency, kind="stable")[: self.max_features]
+            columns = np.sort(columns[top])
+        self.columns_ = columns
+        return self
+
+    def transform(self, X):
+        return X[:, self.columns_]
+
+
+@dataclass
+class AnalyzerFeatures:
+    """The term counts of every review for one analyzer setting."""
+
+    params: dict
+    vocabulary: np.ndarray  # Column -> term
+    counts: sp.csr_matrix
+
+
+def tokenize(reviews, params: dict) -> AnalyzerFeatures:
+    """
+    Args:
+        reviews: The reviews.
+        params (dict): The analyzer settings ("ngram_range", "stop_words").
+    Returns:
+        AnalyzerFeatures: The term counts of every review.
+    """
+    start = time.perf_counter()
+    vectorizer = CountVectorizer(**params)
+    counts = vectorizer.fit_transform(reviews).tocsr()
+    logger.info(
+        f"Tokenized {counts.shape[0]} reviews with {params} into "
+        f"{counts.shape[1]} terms in {time.perf_counter() - start:.2f}s."
+    )
+    return AnalyzerFeatures(params, vectorizer.get_feature_names_out(), counts)
+
+
+def make_search_pipeline() -> Pipeline:
+    return Pipeline(
+        [
+            ("select", TermSelector()),
+            ("tfidf", TfidfTransformer()),
+            ("classifier", MultinomialNB()),
+        ]
+    )
+
+
+def make_vocabulary(features: AnalyzerFeatures, selector: TermSelector) -> dict:
+    """Returns the term -> column mapping of the columns a selector keeps."""
+    return {
+        term: index
+        for index, term in enumerate(features.vocabulary[selector.columns_].tolist())
+    }
+
+
+def export_pipeline(
+    features: AnalyzerFeatures,
+    search_pipeline: Pipeline,
+    vocabulary: dict | None = None,
+) -> Pipeline:
+    """
+    Converts a fitted search pipeline into a `TfidfVectorizer` + `MultinomialNB`
+    pipeline that scores raw texts, as trained by the default mode.
+    Args:
+        features (AnalyzerFeatures): The term counts it was fitted on.
+        search_pipeline (Pipeline): The fitted search pipeline.
+        vocabulary (dict, optional): The vocabulary of its selector, if already
+            built (see `make_vocabulary`).
+    Returns:
+        Pipeline: The servable pipeline.
+    """
+    selector, transformer, classifier = (step for _, step in search_pipeline.steps)
+    if vocabulary is None:
+        vocabulary = make_vocabulary(features, selector)
+    vectorizer = TfidfVectorizer(
+        **features.params,
+        vocabulary=vocabulary,
+        sublinear_tf=transformer.sublinear_tf,
+    )
+    vectorizer.vocabulary_ = vocabulary
+    vectorizer.fixed_vocabulary_ = True
+    vectorizer.idf_ = transformer.idf_
+    return Pipeline([("tfidf", vectorizer), ("classifier", classifier)])
+
+
+def get_model_size(model) -> int:
+    """
+    Returns the size of the model's (or a pipeline step's) artifact in bytes.
+    Measured with the C pickler, which is much faster than `joblib.dump` on large
+    vocabularies and writes about the same number of bytes.
+    """
+    return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def get_latency_ms(pipeline: Pipeline, texts) -> float:
+    """Returns the median time to score one text on its own, in milliseconds."""
+    timings = []
+    for text in texts:
+        start = time.perf_counter()
+        pipeline.predict_proba([text])
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def selection_of(params: dict) -> tuple:
+    """Returns the vocabulary (selector) settings of a candidate, as a sort key."""
+    return tuple(
+        sorted((name, value) for name, value in params.items() if "select" in name)
+    )
+
+
+def evaluate_selection(
+    features: AnalyzerFeatures,
+    selection: tuple,
+    candidates: list[dict],
+    split: tuple[np.ndarray, np.ndarray],
+    y: np.ndarray,
+    latency_texts: list[str],
+) -> list[dict]:
+    """
+    Evaluates the candidates that share one vocabulary selection, which is
+    selected once for all of them (see `evaluate_candidates`).
+    """
+    train_index, validation_index = split
+    train_counts = features.counts[train_index]
+    selector = TermSelector().set_params(
+        **{name.split("__")[1]: value for name, value in selection}
+    )
+    selector.fit(train_counts)
+    selected_train = selector.transform(train_counts)
+    selected_validation = selector.transform(features.counts[validation_index])
+    vocabulary = make_vocabulary(features, selector)
+    # The vectorizer, mostly its vocabulary, is the same for the whole group
+    vectorizer_bytes = None
+    rows = []
+    for params in candidates:
+        candidate = make_search_pipeline().set_params(**params)
+        candidate.steps[0] = ("select", selector)
+        candidate[1:].fit(selected_train, y[train_index])
+        exported = export_pipeline(features, candidate, vocabulary)
+        if vectorizer_bytes is None:
+            vectorizer_bytes = get_model_size(exported[0])
+        rows.append(
+            {
+                "params": params,
+                **{name.split("__")[1]: value for name, value in params.items()},
+                "validation_accuracy": candidate[1:].score(
+                    selected_validation, y[validation_index]
+                ),
+                "latency_ms": get_latency_ms(exported, latency_texts),
+                "model_bytes": vectorizer_bytes + get_model_size(exported[-1]),
+                "n_features": len(selector.columns_),
+            }
+        )
+    return rows
+
+
+def evaluate_candidates(
+    features: AnalyzerFeatures,
+    candidates: list[dict],
+    split: tuple[np.ndarray, np.ndarray],
+    y: np.ndarray,
+    latency_texts: list[str],
+    n_jobs: int | None = None,
+) -> list[dict]:
+    """
+    Fits every candidate on the whole training split and measures its validation
+    accuracy, inference latency and size. Candidates that only differ in their
+    weighting or smoothing share the vocabulary, so it is selected once for them,
+    and the vocabulary groups are evaluated in parallel.
+    Args:
+        features (AnalyzerFeatures): The term counts.
+        candidates (list[dict]): The search pipeline parameters of each candidate.
+        split (tuple): The training and validation row numbers.
+        y (np.ndarray): The labels.
+        latency_texts (list[str]): The texts scored to measure latency.
+        n_jobs (int, optional): The number of groups evaluated at once, as for
+            joblib.
+    Returns:
+        list[dict]: One row per candidate, with its "params".
+    """
+    groups = itertools.groupby(
+        sorted(candidates, key=lambda params: repr(selection_of(params))),
+        key=selection_of,
+    )
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(evaluate_selection)(
+            features, selection, list(group), split, y, latency_texts
+        )
+        for selection, group in groups
+    )
+    return [row for rows in results for row in rows]
+
+
+def rank(row: dict) -> tuple[float, float]:
+    """Returns the sort key of a report row: the most accurate, then the fastest,
+    candidate ranks highest."""
+    return (row["validation_accuracy"], -row["latency_ms"])
+
+
+def tune_pipeline(X, y, tuning_config: dict) -> tuple[Pipeline, pd.DataFrame]:
+    """
+    Searches the vectorizer and classifier settings of `tuning_config["param_grid"]`
+    and refits the candidate ranked first in the report on all the data.
+    Args:
+        X (np.ndarray): The reviews.
+        y (np.ndarray): The labels.
+        tuning_config (dict): The `training.tuning` settings of config.yaml.
+    Returns:
+        tuple: The refitted winner and the report, with one row per candidate of
+            the last halving iteration of every analyzer setting.
+    """
+    param_grid = tuning_config["param_grid"]
+    random_state = tuning_config.get("random_state", 42)
+    n_jobs = tuning_config.get("n_jobs", -1)
+    y = np.asarray(y)
+    train_index, validation_index = train_test_split(
+        np.arange(len(y)),
+        test_size=tuning_config.get("validation_fraction", 0.2),
+        stratify=y,
+        random_state=random_state,
+    )
+    # -1 marks the training rows, 0 the validation rows of the single split
+    test_fold = np.full(len(y), -1)
+    test_fold[validation_index] = 0
+    rng = np.random.default_rng(random_state)
+    latency_texts = [
+        X[index]
+        for index in rng.choice(
+            validation_index,
+            size=min(tuning_config.get("latency_samples", 200), len(validation_index)),
+            replace=False,
+        )
+    ]
+
+    search_grid = {
+        f"{SEARCH_STEPS[name]}__{name}": [
+            tuple(value) if isinstance(value, list) else value for value in values
+        ]
+        for name, values in param_grid.items()
+        if name in SEARCH_STEPS
+    }
+    analyzer_grid = [
+        dict(zip(ANALYZER_PARAMS, values))
+        for values in itertools.product(
+            *(
+                [tuple(v) if isinstance(v, list) else v for v in param_grid[name]]
+                for name in ANALYZER_PARAMS
+            )
+        )
+    ]
+
+    rows, best = [], None
+    for analyzer_params in analyzer_grid:
+        features = tokenize(X, analyzer_params)
+        search = HalvingGridSearchCV(
+            make_search_pipeline(),
+            search_grid,
+            cv=PredefinedSplit(test_fold),
+            factor=tuning_config.get("factor", 3),
+            n_jobs=n_jobs,
+            refit=False,
+            random_state=random_state,
+        )
+        start = time.perf_counter()
+        search.fit(features.counts, y)
+        logger.info(
+            f"Searched {len(search.cv_results_['params'])} fits for "
+            f"{analyzer_params} in {time.perf_counter() - start:.2f}s: best "
+            f"validation accuracy {search.best_score_:.4f} with {search.best_params_}."
+        )
+
+        results = search.cv_results_
+        # Only the candidates that survived to the last halving iteration are
+        # refitted on the whole training split and measured
+        last_iteration = max(results["iter"])
+        last_rows = {
+            tuple(sorted(params.items())): index
+            for index, params in enumerate(results["params"])
+            if results["iter"][index] == last_iteration
+        }
+        for row in evaluate_candidates(
+            features,
+            [results["params"][index] for index in last_rows.values()],
+            (train_index, validation_index),
+            y,
+            latency_texts,
+            n_jobs=n_jobs,
+        ):
+            params = row.pop("params")
+            index = last_rows[tuple(sorted(params.items()))]
+            rows.append(
+                {
+                    **analyzer_params,
+                    "halving_iteration": results["iter"][index],
+                    "halving_resources": results["n_resources"][index],
+                    **row,
+                }
+            )
+            # The winner is the report's top row; a strict comparison keeps the
+            # first of equally ranked rows, as the stable sort below does
+            if best is None or rank(rows[-1]) > rank(best[0]):
+                best = (rows[-1], features, params)
+
+    report = pd.DataFrame(rows).sort_values(
+        ["validation_accuracy", "latency_ms"], ascending=[False, True]
+    )
+    _, features, best_params = best
+    winner = make_search_pipeline().set_params(**best_params).fit(features.counts, y)
+    logger.info(
+        f"Tuning winner: {features.params | best_params}, refitted on {len(y)} reviews."
+    )
+    return export_pipeline(features, winner), report
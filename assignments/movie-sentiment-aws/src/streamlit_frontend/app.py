@@ -11,6 +11,8 @@ import streamlit as st
 from src.core import logger
 
 FASTAPI_BACKEND_URL = os.getenv("FASTAPI_BACKEND_URL", "http://localhost:8000")
+# Number of example reviews fetched per /example call and served from the session
+EXAMPLE_PREFETCH_COUNT = 10
 
 st.set_page_config(page_title="Movie Sentiment Analysis", layout="centered")
 logger.info("Streamlit frontend app started.")
@@ -24,6 +26,10 @@ if "probability" not in st.session_state:
     st.session_state.probability = None
 if "feedback_submitted" not in st.session_state:
     st.session_state.feedback_submitted = False
+if "example_reviews" not in st.session_state:
+    st.session_state.example_reviews = []
+if "example_prediction" not in st.session_state:
+    st.session_state.example_prediction = None
 
 
 def handle_feedback(is_correct: bool):
@@ -44,13 +50,22 @@ def handle_feedback(is_correct: bool):
                 "positive" if predicted_sentiment == "negative" else "negative"
             )
 
-        feedback_payload = {
-            "request_text": st.session_state.review_text,
-            "predicted_sentiment": predicted_sentiment,
-            "probability": probability,
-            "true_sentiment": true_sentiment,
-            "is_sentiment_correct": is_correct,
-        }
+        prediction_id = st.session_state.prediction_result.get("prediction_id")
+        if prediction_id:
+            # The backend already logged the prediction, so referencing it is enough
+            feedback_payload = {
+                "prediction_id": prediction_id,
+                "true_sentiment": true_sentiment,
+                "is_sentiment_correct": is_correct,
+            }
+        else:
+            feedback_payload = {
+                "request_text": st.session_state.review_text,
+                "predicted_sentiment": predicted_sentiment,
+                "probability": probability,
+                "true_sentiment": true_sentiment,
+                "is_sentiment_correct": is_correct,
+            }
         try:
             logger.info(f"Submitting feedback: {feedback_payload}")
             requests.post(
@@ -74,10 +89,27 @@ st.subheader("Don't know what to write?")
 if st.button("Get a Random Review Example"):
     logger.info("'Get a Random Review Example' button clicked.")
     try:
-        response = requests.get(f"{FASTAPI_BACKEND_URL}/example")
-        response.raise_for_status()
-        example_review = response.json().get("review", "")
-        st.session_state.review_text = example_review
+        # Prefetch a batch of examples so most clicks need no backend round trip
+        if not st.session_state.example_reviews:
+            response = requests.get(
+                f"{FASTAPI_BACKEND_URL}/example",
+                params={"count": EXAMPLE_PREFETCH_COUNT},
+            )
+            response.raise_for_status()
+            st.session_state.example_reviews = response.json().get("examples", [])
+        example = st.session_state.example_reviews.pop()
+        st.session_state.review_text = example["review"]
+        # Keep the backend's precomputed score so analyzing the unedited example
+        # needs no second round trip
+        st.session_state.example_prediction = (
+            {
+                "text": example["review"],
+                "sentiment": example["predicted_sentiment"],
+                "probability": example["probability"],
+            }
+            if example.get("predicted_sentiment")
+            else None
+        )
         st.session_state.prediction_result = None
         st.session_state.feedback_submitted = False
         logger.info("Successfully fetched random review example.")
@@ -100,6 +132,20 @@ if st.button("Analyze Sentiment"):
     if not st.session_state.review_text:
         st.warning("Please enter a review before analyzing.")
         logger.warning("Analyze sentiment called with no review text.")
+    elif (
+        st.session_state.example_prediction
+        and st.session_state.example_prediction["text"] == st.session_state.review_text
+    ):
+        prediction = st.session_state.example_prediction
+        st.session_state.prediction_result = {
+            "sentiment": prediction["sentiment"],
+            "probability": prediction["probability"],
+        }
+        st.session_state.feedback_submitted = False
+        logger.info(
+            f"Using precomputed prediction for example review: "
+            f"{st.session_state.prediction_result}"
+        )
     else:
         try:
             with st.spinner("Analyzing..."):
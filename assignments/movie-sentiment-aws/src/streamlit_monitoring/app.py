@@ -2,9 +2,9 @@ import streamlit as st
 import pandas as pd
 import altair as alt
 from src.streamlit_monitoring.utils.data_loader import (
-    load_feedback_logs,
+    load_feedback_frame,
     load_imdb_dataset,
-    load_all_logs,
+    load_log_frame,
 )
 from src.core import logger
 
@@ -21,20 +21,21 @@ if st.button("🔄 Refresh Data"):
 def load_data():
     try:
         logger.info("Loading all logs, feedback logs, and IMDB dataset.")
-        all_logs = load_all_logs()
-        feedback_logs = load_feedback_logs()
+        # Only the columns the dashboard needs are loaded
+        log_df = load_log_frame(["text_length", "predicted_sentiment"])
+        feedback_df = load_feedback_frame()
         imdb_df = load_imdb_dataset()
         logger.info("Data loading complete.")
-        return all_logs, feedback_logs, imdb_df
+        return log_df, feedback_df, imdb_df
     except Exception as e:
         logger.exception(f"Failed to load data for monitoring dashboard: {e}")
         st.error(f"Failed to load data: {e}")
-        return [], [], pd.DataFrame()
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
 
 
-all_logs, feedback_logs, imdb_df = load_data()
+log_df, feedback_df, imdb_df = load_data()
 
-if not feedback_logs:
+if feedback_df.empty:
     st.warning(
         "No feedback data found. Please add some feedback to see the monitoring dashboard."
     )
@@ -43,8 +44,8 @@ else:
     st.header("Data Drift Analysis")
 
     # Data Drift Analysis
-    imdb_sentence_lengths = imdb_df["review"].str.len()
-    log_sentence_lengths = [len(log["request_text"]) for log in all_logs]
+    imdb_sentence_lengths = imdb_df["review_length"]
+    log_sentence_lengths = log_df["text_length"].dropna().astype(int).tolist()
 
     source = pd.DataFrame(
         {
@@ -96,10 +97,7 @@ else:
     st.altair_chart(imdb_chart, use_container_width=True)
 
     st.subheader("Inference Logs Sentiment Distribution")
-    log_sentiments = pd.DataFrame(
-        [log["predicted_sentiment"] for log in all_logs], columns=["Sentiment"]
-    )
-    log_sentiments = log_sentiments["Sentiment"].value_counts().reset_index()
+    log_sentiments = log_df["predicted_sentiment"].value_counts().reset_index()
     log_sentiments.columns = ["Sentiment", "Count"]
     log_sentiments["Percentage"] = (
         log_sentiments["Count"] / log_sentiments["Count"].sum()
@@ -127,8 +125,8 @@ else:
     st.header("Model Accuracy & User Feedback")
 
     # Model Accuracy & User Feedback
-    true_sentiments = [log["true_sentiment"] for log in feedback_logs]
-    predicted_sentiments = [log["predicted_sentiment"] for log in feedback_logs]
+    true_sentiments = feedback_df["true_sentiment"].tolist()
+    predicted_sentiments = feedback_df["predicted_sentiment"].tolist()
 
     from sklearn.metrics import accuracy_score, precision_score
 
@@ -156,4 +154,4 @@ else:
         )
         logger.info(f"Model precision is {precision:.2f}.")
     st.header("Raw Feedback Data")
-    st.dataframe(pd.DataFrame(feedback_logs))
+    st.dataframe(feedback_df)
@@ -3,20 +3,32 @@ import json
 import os
 from pathlib import Path
 from src.core import get_asset_path, config, logger
-from src.core.aws import download_from_s3
+from src.core.aws import S3TailReader, download_from_s3, list_s3_objects
+
+FEEDBACK_ENDPOINTS = ["/true_sentiment", "/true_sentiment_batch"]
+# Prediction fields that ID-only feedback records are joined with
+PREDICTION_FIELDS = [
+    "request_text",
+    "text_length",
+    "predicted_sentiment",
+    "probability",
+]
 
 
 def load_imdb_dataset() -> pd.DataFrame:
     """
-    Loads the IMDB dataset.
+    Loads the review lengths and sentiments of the IMDB dataset, from its columnar
+    copy (see `src.core.dataset`).
     Uses get_asset_path to be environment-aware (local vs. S3).
     Returns:
-        pd.DataFrame: The loaded IMDB dataset.
+        pd.DataFrame: The "review_length" and "sentiment" of every review.
     """
     try:
         logger.info("Attempting to load IMDB dataset...")
+        from src.core.dataset import load_dataset
+
         data_path = get_asset_path("data")
-        df = pd.read_csv(data_path)
+        df = load_dataset(data_path, columns=["review_length", "sentiment"])
         logger.info("IMDB dataset loaded successfully.")
         return df
     except Exception as e:
@@ -24,6 +36,109 @@ def load_imdb_dataset() -> pd.DataFrame:
         return pd.DataFrame()
 
 
+def read_json_lines(path: Path) -> list:
+    """
+    Reads a JSON-lines log file, skipping lines that cannot be parsed.
+    Args:
+        path (Path): The log file.
+    Returns:
+        list: The parsed log records.
+    """
+    logs = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    logs.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed log line in {path}.")
+    except Exception as e:
+        logger.error(f"Error reading log file {path}: {e}")
+    return logs
+
+
+def expand_batch_logs(logs: list) -> list:
+    """
+    Expands batch prediction logs (one record per batch) into one record per text,
+    and batched feedback logs into one record per feedback, so that batch and
+    single records can be analyzed together.
+    Args:
+        logs (list): The raw log records.
+    Returns:
+        list: The log records with every batch record expanded.
+    """
+    expanded = []
+    for log in logs:
+        if "feedback" in log:
+            for feedback in log["feedback"]:
+                expanded.append(
+                    {
+                        "timestamp": log.get("timestamp"),
+                        "endpoint": log.get("endpoint"),
+                        **feedback,
+                    }
+                )
+            continue
+        if "predicted_sentiments" not in log:
+            expanded.append(log)
+            continue
+        count = len(log["predicted_sentiments"])
+        # Redacted batches (see PayloadPolicy) log hashes, lengths and prefixes
+        # in place of the texts
+        item_fields = {
+            "request_text": log.get("request_texts"),
+            "text_hash": log.get("text_hashes"),
+            "text_length": log.get("text_lengths"),
+            "request_text_prefix": log.get("request_text_prefixes"),
+            "predicted_sentiment": log["predicted_sentiments"],
+            "probability": log.get("probabilities"),
+            "prediction_id": log.get("prediction_ids"),
+        }
+        item_fields = {field: values for field, values in item_fields.items() if values}
+        for index in range(count):
+            record = {
+                "timestamp": log.get("timestamp"),
+                "endpoint": log.get("endpoint"),
+            }
+            for field, values in item_fields.items():
+                if values[index] is not None:
+                    record[field] = values[index]
+            expanded.append(record)
+    return expanded
+
+
+# The legacy log object only grows, so each dashboard refresh reads only the bytes
+# appended since the previous one and adds them to the logs parsed so far
+legacy_log_tails: dict[tuple[str, str], S3TailReader] = {}
+legacy_logs: dict[tuple[str, str], list] = {}
+
+
+def load_legacy_logs(bucket: str, key: str) -> list:
+    """
+    Loads the logs of an append-style S3 log object, reading only new lines.
+    Args:
+        bucket (str): The S3 bucket name.
+        key (str): The key of the log object.
+    Returns:
+        list: All log records of the object.
+    """
+    tail = legacy_log_tails.setdefault((bucket, key), S3TailReader(bucket, key))
+    try:
+        lines, replaced = tail.read_new_lines()
+    except Exception as e:
+        logger.error(f"Error reading s3://{bucket}/{key}: {e}")
+        lines, replaced = [], False
+    logs = legacy_logs.setdefault((bucket, key), [])
+    if replaced:
+        logs.clear()
+    for line in lines:
+        try:
+            logs.append(json.loads(line))
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping malformed log line in s3://{bucket}/{key}.")
+    return list(logs)
+
+
 def load_all_logs() -> list:
     """
     Loads all logs from the prediction log file.
@@ -44,7 +159,7 @@ def load_all_logs() -> list:
 
         if os.path.exists(log_file):
             try:
-                with open(log_file, "r") as f:
+                with open(log_file, "r", encoding="utf-8") as f:
                     logs = [json.loads(line) for line in f]
                 logger.info(f"Loaded {len(logs)} logs from {log_file}.")
             except Exception as e:
@@ -54,46 +169,141 @@ def load_all_logs() -> list:
 
     elif env == "production":
         log_config = config.get("prediction_logging", {})
+        s3_prefix = log_config.get("prefix")
         s3_key = log_config.get("key")
         bucket_name = os.getenv("S3_BUCKET_NAME")
 
-        if not s3_key or not bucket_name:
-            logger.error("S3 bucket name or key not configured for production.")
+        if not bucket_name or not (s3_prefix or s3_key):
+            logger.error(
+                "S3 bucket name or log location not configured for production."
+            )
             return logs
 
-        # Define a local path to download the S3 file
-        local_log_path = (
-            Path(config["project_root"]) / "assets" / "logs" / "prediction_logs_s3.json"
-        )
-        local_log_path.parent.mkdir(parents=True, exist_ok=True)
+        local_log_dir = Path(config["project_root"]) / "assets" / "logs"
+        local_log_dir.mkdir(parents=True, exist_ok=True)
 
-        if download_from_s3(
-            bucket_name, s3_key, local_log_path, needs_full_download=True
-        ):
-            if local_log_path.exists():
-                try:
-                    with open(local_log_path, "r") as f:
-                        logs = [json.loads(line) for line in f]
-                    logger.info(f"Loaded {len(logs)} logs from S3.")
-                except Exception as e:
-                    logger.error(f"Error reading or parsing log file from S3: {e}")
-        else:
-            logger.warning("Could not download logs from S3. File might not exist yet.")
+        # Logs written before batched shipping live in a single object
+        if s3_key:
+            logs.extend(load_legacy_logs(bucket_name, s3_key))
 
-    return logs
+        # Batched logs are immutable part objects, so each one is downloaded once
+        # and read from the local copy afterwards
+        if s3_prefix:
+            parts = list_s3_objects(bucket_name, s3_prefix)
+            for part in parts:
+                local_part_path = local_log_dir / "s3_parts" / part["key"]
+                if local_part_path.exists() or download_from_s3(
+                    bucket_name, part["key"], local_part_path
+                ):
+                    logs.extend(read_json_lines(local_part_path))
+            logger.info(f"Loaded logs from {len(parts)} S3 log parts.")
+
+        logger.info(f"Loaded {len(logs)} logs from S3.")
+
+    return expand_batch_logs(logs)
 
 
 def load_feedback_logs() -> list:
     """
-    Filters all logs to return only those with feedback.
+    Filters all logs to return only those with feedback. Feedback that references
+    a prediction ID is joined with the text, sentiment and probability of that
+    prediction.
     Returns:
         list: A list of feedback logs.
     """
     all_logs = load_all_logs()
-    feedback_logs = [
-        log
+    predictions = {
+        log["prediction_id"]: log
         for log in all_logs
-        if log.get("endpoint") == "/true_sentiment" and "true_sentiment" in log
-    ]
+        if "prediction_id" in log and log.get("endpoint") not in FEEDBACK_ENDPOINTS
+    }
+    feedback_logs = []
+    unmatched = 0
+    for log in all_logs:
+        if log.get("endpoint") not in FEEDBACK_ENDPOINTS or "true_sentiment" not in log:
+            continue
+        prediction = predictions.get(log.get("prediction_id"), {})
+        feedback = {
+            **{
+                field: prediction[field]
+                for field in PREDICTION_FIELDS
+                if field in prediction
+            },
+            **log,
+        }
+        if "predicted_sentiment" not in feedback:
+            unmatched += 1
+            continue
+        feedback_logs.append(feedback)
+    if unmatched:
+        logger.warning(
+            f"Skipped {unmatched} feedback logs without a matching prediction."
+        )
     logger.info(f"Found {len(feedback_logs)} feedback logs.")
     return feedback_logs
+
+
+def get_log_store(config: dict):
+    """
+    Returns the Parquet log store if it is enabled (see `src.core.log_store`).
+    pyarrow is only imported when it is.
+    """
+    if not config.get("prediction_logging", {}).get("parquet", {}).get("enabled"):
+        return None
+    from src.core.log_store import get_log_store as build_log_store
+
+    return build_log_store(config)
+
+
+def load_log_frame(columns: list[str]) -> pd.DataFrame:
+    """
+    Loads selected columns of all prediction logs. When the Parquet log store is
+    enabled, only those columns are read; otherwise they are derived from the
+    JSON logs.
+    Args:
+        columns (list[str]): The log store columns to load, e.g. "text_length".
+    Returns:
+        pd.DataFrame: One row per prediction or feedback record.
+    """
+    store = get_log_store(config)
+    if store is not None:
+        df = store.read(columns=columns)
+        logger.info(f"Loaded {len(df)} logs from the log store.")
+        return df
+    df = pd.DataFrame(load_all_logs())
+    # Redacted records log their text length; the others are measured here
+    if "text_length" in columns and "request_text" in df:
+        measured = df["request_text"].str.len()
+        df["text_length"] = (
+            df["text_length"].fillna(measured) if "text_length" in df else measured
+        )
+    return df.reindex(columns=columns)
+
+
+def load_feedback_frame() -> pd.DataFrame:
+    """
+    Loads the feedback logs, reading only the feedback partitions of the Parquet
+    log store when it is enabled.
+    Returns:
+        pd.DataFrame: One row per feedback record.
+    """
+    store = get_log_store(config)
+    if store is not None:
+        df = store.read(endpoints=FEEDBACK_ENDPOINTS)
+        df = df[df["true_sentiment"].notna()]
+        # Join ID-only feedback with the prediction it refers to
+        joined = ["predicted_sentiment", "probability", "text_length", "text_hash"]
+        predictions = store.read(columns=["endpoint", "prediction_id", *joined])
+        predictions = predictions[
+            predictions["prediction_id"].notna()
+            & ~predictions["endpoint"].isin(FEEDBACK_ENDPOINTS)
+        ].drop(columns="endpoint")
+        df = df.merge(
+            predictions, on="prediction_id", how="left", suffixes=("", "_prediction")
+        )
+        for column in joined:
+            df[column] = df[column].fillna(df.pop(f"{column}_prediction"))
+        df = df[df["predicted_sentiment"].notna()]
+        logger.info(f"Found {len(df)} feedback logs.")
+        return df
+    return pd.DataFrame(load_feedback_logs())
@@ -25,7 +25,12 @@ def mock_get_asset_path():
     """
     Fixture to mock get_asset_path function to avoid file system access during tests.
     """
+    from src.core import asset_resolution
+
+    original = asset_resolution.get_asset_path
     with patch("src.core.asset_resolution.get_asset_path") as mock:
+        # For tests of the real function
+        mock.original = original
         # Return a dummy path. The path doesn't have to exist because
         # the functions that use it (like loading a model or data)
         # should also be mocked in the tests where they are used
@@ -33,6 +38,16 @@ def mock_get_asset_path():
         yield mock
 
 
+@pytest.fixture(autouse=True)
+def dataset_cache_dir(tmp_path):
+    """
+    Fixture to keep the columnar dataset copies made during tests out of the
+    project's cache directory.
+    """
+    with patch("src.core.dataset.CACHE_DIR", tmp_path / "datasets"):
+        yield tmp_path / "datasets"
+
+
 @pytest.fixture(autouse=True)
 def mock_streamlit():
     """
@@ -99,12 +114,11 @@ def app(mock_model):
     Args:
         mock_model: Mock model to use in the app
     """
-    with patch(
-        "src.fastapi_backend.utils.model_loader.load_model", return_value=mock_model
-    ):
-        from src.fastapi_backend.main import app
+    from src.fastapi_backend.main import app
+    from src.fastapi_backend.utils.model_loader import model_manager
 
-        return app
+    model_manager.swap(mock_model, version="mock-version")
+    return app
 
 
 @pytest.fixture
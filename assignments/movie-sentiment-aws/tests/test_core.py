@@ -0,0 +1,457 @@
+import logging
+import json
+from unittest.mock import MagicMock, patch
+
+
+def make_record(message: dict) -> logging.LogRecord:
+    return logging.LogRecord(
+        "prediction_logger", logging.INFO, "", 0, message, None, None
+    )
+
+
+def test_s3_batch_handler_ships_time_partitioned_parts():
+    """Test that buffered records are shipped as one part per flush"""
+    from src.core.logging_config import S3BatchHandler, JsonFormatter
+
+    written = {}
+    with patch(
+        "src.core.aws.put_s3_object",
+        side_effect=lambda bucket, key, body: written.update({key: body}) or True,
+    ):
+        handler = S3BatchHandler(
+            bucket="bucket",
+            prefix="logs/predictions/",
+            max_records=3,
+            flush_interval=3600,
+        )
+        handler.setFormatter(JsonFormatter())
+        for i in range(2):
+            handler.handle(make_record({"request_text": f"review {i}"}))
+        # Below the thresholds nothing is shipped until the handler is closed
+        assert written == {}
+        handler.close()
+
+    assert len(written) == 1
+    key, body = next(iter(written.items()))
+    assert key.startswith("logs/predictions/date=")
+    assert "/hour=" in key and key.endswith(".jsonl")
+    lines = body.decode().splitlines()
+    assert [json.loads(line)["request_text"] for line in lines] == [
+        "review 0",
+        "review 1",
+    ]
+
+
+def test_s3_batch_handler_keeps_records_when_upload_fails():
+    """Test that a failed upload keeps the records for the next flush"""
+    from src.core.logging_config import S3BatchHandler
+
+    with patch("src.core.aws.put_s3_object", return_value=False) as mock_put:
+        handler = S3BatchHandler(bucket="bucket", prefix="logs", flush_interval=3600)
+        handler.handle(make_record({"request_text": "kept"}))
+        handler.flush()
+        assert mock_put.call_count == 1
+        assert handler.parts_written == 0
+
+    with patch("src.core.aws.put_s3_object", return_value=True) as mock_put:
+        handler.close()
+        body = mock_put.call_args.args[2]
+        assert b"kept" in body
+        assert handler.parts_written == 1
+
+
+def test_async_logging_overflow_policies():
+    """Test that the async logging queue drops or samples records when full"""
+    import threading
+    from src.core.base_logger import AsyncQueueHandler
+
+    class GatedHandler(logging.Handler):
+        """Blocks the listener until released, so the queue fills up."""
+
+        def __init__(self):
+            super().__init__()
+            self.gate = threading.Event()
+            self.messages = []
+
+        def emit(self, record):
+            self.gate.wait()
+            self.messages.append(record.getMessage())
+
+    for overflow, sample_rate in (("drop", 0.0), ("sample", 0.0)):
+        target = GatedHandler()
+        handler = AsyncQueueHandler(
+            [target], queue_size=4, overflow=overflow, sample_rate=sample_rate
+        )
+        for i in range(20):
+            handler.handle(make_record(f"record {i}"))
+        stats = handler.stats()
+        assert stats["queue_depth"] <= 4
+        if overflow == "drop":
+            assert stats["dropped"] > 0 and stats["sampled_out"] == 0
+        else:
+            assert stats["sampled_out"] > 0
+
+        target.gate.set()
+        handler.flush()
+        assert len(target.messages) + handler.dropped + handler.sampled_out == 20
+        handler.stop()
+
+
+def test_async_logging_keeps_json_payloads():
+    """Test that records are formatted by the listener with their original message"""
+    from src.core.base_logger import AsyncQueueHandler
+    from src.core.logging_config import JsonFormatter
+
+    class ListHandler(logging.Handler):
+        def __init__(self):
+            super().__init__()
+            self.lines = []
+
+        def emit(self, record):
+            self.lines.append(self.format(record))
+
+    target = ListHandler()
+    target.setFormatter(JsonFormatter())
+    handler = AsyncQueueHandler([target], queue_size=10, overflow="block")
+    handler.handle(
+        make_record({"endpoint": "/predict", "predicted_sentiment": "positive"})
+    )
+    handler.flush()
+    handler.stop()
+    assert json.loads(target.lines[0])["predicted_sentiment"] == "positive"
+
+
+def test_parquet_log_store_partitions_reads_and_compacts(tmp_path):
+    """Test that prediction logs are written as partitioned Parquet segments,
+    read selectively and compacted"""
+    from datetime import datetime, timezone
+    from src.core.log_store import LogStore, ParquetLogHandler
+
+    store = LogStore(path=tmp_path)
+    handler = ParquetLogHandler(store, max_records=1000, flush_interval=3600)
+    for _ in range(2):
+        handler.handle(
+            make_record(
+                {
+                    "endpoint": "/predict_proba_batch",
+                    "request_texts": ["Great!", "Awful film"],
+                    "predicted_sentiments": ["positive", "negative"],
+                    "probabilities": [0.9, 0.8],
+                    "model_version": "v1",
+                }
+            )
+        )
+        handler.handle(
+            make_record(
+                {
+                    "endpoint": "/true_sentiment",
+                    "request_text": "Great!",
+                    "predicted_sentiment": "positive",
+                    "probability": 0.9,
+                    "true_sentiment": "negative",
+                }
+            )
+        )
+        # One segment per partition and flush
+        handler.flush()
+    handler.close()
+
+    segments = store.list_segments()
+    assert len(segments) == 4
+    assert all("/endpoint=" in name and "hour=" in name for name in segments)
+
+    lengths = store.read(columns=["text_length"])
+    assert list(lengths.columns) == ["text_length"]
+    assert sorted(lengths["text_length"]) == [6, 6, 6, 6, 10, 10]
+
+    feedback = store.read(endpoints=["/true_sentiment"])
+    assert feedback["true_sentiment"].tolist() == ["negative", "negative"]
+    assert feedback["text_hash"].nunique() == 1
+
+    # The current hour is left alone, earlier hours are merged per partition
+    assert store.compact(before=datetime(2000, 1, 1, tzinfo=timezone.utc)) == 0
+    assert store.compact(before=datetime(2999, 1, 1, tzinfo=timezone.utc)) == 4
+    assert len(store.list_segments()) == 2
+    assert len(store.read(columns=["endpoint"])) == 6
+
+
+def test_payload_policy_redacts_unsampled_texts():
+    """Test that unsampled records keep a hash, length and prefix of their text,
+    that feedback keeps its full text and that the store reads both"""
+    from src.core.logging_config import PayloadPolicy, text_hash
+    from src.core.log_store import rows_from_log
+
+    policy = PayloadPolicy(
+        full_text_sample_rate=0.0,
+        prefix_chars=5,
+        full_text_endpoints=["/true_sentiment"],
+    )
+    single = {"endpoint": "/predict", "request_text": "Great movie!"}
+    batch = {
+        "endpoint": "/predict_batch",
+        "request_texts": ["Great movie!", "Awful"],
+        "predicted_sentiments": ["positive", "negative"],
+    }
+    feedback = {"endpoint": "/true_sentiment", "request_text": "Great movie!"}
+
+    record = make_record(single)
+    assert policy.filter(record)
+    assert record.msg == {
+        "endpoint": "/predict",
+        "text_hash": text_hash("Great movie!"),
+        "text_length": 12,
+        "request_text_prefix": "Great",
+    }
+    assert single["request_text"] == "Great movie!"
+
+    redacted_batch = policy.apply(batch)
+    assert "request_texts" not in redacted_batch
+    assert redacted_batch["text_lengths"] == [12, 5]
+    assert redacted_batch["request_text_prefixes"] == ["Great", "Awful"]
+    assert policy.apply(feedback) is feedback
+    assert PayloadPolicy(full_text_sample_rate=1.0).apply(single) is single
+
+    rows = rows_from_log(redacted_batch, 0) + rows_from_log(single, 0)
+    assert [row["text_length"] for row in rows] == [12, 5, 12]
+    assert rows[0]["text_hash"] == rows[2]["text_hash"]
+
+
+def test_fast_json_formatter_matches_json_formatter():
+    """Test that the fast formatter produces the same JSON objects with every
+    backend, including timestamps within and across seconds. The text may differ
+    (orjson is compact and does not escape non-ASCII), so outputs are parsed"""
+    from src.core.logging_config import FastJsonFormatter, JsonFormatter, orjson
+
+    backends = ["json"] + (["orjson"] if orjson is not None else [])
+    records = []
+    for created in (1700000000.125, 1700000000.999, 1700000001.5):
+        for message in ({"request_text": "Très bien", "probability": 0.9}, "plain"):
+            record = make_record(message)
+            record.created = created
+            record.msecs = int((created - int(created)) * 1000) + 0.0
+            records.append(record)
+    records.append(make_record({1: "non-string key"}))
+    records.append(
+        make_record({"probabilities": [0.1, 1e-07, 1 / 3], "tags": {"é": None}})
+    )
+
+    expected = [json.loads(JsonFormatter().format(record)) for record in records]
+    for backend in backends:
+        formatter = FastJsonFormatter(json_backend=backend)
+        assert [json.loads(formatter.format(r)) for r in records] == expected
+
+
+def test_s3_client_is_shared_across_threads():
+    """Test that every thread gets the same, lazily created S3 client"""
+    from concurrent.futures import ThreadPoolExecutor
+    from src.core import aws
+
+    with (
+        patch.object(aws, "_client", None),
+        patch("boto3.session.Session") as mock_session,
+    ):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            clients = list(pool.map(lambda _: aws.get_s3_client(), range(32)))
+    assert mock_session.call_count == 1
+    assert all(client is clients[0] for client in clients)
+    client_config = mock_session.return_value.client.call_args.kwargs["config"]
+    assert client_config.retries["mode"] == "adaptive"
+
+
+def test_s3_circuit_breaker_fails_fast_and_recovers():
+    """Test that repeated S3 outages open the circuit, which closes again after a
+    successful trial call"""
+    from botocore.exceptions import ClientError, EndpointConnectionError
+    from src.core import aws
+
+    breaker = aws.CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    client = MagicMock()
+    client.put_object.side_effect = EndpointConnectionError(endpoint_url="s3")
+    client.head_object.side_effect = ClientError(
+        {"Error": {"Code": "404"}, "ResponseMetadata": {"HTTPStatusCode": 404}},
+        "HeadObject",
+    )
+    with (
+        patch.object(aws, "circuit_breaker", breaker),
+        patch.object(aws, "get_s3_client", return_value=client),
+        patch.object(aws.time, "monotonic", return_value=1000.0) as clock,
+    ):
+        # Missing objects are not outages
+        assert aws.head_s3_object("bucket", "missing") is None
+        assert breaker.state == "closed"
+
+        assert not aws.put_s3_object("bucket", "key", b"")
+        assert not aws.put_s3_object("bucket", "key", b"")
+        assert breaker.state == "open"
+        assert not aws.put_s3_object("bucket", "key", b"")
+        assert client.put_object.call_count == 2
+
+        clock.return_value = 1061.0
+        assert breaker.state == "half-open"
+        # A 404 proves nothing either way: the next call is still a trial
+        assert aws.head_s3_object("bucket", "missing") is None
+        assert breaker.state == "half-open"
+        client.put_object.side_effect = None
+        assert aws.put_s3_object("bucket", "key", b"")
+        assert breaker.state == "closed"
+
+
+def test_s3_circuit_breaker_sees_through_transfer_errors():
+    """Test that outages wrapped by managed transfers count as failures, while
+    other errors leave the failure count alone"""
+    from boto3.exceptions import S3UploadFailedError
+    from botocore.exceptions import ClientError
+    from src.core import aws
+
+    def upload_error(code: str, status: int) -> S3UploadFailedError:
+        try:
+            raise ClientError(
+                {
+                    "Error": {"Code": code},
+                    "ResponseMetadata": {"HTTPStatusCode": status},
+                },
+                "PutObject",
+            )
+        except ClientError as e:
+            try:
+                raise S3UploadFailedError(f"Failed to upload: {e}")
+            except S3UploadFailedError as wrapped:
+                return wrapped
+
+    assert aws.is_unavailable_error(upload_error("SlowDown", 503))
+    assert aws.is_unavailable_error(upload_error("InternalError", 500))
+    assert not aws.is_unavailable_error(upload_error("AccessDenied", 403))
+
+    breaker = aws.CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_other_error()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_asset_cache_revalidates_by_etag_and_evicts_lru(tmp_path):
+    """Test that cached assets are only downloaded again when their ETag changes,
+    and that the least recently used ones are evicted beyond the size cap"""
+    from src.core import asset_cache as asset_cache_module
+    from src.core.asset_cache import AssetCache
+
+    objects = {"models/m.pkl": (b"model-v1", "e1"), "data/d.csv": (b"data!", "e2")}
+
+    def head(bucket, key):
+        body, etag = objects[key]
+        return {"etag": etag, "size": len(body), "last_modified": "now"}
+
+    def download(bucket, key, local_path, needs_full_download=False, extra_args=None):
+        assert extra_args == {"IfMatch": f'"{objects[key][1]}"'}
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        local_path.write_bytes(objects[key][0])
+        return True
+
+    cache = AssetCache(tmp_path, max_bytes=10, revalidate_interval=3600)
+    with (
+        patch.object(asset_cache_module, "head_s3_object", side_effect=head) as h,
+        patch.object(
+            asset_cache_module, "download_from_s3", side_effect=download
+        ) as dl,
+    ):
+        path = cache.get("bucket", "models/m.pkl")
+        assert path.read_bytes() == b"model-v1"
+        # Fresh copies are served without touching S3
+        assert cache.get("bucket", "models/m.pkl") == path
+        assert (h.call_count, dl.call_count) == (1, 1)
+        # Revalidation only downloads changed objects
+        assert cache.get("bucket", "models/m.pkl", refresh=True) == path
+        assert dl.call_count == 1
+        objects["models/m.pkl"] = (b"model-v2", "e3")
+        assert cache.get("bucket", "models/m.pkl", refresh=True).read_bytes() == (
+            b"model-v2"
+        )
+        assert dl.call_count == 2
+
+        # 8 + 5 bytes exceed the cap, so the older model is evicted
+        assert cache.get("bucket", "data/d.csv").exists()
+        assert not path.exists()
+        assert list(AssetCache(tmp_path)._index) == ["data/d.csv"]
+        assert not list(tmp_path.rglob("*.download"))
+
+
+def test_large_downloads_resume_and_verify_checksums(tmp_path):
+    """Test that large objects are downloaded in ranged parts, that an interrupted
+    download resumes with the missing parts and that checksums are verified"""
+    import hashlib
+    import io
+    from botocore.exceptions import EndpointConnectionError
+    from src.core import aws
+
+    content = bytes(range(256)) * 40  # 10 KB, 10 parts of 1 KB
+    checksum = hashlib.sha256(content).hexdigest()
+    requested = []
+    failing = {"bytes=5120-6143"}
+
+    def get_object(Bucket, Key, Range, IfMatch):
+        assert IfMatch == '"etag"'
+        requested.append(Range)
+        if Range in failing:
+            raise EndpointConnectionError(endpoint_url="s3")
+        start, end = map(int, Range.removeprefix("bytes=").split("-"))
+        return {"Body": io.BytesIO(content[start : end + 1])}
+
+    client = MagicMock()
+    client.get_object.side_effect = get_object
+    client.head_object.return_value = {
+        "ContentLength": len(content),
+        "ETag": '"etag"',
+        "Metadata": {"sha256": checksum},
+    }
+    local_path = tmp_path / "model.pkl"
+    with (
+        patch.object(aws, "get_s3_client", return_value=client),
+        patch.object(aws, "circuit_breaker", aws.CircuitBreaker(100)),
+        patch.object(aws, "PART_SIZE", 1024),
+        patch.object(aws, "MAX_CONCURRENCY", 1),
+    ):
+        assert not aws.download_from_s3("bucket", "model.pkl", local_path)
+        assert not local_path.exists()
+        fetched = set(requested) - failing
+
+        failing.clear()
+        requested.clear()
+        assert aws.download_from_s3("bucket", "model.pkl", local_path)
+        assert local_path.read_bytes() == content
+        # Only the parts that were missing are fetched again
+        assert fetched and not fetched & set(requested)
+        assert len(fetched) + len(requested) == 10
+        assert not list(tmp_path.glob("*.part*"))
+
+        client.head_object.return_value["Metadata"] = {"sha256": "0" * 64}
+        assert not aws.download_from_s3(
+            "bucket", "model.pkl", local_path, needs_full_download=True
+        )
+        assert not local_path.exists()
+
+
+def test_dataset_cache_converts_once_and_reads_selected_columns(
+    tmp_path, dataset_cache_dir
+):
+    """Test that a CSV dataset is converted once per content version into a
+    columnar copy with a categorical sentiment, and loaded column by column"""
+    from src.core import dataset
+
+    source = tmp_path / "reviews.csv"
+    source.write_text('review,sentiment\nLoved it,positive\n"Dull,\nslow",negative\n')
+
+    df = dataset.load_dataset(source)
+    assert df["review"].tolist() == ["Loved it", "Dull,\nslow"]
+    assert df["sentiment"].dtype == "category"
+    assert df["review_length"].tolist() == [8, 10]
+
+    with patch.object(dataset, "convert_csv") as mock_convert:
+        df = dataset.load_dataset(source, columns=["sentiment"])
+    mock_convert.assert_not_called()
+    assert list(df.columns) == ["sentiment"]
+    assert df["sentiment"].tolist() == ["positive", "negative"]
+
+    # A new version of the source replaces the previous copy
+    source.write_text("review,sentiment\nGreat cast,positive\n")
+    assert dataset.load_dataset(source)["review"].tolist() == ["Great cast"]
+    assert len(list(dataset_cache_dir.glob("reviews-*.arrow"))) == 1
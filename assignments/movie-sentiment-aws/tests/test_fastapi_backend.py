@@ -1,5 +1,5 @@
-from unittest.mock import patch
-import pandas as pd
+import pytest
+from unittest.mock import patch, MagicMock
 
 
 def test_health_check(client):
@@ -13,31 +13,115 @@ def test_predict(client, mock_prediction_logger):
     """Test prediction endpoint"""
     response = client.post("/predict", json={"text": "Great movie!"})
     assert response.status_code == 200
-    assert response.json() == {"sentiment": "positive"}
+    prediction_id = response.json().pop("prediction_id")
+    assert response.json() == {"sentiment": "positive", "prediction_id": prediction_id}
     mock_prediction_logger.info.assert_called_once()
+    assert (
+        mock_prediction_logger.info.call_args.args[0]["prediction_id"] == prediction_id
+    )
 
 
 def test_predict_proba(client, mock_prediction_logger):
     """Test probability prediction endpoint"""
     response = client.post("/predict_proba", json={"text": "Great movie!"})
     assert response.status_code == 200
-    assert response.json() == {"sentiment": "positive", "probability": 0.9}
+    result = response.json()
+    assert result.pop("prediction_id")
+    assert result == {"sentiment": "positive", "probability": 0.9}
     mock_prediction_logger.info.assert_called_once()
 
 
-def test_example(client):
+def test_predictions_log_the_version_that_scored_them(
+    client, mock_model, mock_prediction_logger
+):
+    """Test that a model swapped in mid-request doesn't relabel the prediction"""
+    from src.fastapi_backend.utils.model_loader import model_manager
+
+    def swap_then_score(texts):
+        model_manager.swap(MagicMock(), version="new-version")
+        return [[0.1, 0.9]] * len(texts)
+
+    mock_model.predict_proba.side_effect = swap_then_score
+    for endpoint, payload in [
+        ("/predict", {"text": "Great movie!"}),
+        ("/predict_proba_batch", {"texts": ["Great movie!"]}),
+    ]:
+        model_manager.swap(mock_model, version="mock-version")
+        response = client.post(endpoint, json=payload)
+        assert response.status_code == 200
+        logged = mock_prediction_logger.info.call_args.args[0]
+        assert logged["model_version"] == "mock-version"
+
+
+def test_example(client, tmp_path):
     """Test example endpoint"""
-    mock_df = pd.DataFrame({"review": ["A random review."]})
+    data_path = tmp_path / "data.csv"
+    data_path.write_text('review,sentiment\n"A random review.",positive\n')
     with (
-        patch("src.fastapi_backend.main.pd.read_csv", return_value=mock_df),
-        patch(
-            "src.fastapi_backend.main.get_asset_path",
-            return_value="/mock/path/data.csv",
-        ),
+        patch("src.fastapi_backend.main.review_store", None),
+        patch("src.fastapi_backend.main.get_asset_path", return_value=data_path),
     ):
         response = client.get("/example")
         assert response.status_code == 200
-        assert response.json() == {"review": "A random review."}
+        # No precomputed scores here, so the live model scores the example
+        assert response.json() == {
+            "review": "A random review.",
+            "sentiment": "positive",
+            "predicted_sentiment": "positive",
+            "probability": 0.9,
+        }
+
+
+def test_example_by_sentiment_and_count(client, mock_model, tmp_path):
+    """Test example endpoint filters by sentiment and returns several reviews
+    with their precomputed scores"""
+    import numpy as np
+    from src.core import ReviewScores
+    from src.fastapi_backend.utils.model_loader import model_manager
+    from src.fastapi_backend.utils.review_store import ReviewStore
+
+    data_path = tmp_path / "data.csv"
+    data_path.write_text(
+        "review,sentiment\n"
+        "Loved it,positive\n"
+        '"Dull, slow and\nfar too long. ""Avoid"".",negative\n'
+        "Great cast,positive\n"
+    )
+    store = ReviewStore(data_path)
+    assert len(store) == 3
+    assert store.get(1) == {
+        "review": 'Dull, slow and\nfar too long. "Avoid".',
+        "sentiment": "negative",
+    }
+
+    scores = ReviewScores(
+        labels=np.array([1, 0, 0], dtype=np.int8),
+        probabilities=np.array([0.8, 0.7, 0.6], dtype=np.float32),
+        model_checksum="checksum-v1",
+    )
+    model_manager.swap(mock_model, version="mock-version", checksum="checksum-v1")
+
+    with (
+        patch("src.fastapi_backend.main.review_store", store),
+        patch("src.fastapi_backend.main.get_review_scores", return_value=scores),
+    ):
+        response = client.get("/example", params={"sentiment": "positive", "count": 5})
+        assert response.status_code == 200
+        examples = response.json()["examples"]
+        assert sorted(
+            (example["review"], example["predicted_sentiment"], example["probability"])
+            for example in examples
+        ) == [("Great cast", "negative", 0.6), ("Loved it", "positive", 0.8)]
+        mock_model.predict_proba.assert_not_called()
+
+        response = client.get("/example", params={"sentiment": "negative"})
+        assert response.json()["review"] == 'Dull, slow and\nfar too long. "Avoid".'
+
+        assert (
+            client.get("/example", params={"sentiment": "neutral"}).status_code == 422
+        )
+        assert client.get("/example", params={"count": 0}).status_code == 422
+    store.close()
 
 
 def test_true_sentiment(client, mock_prediction_logger):
@@ -53,3 +137,687 @@ def test_true_sentiment(client, mock_prediction_logger):
     assert response.status_code == 200
     assert response.json() == {"message": "Feedback received"}
     mock_prediction_logger.info.assert_called_once()
+
+
+def test_true_sentiment_by_prediction_id(client, mock_prediction_logger):
+    """Test feedback that references a prediction ID, single and batched"""
+    feedback = {
+        "prediction_id": "abc123",
+        "true_sentiment": "negative",
+        "is_sentiment_correct": False,
+    }
+    response = client.post("/true_sentiment", json=feedback)
+    assert response.status_code == 200
+    # Only the reference is logged, the text is joined from the prediction log
+    assert mock_prediction_logger.info.call_args.args[0] == {
+        "endpoint": "/true_sentiment",
+        "prediction_id": "abc123",
+        "true_sentiment": "negative",
+    }
+
+    response = client.post(
+        "/true_sentiment_batch",
+        json={"feedback": [feedback, {**feedback, "prediction_id": "def456"}]},
+    )
+    assert response.status_code == 200
+    logged = mock_prediction_logger.info.call_args.args[0]
+    assert logged["endpoint"] == "/true_sentiment_batch"
+    assert [item["prediction_id"] for item in logged["feedback"]] == [
+        "abc123",
+        "def456",
+    ]
+
+    # Feedback must reference a prediction somehow
+    response = client.post(
+        "/true_sentiment",
+        json={"true_sentiment": "negative", "is_sentiment_correct": False},
+    )
+    assert response.status_code == 422
+    assert (
+        client.post("/true_sentiment_batch", json={"feedback": []}).status_code == 422
+    )
+
+
+def test_health_check_reports_model_version(client):
+    """Test health check reports the live model version"""
+    response = client.get("/health")
+    assert response.json()["model_version"] == "mock-version"
+    assert response.json()["model_loaded_at"] is not None
+
+
+def test_model_manager_hot_swap(mock_model):
+    """Test that a new artifact version is loaded and swapped in"""
+    from src.fastapi_backend.utils.model_loader import ModelManager
+
+    manager = ModelManager()
+    manager.swap(mock_model, version="v1")
+    new_model = MagicMock()
+    with (
+        patch(
+            "src.fastapi_backend.utils.model_loader.get_asset_version",
+            return_value="v2",
+        ),
+        patch("src.fastapi_backend.utils.model_loader.get_asset_path"),
+        patch(
+            "src.fastapi_backend.utils.model_loader.get_local_asset_version",
+            return_value="v2",
+        ),
+        patch(
+            "src.fastapi_backend.utils.model_loader.get_file_checksum",
+            return_value="checksum-v2",
+        ),
+        patch(
+            "joblib.load",
+            return_value=new_model,
+        ),
+    ):
+        assert manager.refresh() is True
+        assert manager.get() is new_model
+        assert manager.current.version == "v2"
+        assert manager.current.checksum == "checksum-v2"
+        # Same version again is a no-op
+        assert manager.refresh() is False
+
+
+def test_model_manager_keeps_model_on_failed_reload(mock_model):
+    """Test that a failed reload keeps serving the previous model"""
+    from src.fastapi_backend.utils.model_loader import ModelManager
+
+    manager = ModelManager()
+    manager.swap(mock_model, version="v1")
+    with (
+        patch(
+            "src.fastapi_backend.utils.model_loader.get_asset_version",
+            return_value="v2",
+        ),
+        patch("src.fastapi_backend.utils.model_loader.get_asset_path"),
+        patch(
+            "src.fastapi_backend.utils.model_loader.get_local_asset_version",
+            return_value="v2",
+        ),
+        patch("src.fastapi_backend.utils.model_loader.get_file_checksum"),
+        patch(
+            "joblib.load",
+            side_effect=EOFError("truncated"),
+        ),
+    ):
+        assert manager.refresh() is False
+        assert manager.get() is mock_model
+
+
+def test_model_manager_tags_model_with_fetched_version(mock_model, tmp_path):
+    """Test that a model is tagged with the version of the copy actually fetched"""
+    from src.core import asset_resolution
+    from src.fastapi_backend.utils.model_loader import ModelManager
+
+    manager = ModelManager(compiled_scorer=False)
+    manager.swap(mock_model, version="v1")
+    model_path = tmp_path / "model.joblib"
+    model_path.write_bytes(b"model")
+    with (
+        patch.dict(asset_resolution.config, {"env": "production"}),
+        # The artifact changes again between the version check and the download
+        patch(
+            "src.fastapi_backend.utils.model_loader.get_asset_version",
+            return_value="v2",
+        ),
+        patch(
+            "src.fastapi_backend.utils.model_loader.get_asset_path",
+            return_value=model_path,
+        ),
+        patch.object(asset_resolution.asset_cache, "etag", return_value="v3"),
+        patch("joblib.load", return_value=MagicMock()),
+    ):
+        assert manager.refresh() is True
+        assert manager.current.version == "v3"
+
+
+def test_model_manager_keeps_model_when_reload_fetch_fails(
+    mock_model, mock_get_asset_path
+):
+    """Test that a reload whose S3 fetch fails keeps serving instead of exiting"""
+    from src.core import asset_resolution
+    from src.fastapi_backend.utils.model_loader import ModelManager
+
+    manager = ModelManager()
+    manager.swap(mock_model, version="v1")
+    with (
+        patch.dict(asset_resolution.config, {"env": "production"}),
+        patch.dict("os.environ", {"S3_BUCKET_NAME": "bucket"}),
+        patch.object(asset_resolution.asset_cache, "get", return_value=None),
+        patch(
+            "src.fastapi_backend.utils.model_loader.get_asset_version",
+            return_value="v2",
+        ),
+        patch(
+            "src.fastapi_backend.utils.model_loader.get_asset_path",
+            mock_get_asset_path.original,
+        ),
+    ):
+        with pytest.raises(SystemExit):
+            mock_get_asset_path.original("model")
+        assert manager.refresh() is False
+        assert manager.get() is mock_model
+
+
+def test_predict_batch(client, mock_model, mock_prediction_logger):
+    """Test batch prediction endpoint returns results in input order"""
+    mock_model.predict.return_value = [1, 0, 1]
+    response = client.post("/predict_batch", json={"texts": ["a", "b", "c"]})
+    assert response.status_code == 200
+    predictions = response.json()["predictions"]
+    prediction_ids = [prediction.pop("prediction_id") for prediction in predictions]
+    assert predictions == [
+        {"sentiment": "positive"},
+        {"sentiment": "negative"},
+        {"sentiment": "positive"},
+    ]
+    assert len(set(prediction_ids)) == 3
+    mock_model.predict.assert_called_once_with(["a", "b", "c"])
+    mock_prediction_logger.info.assert_called_once()
+
+
+def test_predict_proba_batch(client, mock_model, mock_prediction_logger):
+    """Test batch probability endpoint with a single predict_proba call"""
+    mock_model.predict_proba.return_value = [[0.1, 0.9], [0.8, 0.2]]
+    response = client.post("/predict_proba_batch", json={"texts": ["a", "b"]})
+    assert response.status_code == 200
+    predictions = response.json()["predictions"]
+    prediction_ids = [prediction.pop("prediction_id") for prediction in predictions]
+    assert predictions == [
+        {"sentiment": "positive", "probability": 0.9},
+        {"sentiment": "negative", "probability": 0.8},
+    ]
+    mock_model.predict_proba.assert_called_once_with(["a", "b"])
+    mock_prediction_logger.info.assert_called_once()
+    logged = mock_prediction_logger.info.call_args.args[0]
+    assert logged["prediction_ids"] == prediction_ids
+
+
+def test_predict_batch_limits(client):
+    """Test batch endpoints reject empty and oversized batches"""
+    assert client.post("/predict_batch", json={"texts": []}).status_code == 422
+    with patch("src.fastapi_backend.main.MAX_BATCH_SIZE", 2):
+        response = client.post("/predict_batch", json={"texts": ["a", "b", "c"]})
+        assert response.status_code == 413
+
+
+def test_micro_batcher_groups_concurrent_requests():
+    """Test that concurrent submissions are scored in one call, in order"""
+    import asyncio
+    from src.fastapi_backend.utils.batcher import MicroBatcher
+
+    calls = []
+
+    def score(texts, model):
+        calls.append(list(texts))
+        return [[0.0, 1.0] if text == "good" else [1.0, 0.0] for text in texts]
+
+    async def run():
+        batcher = MicroBatcher(score, max_batch_size=8, max_wait_ms=50)
+        texts = ["good", "bad", "good", "bad"]
+        results = await asyncio.gather(*(batcher.submit(text) for text in texts))
+        stats = batcher.stats()
+        await batcher.stop()
+        return results, stats
+
+    results, stats = asyncio.run(run())
+    assert calls == [["good", "bad", "good", "bad"]]
+    assert [int(row.argmax()) for row in results] == [1, 0, 1, 0]
+    assert stats["batches"] == 1
+    assert stats["max_batch_size_seen"] == 4
+
+
+def test_micro_batcher_scores_each_model_separately():
+    """Test that texts submitted for different models are never scored together"""
+    import asyncio
+    from src.fastapi_backend.utils.batcher import MicroBatcher
+
+    calls = []
+
+    def score(texts, model):
+        calls.append((model, list(texts)))
+        return [[0.0, 1.0]] * len(texts)
+
+    async def run():
+        batcher = MicroBatcher(score, max_batch_size=8, max_wait_ms=50)
+        await asyncio.gather(
+            batcher.submit("a", "v1"),
+            batcher.submit("b", "v2"),
+            batcher.submit("c", "v1"),
+        )
+        await batcher.stop()
+
+    asyncio.run(run())
+    assert calls == [("v1", ["a", "c"]), ("v2", ["b"])]
+
+
+def test_micro_batcher_resolves_every_request():
+    """Test that stopping scores the queued requests and that a score_fn returning
+    the wrong number of rows fails the batch instead of leaving it waiting"""
+    import asyncio
+    import pytest
+    from src.fastapi_backend.utils.batcher import MicroBatcher
+
+    async def run_stop():
+        batcher = MicroBatcher(
+            lambda texts, model: [[0.0, 1.0]] * len(texts),
+            max_batch_size=2,
+            max_wait_ms=1000,
+        )
+        requests = [asyncio.create_task(batcher.submit(str(i))) for i in range(5)]
+        await asyncio.sleep(0.01)
+        await batcher.stop()
+        return await asyncio.wait_for(asyncio.gather(*requests), 1)
+
+    results = asyncio.run(run_stop())
+    assert [int(row.argmax()) for row in results] == [1] * 5
+
+    async def run_mismatch():
+        batcher = MicroBatcher(lambda texts, model: [[0.0, 1.0]], max_wait_ms=10)
+        try:
+            return await asyncio.wait_for(
+                asyncio.gather(batcher.submit("a"), batcher.submit("b")), 1
+            )
+        finally:
+            await batcher.stop()
+
+    with pytest.raises(ValueError, match="Expected 2 rows"):
+        asyncio.run(run_mismatch())
+
+
+def test_predict_proba_with_micro_batching(client, mock_model, mock_prediction_logger):
+    """Test that /predict_proba routes through the micro-batcher when enabled"""
+    from src.fastapi_backend.utils.batcher import MicroBatcher
+
+    batcher = MicroBatcher(
+        lambda texts, current: current.model.predict_proba(texts), max_wait_ms=1
+    )
+    with patch("src.fastapi_backend.main.micro_batcher", batcher):
+        response = client.post("/predict_proba", json={"text": "Great movie!"})
+        assert response.status_code == 200
+        assert response.json()["probability"] == 0.9
+        mock_model.predict.assert_not_called()
+        assert client.get("/stats").json()["micro_batcher"]["items"] == 1
+
+
+def test_compiled_scorer_matches_pipeline():
+    """Test that the compiled scorer reproduces the sklearn pipeline"""
+    import numpy as np
+    from sklearn.pipeline import Pipeline
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from src.fastapi_backend.utils.scorer import CompiledNBScorer, compile_model
+
+    X = [
+        "a great and wonderful movie",
+        "loved the great acting",
+        "a terrible and boring movie",
+        "hated the awful plot",
+    ]
+    y = [1, 1, 0, 0]
+    pipeline = Pipeline(
+        [
+            ("tfidf", TfidfVectorizer(stop_words="english")),
+            ("classifier", MultinomialNB()),
+        ]
+    ).fit(X, y)
+
+    scorer = compile_model(pipeline)
+    assert isinstance(scorer, CompiledNBScorer)
+    texts = ["great movie", "boring and awful", "unseen words only", ""]
+    labels, probabilities = scorer.predict_with_proba(texts)
+    np.testing.assert_array_equal(labels, pipeline.predict(texts))
+    np.testing.assert_allclose(
+        probabilities, pipeline.predict_proba(texts), rtol=0, atol=1e-9
+    )
+
+
+def test_compile_model_falls_back_for_unsupported_models(mock_model):
+    """Test that unsupported model types are served as-is"""
+    from src.fastapi_backend.utils.scorer import compile_model
+
+    assert compile_model(mock_model) is mock_model
+
+
+def test_execution_layer_runs_off_the_event_loop():
+    """Test that inference runs in the pool and concurrency is bounded"""
+    import asyncio
+    import threading
+    import time
+    from src.fastapi_backend.utils.executors import ExecutionLayer
+
+    execution = ExecutionLayer(inference_workers=4, max_pending=2)
+    active, peak, threads = 0, 0, set()
+    lock = threading.Lock()
+
+    def work():
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+            threads.add(threading.current_thread().name)
+        time.sleep(0.02)
+        with lock:
+            active -= 1
+
+    async def run():
+        await asyncio.gather(*(execution.run_inference(work) for _ in range(6)))
+
+    asyncio.run(run())
+    execution.shutdown()
+    assert peak <= 2
+    assert all(name.startswith("inference") for name in threads)
+
+
+def test_prediction_cache_single_flight_and_lru():
+    """Test that concurrent identical lookups compute once and LRU eviction works"""
+    import asyncio
+    import numpy as np
+    from src.fastapi_backend.utils.cache import PredictionCache
+
+    cache = PredictionCache(max_entries=2)
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return np.array([0.2, 0.8])
+
+    async def run():
+        results = await asyncio.gather(
+            *(cache.get_or_compute("Great  movie ", "v1", compute) for _ in range(5))
+        )
+        # Whitespace-normalized text hits the same entry
+        await cache.get_or_compute("Great movie", "v1", compute)
+        # A new model version is a different entry
+        await cache.get_or_compute("Great movie", "v2", compute)
+        await cache.get_or_compute("Another movie", "v2", compute)
+        return results
+
+    results = asyncio.run(run())
+    assert all(np.array_equal(result, [0.2, 0.8]) for result in results)
+    stats = cache.stats()
+    assert len(calls) == 3
+    assert stats["coalesced"] == 4
+    assert stats["hits"] == 1
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+
+
+def test_prediction_cache_leader_cancellation_keeps_followers():
+    """Test that cancelling the request that started a computation does not fail
+    the requests coalesced onto it"""
+    import asyncio
+    import numpy as np
+    from src.fastapi_backend.utils.cache import PredictionCache
+
+    cache = PredictionCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return np.array([0.3, 0.7])
+
+    async def run():
+        leader = asyncio.create_task(cache.get_or_compute("Movie", "v1", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_compute("Movie", "v1", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        result = await follower
+        assert leader.cancelled()
+        return result
+
+    assert np.array_equal(asyncio.run(run()), [0.3, 0.7])
+    assert len(calls) == 1
+    assert cache.stats()["entries"] == 1
+
+
+def test_prediction_cache_invalidated_on_model_swap(client, mock_model):
+    """Test that cached predictions are dropped when a new model is swapped in"""
+    from src.fastapi_backend.utils.model_loader import model_manager
+
+    client.post("/predict_proba", json={"text": "Cached movie"})
+    client.post("/predict", json={"text": "Cached movie"})
+    assert mock_model.predict_proba.call_count == 1
+    assert client.get("/stats").json()["prediction_cache"]["hits"] >= 1
+
+    model_manager.swap(mock_model, version="mock-version-2")
+    client.post("/predict_proba", json={"text": "Cached movie"})
+    assert mock_model.predict_proba.call_count == 2
+
+
+def test_predict_stream_ndjson(client, mock_model, mock_prediction_logger):
+    """Test streaming NDJSON scoring in chunks, with malformed lines reported"""
+    import json
+    import numpy as np
+
+    mock_model.predict_proba.side_effect = lambda texts: np.tile(
+        [0.1, 0.9], (len(texts), 1)
+    )
+    body = "\n".join(
+        [json.dumps({"text": f"review {i}", "id": i}) for i in range(5)] + ["not json"]
+    )
+    with patch("src.fastapi_backend.main.STREAM_CHUNK_SIZE", 2):
+        response = client.post("/predict_stream", content=body)
+    assert response.status_code == 200
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [result["line"] for result in results] == list(range(6))
+    assert results[0] == {
+        "line": 0,
+        "id": 0,
+        "sentiment": "positive",
+        "probability": 0.9,
+    }
+    assert "error" in results[5]
+    assert mock_model.predict_proba.call_count == 3
+    assert mock_prediction_logger.info.call_count == 3
+
+
+def test_predict_stream_reports_invalid_utf8_per_record(client, mock_model):
+    """Test that a line that is not valid UTF-8 becomes an error record instead of
+    aborting the stream"""
+    import json
+    import numpy as np
+
+    mock_model.predict_proba.side_effect = lambda texts: np.tile(
+        [0.1, 0.9], (len(texts), 1)
+    )
+    body = b'{"text": "ok"}\n{"text": "caf\xe9"}\n{"text": "also ok"}\n'
+    response = client.post("/predict_stream", content=body)
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [result.get("error") for result in results] == [None, "Invalid UTF-8", None]
+
+    csv_body = b'text,id\n"bad \xff\nstill bad",1\ngood,2\n'
+    response = client.post(
+        "/predict_stream", content=csv_body, headers={"Content-Type": "text/csv"}
+    )
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert results == [
+        {"line": 0, "error": "Invalid UTF-8"},
+        {"line": 1, "id": "2", "sentiment": "positive", "probability": 0.9},
+    ]
+
+
+def test_iter_lines_drops_oversized_lines_without_buffering():
+    """Test that lines are split across chunk boundaries and that a line past the
+    limit becomes an error without being held in memory"""
+    import asyncio
+    from src.fastapi_backend.utils.streaming import (
+        LineError,
+        LineSplitter,
+        iter_lines,
+        iter_ndjson_records,
+    )
+
+    async def chunks():
+        yield b'{"text": "fi'
+        yield b'rst"}\r\n'
+        for _ in range(100):
+            yield b"x" * 1000
+        yield b'\n{"text": "last"}'
+
+    async def run():
+        lines = iter_lines(chunks(), max_line_bytes=5000)
+        return [record async for record in iter_ndjson_records(lines)]
+
+    assert asyncio.run(run()) == [
+        {"text": "first"},
+        {"error": "Line exceeds 5000 bytes"},
+        {"text": "last"},
+    ]
+
+    splitter = LineSplitter(max_line_bytes=10)
+    for _ in range(1000):
+        assert splitter.feed(b"y" * 1000) == []
+    assert splitter._parts == []
+    assert splitter.feed(b"\nok\n") == [LineError("Line exceeds 10 bytes"), "ok"]
+    assert splitter.close() == []
+
+
+def test_predict_stream_reports_body_and_scoring_errors(client, mock_model):
+    """Test that a corrupt gzip body or a failing model call ends in error records
+    instead of cutting the response off, and that gzip bodies inflate in pieces"""
+    import asyncio
+    import gzip
+    import json
+    import zlib
+    import numpy as np
+    from src.fastapi_backend.utils import streaming
+
+    mock_model.predict_proba.side_effect = lambda texts: np.tile(
+        [0.1, 0.9], (len(texts), 1)
+    )
+    body = gzip.compress(b'{"text": "good"}\n{"text": "also good"}\n')
+    for corrupt, error in [
+        (body[:20], "Truncated gzip body"),
+        (body[:-8] + b"\0" * 8, "Invalid gzip body"),
+    ]:
+        response = client.post(
+            "/predict_stream", content=corrupt, headers={"Content-Encoding": "gzip"}
+        )
+        assert response.status_code == 200
+        results = [json.loads(line) for line in response.text.splitlines()]
+        assert results[-1]["error"].startswith(error)
+
+    mock_model.predict_proba.side_effect = RuntimeError("model exploded")
+    response = client.post("/predict_stream", content=b'{"text": "a"}\nnot json\n')
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"line": 0, "error": "Scoring failed"},
+        {"line": 1, "error": "Invalid JSON: Expecting value"},
+    ]
+
+    # 50 MB of one byte compresses to ~50 KB and is never inflated at once
+    bomb = gzip.compress(b"x" * 50_000_000)
+    pieces = streaming.inflate(zlib.decompressobj(wbits=31), bomb)
+    assert max(len(piece) for piece in pieces) <= streaming.DECOMPRESS_CHUNK_BYTES
+
+    async def chunks():
+        yield bomb
+
+    async def run():
+        lines = streaming.iter_lines(chunks(), gzipped=True, max_line_bytes=1000)
+        return [line async for line in lines]
+
+    assert asyncio.run(run()) == [streaming.LineError("Line exceeds 1000 bytes")]
+
+
+def test_csv_records_track_quoted_fields_like_the_csv_module():
+    """Test that only quotes opening a field start a multi-line record, and that
+    a quoted field that is never closed does not buffer the rest of the upload"""
+    import asyncio
+    import csv
+    from src.fastapi_backend.utils.streaming import (
+        ends_in_quoted_field,
+        iter_csv_records,
+    )
+
+    for line in [
+        'A "stray quote,1',
+        '"closed","x"y"',
+        '"escaped "" quote",1',
+        '1,"two ""lines""',
+        '"a""',
+        'x,"',
+        "",
+    ]:
+        # The record continues if the reader needs the next line to finish it
+        reader = csv.reader([line + "\n", "next\n"])
+        next(reader)
+        assert ends_in_quoted_field(line) == (reader.line_num == 2), line
+    assert ends_in_quoted_field(b'"ab\xff",1') is False
+    assert ends_in_quoted_field('end of field",2', in_quotes=True) is False
+
+    async def lines():
+        yield "text,id"
+        yield 'A "stray quote,1'
+        yield '"never closed,2'
+        for i in range(100):
+            yield f"review {i},{i}"
+
+    async def run():
+        return [record async for record in iter_csv_records(lines(), 50)]
+
+    records = asyncio.run(run())
+    assert records[0] == {"text": 'A "stray quote', "id": "1"}
+    assert "error" in records[1]
+    # Parsing resumes after the oversized record instead of swallowing the rest
+    assert {"text": "review 99", "id": "99"} in records
+    assert len(records) > 90
+
+
+def test_predict_stream_gzip_csv(client, mock_model, mock_prediction_logger):
+    """Test streaming CSV input with gzip-compressed request and response"""
+    import gzip
+    import json
+    import numpy as np
+
+    mock_model.predict_proba.side_effect = lambda texts: np.tile(
+        [0.8, 0.2], (len(texts), 1)
+    )
+    csv_body = 'review,sentiment\n"Bad, ""really""\nbad",negative\nMeh,negative\n'
+    response = client.post(
+        "/predict_stream?gzip=true",
+        content=gzip.compress(csv_body.encode()),
+        headers={"Content-Type": "text/csv", "Content-Encoding": "gzip"},
+    )
+    assert response.status_code == 200
+    # The test client transparently decompresses the gzip response
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [result["sentiment"] for result in results] == ["negative", "negative"]
+    texts = mock_model.predict_proba.call_args[0][0]
+    assert texts == ['Bad, "really"\nbad', "Meh"]
+
+
+def test_request_logging_middleware_truncates_and_excludes():
+    """Test that the logging middleware truncates payloads and skips excluded paths"""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from src.fastapi_backend.utils.middleware import RequestLoggingMiddleware
+
+    app = FastAPI()
+    app.add_middleware(
+        RequestLoggingMiddleware, max_payload_chars=5, exclude_paths=["/health"]
+    )
+
+    @app.post("/echo")
+    async def echo(payload: dict) -> dict:
+        return payload
+
+    @app.get("/health")
+    async def health() -> dict:
+        return {"status": "healthy"}
+
+    with patch("src.fastapi_backend.utils.middleware.logger") as mock_logger:
+        client = TestClient(app)
+        assert client.post("/echo", json={"text": "Great"}).status_code == 200
+        client.get("/health")
+    mock_logger.info.assert_called_once()
+    log_line = mock_logger.info.call_args[0][0]
+    assert "'path': '/echo'" in log_line
+    assert "'status_code': 200" in log_line
+    assert """'input': '{"tex'""" in log_line
+    assert """'response': '{"tex'""" in log_line
+    assert "duration_ms" in log_line
@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import patch, MagicMock
 import numpy as np
+import pandas as pd
 from src.sklearn_training import train_model
 
 
@@ -32,3 +33,158 @@ def test_run_training_smoke(
     mock_load_and_preprocess_data.assert_called_once_with("dummy_path.csv")
     mock_create_and_train_model_pipeline.assert_called_once()
     mock_save_model.assert_called_once()
+
+
+def test_save_model_writes_matching_review_scores(tmp_path):
+    """
+    Test that saving a model also precomputes its scores for every review.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+    from src.core import get_file_checksum, load_review_scores
+
+    reviews = np.array(["great film", "awful film", "great cast", "awful plot"])
+    pipeline = Pipeline(
+        [("tfidf", TfidfVectorizer()), ("classifier", MultinomialNB())]
+    ).fit(reviews, [1, 0, 1, 0])
+
+    with (
+        patch.dict(train_model.config, {"env": "development"}),
+        patch.object(train_model, "PROJECT_ROOT", tmp_path),
+        patch.object(train_model, "SCORING_CHUNK_SIZE", 3),
+    ):
+        train_model.save_model(pipeline, reviews)
+
+    model_path = tmp_path / train_model.config["paths"]["model"]
+    scores = load_review_scores(tmp_path / train_model.config["paths"]["review_scores"])
+    assert scores.model_checksum == get_file_checksum(model_path)
+    assert scores.labels.tolist() == [1, 0, 1, 0]
+    np.testing.assert_allclose(
+        scores.probabilities, pipeline.predict_proba(reviews).max(axis=1), rtol=1e-6
+    )
+
+
+def test_feature_cache_reuses_fitted_features(tmp_path):
+    """
+    Test that features are fitted once per dataset and vectorizer settings, and
+    that the training features are reused for scoring.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from src.sklearn_training.utils.feature_cache import FeatureCache
+
+    cache = FeatureCache(tmp_path, max_entries=2)
+    reviews = np.array(["great film", "awful film", "great cast", "awful plot"])
+
+    vectorizer, features = cache.fit_transform(TfidfVectorizer(), reviews)
+    assert cache.transform(vectorizer, reviews) is features
+
+    # A later run loads the entry instead of fitting
+    with patch.object(TfidfVectorizer, "fit_transform") as mock_fit:
+        cached_vectorizer, cached_features = FeatureCache(tmp_path).fit_transform(
+            TfidfVectorizer(), reviews.copy()
+        )
+    mock_fit.assert_not_called()
+    assert cached_vectorizer.vocabulary_ == vectorizer.vocabulary_
+    assert (cached_features != features).nnz == 0
+
+    # Other settings or other reviews are new entries, and the oldest is evicted
+    cache.fit_transform(TfidfVectorizer(min_df=2), reviews)
+    cache.fit_transform(TfidfVectorizer(), reviews[:3])
+    assert len(list(tmp_path.glob("*/meta.json"))) == 2
+
+
+def test_tune_pipeline_reports_candidates_and_exports_servable_winner():
+    """
+    Test that tuning tokenizes once per analyzer setting, reports the candidates
+    that survive halving and returns a pipeline the backend can compile.
+    """
+    from sklearn.feature_extraction.text import CountVectorizer
+    from src.fastapi_backend.utils.scorer import CompiledNBScorer
+    from src.sklearn_training.utils import tuning
+
+    rng = np.random.default_rng(0)
+    positive = ["great", "loved", "brilliant", "fun"]
+    negative = ["awful", "boring", "dull", "bad"]
+    X, y = [], []
+    for _ in range(60):
+        label = int(rng.integers(2))
+        words = rng.choice(positive if label else negative, size=3).tolist()
+        X.append(" ".join(words + ["the", "movie", "film"]))
+        y.append(label)
+    X = np.array(X)
+
+    tuning_config = {
+        "validation_fraction": 0.25,
+        "n_jobs": 1,
+        "latency_samples": 5,
+        "param_grid": {
+            "ngram_range": [[1, 1], [1, 2]],
+            "stop_words": ["english"],
+            "max_features": [2, None],
+            "alpha": [0.1, 1.0],
+        },
+    }
+    fit_transform = CountVectorizer.fit_transform
+    with patch.object(
+        CountVectorizer, "fit_transform", autospec=True, side_effect=fit_transform
+    ) as mock_tokenize:
+        pipeline, report = tuning.tune_pipeline(X, y, tuning_config)
+
+    assert mock_tokenize.call_count == 2
+    # Only the 2 candidates per analyzer setting left after halving are reported
+    assert len(report) == 4
+    assert (report["halving_iteration"] == 1).all()
+    assert {"validation_accuracy", "latency_ms", "model_bytes"} <= set(report.columns)
+    assert report["validation_accuracy"].max() == 1.0
+    # The refitted winner has the settings of the report's top row
+    top = report.iloc[0]
+    vectorizer, classifier = pipeline[0], pipeline[-1]
+    assert vectorizer.ngram_range == top["ngram_range"]
+    assert classifier.alpha == top["alpha"]
+    if pd.notna(top["max_features"]):
+        assert len(vectorizer.vocabulary_) == top["max_features"]
+
+    scorer = CompiledNBScorer(pipeline)
+    assert scorer.verify(["a great fun film", "a dull and boring movie"])
+    assert pipeline.predict(["great fun", "dull bad"]).tolist() == [1, 0]
+
+
+def test_streaming_training_is_servable_by_the_backend(tmp_path):
+    """
+    Test that the out-of-core trainer streams the dataset in blocks, matches the
+    IDF weights of an in-memory fit, and saves a model the backend can load.
+    """
+    from sklearn.feature_extraction.text import TfidfTransformer
+    from src.fastapi_backend.utils.model_loader import load_artifact
+    from src.fastapi_backend.utils.scorer import compile_model
+    from src.sklearn_training.utils import streaming
+
+    rows = ['"Dull, slow and\nfar too long.",negative']
+    rows += ["Great cast and a brilliant plot,positive", "Awful and boring,negative"]
+    rows += ["Loved it and fun,positive"]
+    data_path = tmp_path / "data.csv"
+    data_path.write_text("review,sentiment\n" + "\n".join(rows * 20) + "\n")
+
+    streaming_config = {"n_features": 2**10, "idf": True, "chunk_size": 30}
+    chunks = list(streaming.iter_review_chunks(data_path, chunk_size=30))
+    assert [len(labels) for _, labels in chunks] == [30, 30, 20]
+    assert chunks[0][0][0] == "Dull, slow and\nfar too long."
+    pipeline = streaming.train_streaming_pipeline(data_path, streaming_config)
+
+    reviews = np.concatenate([reviews for reviews, _ in chunks])
+    expected_idf = TfidfTransformer().fit(pipeline["hashing"].transform(reviews)).idf_
+    np.testing.assert_allclose(pipeline["tfidf"].idf_, expected_idf)
+    assert pipeline.predict(["a brilliant, fun cast", "dull and boring"]).tolist() == [
+        1,
+        0,
+    ]
+
+    with (
+        patch.dict(train_model.config, {"env": "development"}),
+        patch.object(train_model, "PROJECT_ROOT", tmp_path),
+    ):
+        train_model.save_model(pipeline, (reviews for reviews, _ in chunks))
+    model = load_artifact(tmp_path / train_model.config["paths"]["model"])
+    assert compile_model(model) is model
+    assert model.predict(["dull and boring"]).tolist() == [0]
@@ -1,3 +1,4 @@
+import io
 from unittest.mock import patch, MagicMock
 
 
@@ -20,3 +21,243 @@ def test_streamlit_monitoring_import():
         import src.streamlit_monitoring.app
 
         assert src.streamlit_monitoring.app is not None
+
+
+def test_expand_batch_logs():
+    """Test that batch prediction logs are expanded into one record per text"""
+    from src.streamlit_monitoring.utils.data_loader import expand_batch_logs
+
+    logs = [
+        {
+            "endpoint": "/predict",
+            "request_text": "a",
+            "predicted_sentiment": "positive",
+        },
+        {
+            "endpoint": "/predict_proba_batch",
+            "request_texts": ["b", "c"],
+            "predicted_sentiments": ["negative", "positive"],
+            "probabilities": [0.7, 0.9],
+        },
+    ]
+    expanded = expand_batch_logs(logs)
+    assert [log["request_text"] for log in expanded] == ["a", "b", "c"]
+    assert expanded[2]["probability"] == 0.9
+
+
+def test_load_all_logs_reads_s3_parts(tmp_path):
+    """Test that production logs are read from the legacy object and every part"""
+    from src.streamlit_monitoring.utils import data_loader
+
+    parts = {
+        "logs/p/date=2026-01-01/hour=00/a.jsonl": '{"endpoint": "/predict"}\n',
+        "logs/p/date=2026-01-01/hour=01/b.jsonl": '{"endpoint": "/true_sentiment"}\n',
+    }
+
+    def download(bucket, key, local_path, needs_full_download=False):
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        local_path.write_text(parts[key])
+        return True
+
+    test_config = {
+        "env": "production",
+        "project_root": str(tmp_path),
+        "prediction_logging": {"prefix": "logs/p/", "key": "logs/legacy.json"},
+    }
+    with (
+        patch.object(data_loader, "config", test_config),
+        patch.dict("os.environ", {"S3_BUCKET_NAME": "bucket"}),
+        patch.object(
+            data_loader,
+            "list_s3_objects",
+            return_value=[{"key": key, "size": 1, "etag": "e"} for key in parts],
+        ),
+        patch.object(data_loader, "download_from_s3", side_effect=download) as mock_dl,
+        patch.object(
+            data_loader, "load_legacy_logs", return_value=[{"endpoint": "/legacy"}]
+        ) as mock_legacy,
+    ):
+        logs = data_loader.load_all_logs()
+        assert [log["endpoint"] for log in logs] == [
+            "/legacy",
+            "/predict",
+            "/true_sentiment",
+        ]
+        # Parts are immutable, so a second load downloads nothing
+        data_loader.load_all_logs()
+        assert mock_dl.call_count == 2
+        mock_legacy.assert_called_with("bucket", "logs/legacy.json")
+
+
+def test_load_legacy_logs_reads_only_appended_lines():
+    """Test that refreshes only fetch and parse the bytes appended to the legacy
+    log object since the previous refresh"""
+    from src.core import aws
+    from src.streamlit_monitoring.utils import data_loader
+
+    obj = {"body": b'{"endpoint": "/a"}\n{"endpoint": "/b"}\n{"endp'}
+    ranges = []
+
+    def get_object(Bucket, Key, Range, IfMatch):
+        ranges.append(Range)
+        start, end = map(int, Range.removeprefix("bytes=").split("-"))
+        return {"Body": io.BytesIO(obj["body"][start : end + 1])}
+
+    def head(bucket, key):
+        return {"etag": str(len(obj["body"])), "size": len(obj["body"])}
+
+    def load():
+        return data_loader.load_legacy_logs("bucket", "logs/legacy.json")
+
+    client = MagicMock()
+    client.get_object.side_effect = get_object
+    with (
+        patch.object(aws, "get_s3_client", return_value=client),
+        patch.object(aws, "head_s3_object", side_effect=head),
+        patch.dict(data_loader.legacy_log_tails, clear=True),
+        patch.dict(data_loader.legacy_logs, clear=True),
+    ):
+        assert [log["endpoint"] for log in load()] == ["/a", "/b"]
+        # The incomplete last line is read again once it is complete
+        obj["body"] += b'oint": "/c"}\n'
+        assert [log["endpoint"] for log in load()] == ["/a", "/b", "/c"]
+        assert ranges[-1].startswith("bytes=38-")
+        ranges.clear()
+        assert len(load()) == 3
+        assert ranges == []
+        # A replaced (shorter) object is read from the start
+        obj["body"] = b'{"endpoint": "/new"}\n'
+        assert [log["endpoint"] for log in load()] == ["/new"]
+
+
+def test_load_log_frame_without_log_store():
+    """Test that dashboard columns are derived from the JSON logs as a fallback"""
+    from src.streamlit_monitoring.utils import data_loader
+
+    logs = [{"request_text": "Great!", "predicted_sentiment": "positive"}]
+    with (
+        patch.object(data_loader, "get_log_store", return_value=None),
+        patch.object(data_loader, "load_all_logs", return_value=logs),
+    ):
+        df = data_loader.load_log_frame(["text_length", "predicted_sentiment"])
+    assert df.to_dict("records") == [
+        {"text_length": 6, "predicted_sentiment": "positive"}
+    ]
+
+
+def test_load_feedback_logs_joins_predictions_by_id():
+    """Test that ID-only feedback is joined with the prediction it refers to"""
+    from src.streamlit_monitoring.utils import data_loader
+
+    logs = [
+        {
+            "endpoint": "/predict_proba_batch",
+            "prediction_ids": ["p1", "p2"],
+            "request_texts": ["Great!", "Awful"],
+            "predicted_sentiments": ["positive", "negative"],
+            "probabilities": [0.9, 0.8],
+        },
+        {
+            "endpoint": "/true_sentiment_batch",
+            "feedback": [
+                {"prediction_id": "p2", "true_sentiment": "positive"},
+                {"prediction_id": "missing", "true_sentiment": "positive"},
+            ],
+        },
+        {
+            "endpoint": "/true_sentiment",
+            "request_text": "Legacy",
+            "predicted_sentiment": "negative",
+            "probability": 0.6,
+            "true_sentiment": "negative",
+        },
+    ]
+    with patch.object(
+        data_loader, "load_all_logs", return_value=data_loader.expand_batch_logs(logs)
+    ):
+        feedback = data_loader.load_feedback_logs()
+
+    assert [
+        (log["request_text"], log["predicted_sentiment"], log["true_sentiment"])
+        for log in feedback
+    ] == [("Awful", "negative", "positive"), ("Legacy", "negative", "negative")]
+
+
+def test_load_log_frame_uses_logged_text_lengths():
+    """Test that redacted records contribute their logged text length"""
+    from src.streamlit_monitoring.utils import data_loader
+
+    logs = data_loader.expand_batch_logs(
+        [
+            {"request_text": "Great!", "predicted_sentiment": "positive"},
+            {
+                "text_hashes": ["a", "b"],
+                "text_lengths": [120, 80],
+                "predicted_sentiments": ["positive", "negative"],
+            },
+        ]
+    )
+    with (
+        patch.object(data_loader, "get_log_store", return_value=None),
+        patch.object(data_loader, "load_all_logs", return_value=logs),
+    ):
+        df = data_loader.load_log_frame(["text_length"])
+    assert df["text_length"].tolist() == [6, 120, 80]
+
+
+def test_id_only_feedback_keeps_full_text_under_production_policy():
+    """Test that feedback referencing a redacted prediction by ID is logged, and
+    joined, with the prediction's full text"""
+    from src.core.load_config import load_config
+    from src.core.logging_config import make_payload_policy
+    from src.streamlit_monitoring.utils import data_loader
+
+    with patch.dict("os.environ", {"APP_ENV": "production"}):
+        payload_config = load_config()["prediction_logging"]["payload"]
+    assert payload_config["full_text_sample_rate"] < 1.0
+    policy = make_payload_policy(payload_config)
+    # No prediction is sampled for full text
+    with patch("src.core.logging_config.random.random", return_value=0.99):
+        logs = [
+            policy.apply(
+                {
+                    "endpoint": "/predict_proba",
+                    "prediction_id": "p1",
+                    "request_text": "A long and thoughtful review.",
+                    "predicted_sentiment": "positive",
+                    "probability": 0.9,
+                }
+            ),
+            policy.apply(
+                {
+                    "endpoint": "/predict_batch",
+                    "prediction_ids": ["p2", "p3"],
+                    "request_texts": ["Great!", "Awful"],
+                    "predicted_sentiments": ["positive", "negative"],
+                }
+            ),
+            policy.apply(
+                {
+                    "endpoint": "/true_sentiment",
+                    "prediction_id": "p1",
+                    "true_sentiment": "negative",
+                }
+            ),
+            policy.apply(
+                {
+                    "endpoint": "/true_sentiment_batch",
+                    "feedback": [{"prediction_id": "p3", "true_sentiment": "negative"}],
+                }
+            ),
+        ]
+    assert "request_text" not in logs[0]
+    assert "request_texts" not in logs[1]
+
+    with patch.object(
+        data_loader, "load_all_logs", return_value=data_loader.expand_batch_logs(logs)
+    ):
+        feedback = data_loader.load_feedback_logs()
+    assert [(log["request_text"], log["true_sentiment"]) for log in feedback] == [
+        ("A long and thoughtful review.", "negative"),
+        ("Awful", "negative"),
+    ]